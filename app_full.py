@@ -2,10 +2,14 @@
 MHA ROGUELIKE - FULLY INTEGRATED WEB VERSION
 Complete game with all features from terminal version
 Run with: python app_full.py
+(or a WSGI server: gunicorn 'app_full:create_app()')
 """
 
-from flask import Flask, render_template, request, jsonify, session, send_from_directory, send_file
+from flask import Flask, Response, render_template, request, jsonify, session, send_from_directory, send_file
 from collections import Counter
+import hmac
+import logging
+import queue
 import secrets
 import sys
 import os
@@ -16,49 +20,32 @@ from pathlib import Path
 # Import complete game
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from mha_roguelike_complete import *
+from session_store import SessionStore, register_shared_type
+from session_backend import VersionConflict, make_backend
+from snapshot import encode_state, decode_state
+from input_dispatch import InputDispatcher
+from journal import InputJournal
+from session_locks import SessionLocks
+from message_buffer import MessageBuffer
+from message_catalog import CATALOG_JSON, VERSION as CATALOG_VERSION
+from channels import (Channel, ChannelHub, SSE_KEEPALIVE, SSE_KEEPALIVE_SECONDS,
+                      parse_ack, sse_event)
+from content_registry import (GENERIC_POI_DESCRIPTIONS, poi_descriptions,
+                              room_description, zone_descriptions)
+from game_logging import setup_logging, get_logger, elapsed_ms
+from metrics import Registry, CONTENT_TYPE, process_rss_bytes
+import memory_report
 
-def get_zone_description(zone_type, zone_number):
+def get_zone_description(zone_type, zone_number, rng=random):
     """Get a random zone description for the given zone type"""
-    descriptions = {
-        'forest': [
-            "Dense foliage surrounds you as ancient trees form a natural canopy overhead. The air is thick with the scent of moss and earth, and wildlife sounds echo through the undergrowth.",
-            "A primeval woodland stretches in all directions, where twisted roots and hanging vines create natural obstacles. Shafts of green-filtered light pierce through the dense canopy above."
-        ],
-        'flashfire': [
-            "Extreme heat radiates from every surface as flames dance along the walls in controlled patterns. The air shimmers with thermal distortion, and the temperature is almost unbearable.",
-            "This zone simulates a catastrophic fire scenario where intense heat and periodic flame bursts test your ability to withstand extreme temperatures. Every breath feels like inhaling fire."
-        ],
-        'urban': [
-            "The simulation recreates a dense city environment with abandoned streets, damaged buildings, and urban debris. The atmosphere of a disaster zone permeates every corner.",
-            "Concrete and steel dominate this metropolitan landscape where everyday city elements have been transformed into tactical obstacles and hiding spots."
-        ],
-        'lake': [
-            "Water is the dominant feature here - from shallow pools to deeper channels. The air is heavy with moisture, and the sound of dripping water echoes constantly.",
-            "This aquatic environment challenges your ability to navigate partially flooded spaces where water levels vary and platforms shift beneath your feet."
-        ],
-        'mountain': [
-            "Rough stone and jagged rock formations define this high-altitude simulation. The uneven terrain and rocky obstacles demand careful footing and strategic positioning.",
-            "A harsh mountain environment where elevation changes, loose gravel, and stone outcroppings create a treacherous battlefield requiring both strength and agility."
-        ],
-        'blizzard': [
-            "Frigid temperatures and ice-covered surfaces dominate this frozen zone. Your breath forms clouds in the air, and frost creeps across every surface with supernatural speed.",
-            "An extreme cold environment where sub-zero temperatures, ice formations, and simulated wind chill test your endurance against the harshest winter conditions."
-        ],
-        'underground': [
-            "Claustrophobic tunnels and cave systems wind through compressed earth and stone. The air is stale, support structures creak ominously, and darkness presses in from all sides.",
-            "This subterranean zone simulates the dangers of underground rescue operations - from mine collapses to cave systems where every shadow could hide danger."
-        ]
-    }
-    
-    zone_descs = descriptions.get(zone_type, descriptions['forest'])
-    # Randomly pick one of the two descriptions
-    return random.choice(zone_descs)
+    return rng.choice(zone_descriptions(zone_type))
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
 
-# Store game sessions
-games = {}
+# Structured, non-blocking logging - TDS_LOG_LEVEL/FORMAT/SAMPLE, see game_logging.py
+setup_logging()
+log = get_logger('app')
 
 @app.route('/')
 def homepage():
@@ -82,14 +69,136 @@ def index():
     """Serve the main game page"""
     return render_template('game.html')
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return metrics_registry.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+@app.route('/api/session_stats')
+def session_stats():
+    """Report session store occupancy and eviction counts"""
+    stats = games.get_stats()
+    if journal is not None:
+        stats['journal'] = journal.get_stats()
+    stats['channels'] = channels.get_stats()
+    return jsonify(stats)
+
+# Admin endpoints only exist when TDS_ADMIN_TOKEN is set; send it as the
+# X-Admin-Token header (or ?token=)
+def admin_authorized(headers, args):
+    token = os.environ.get('TDS_ADMIN_TOKEN')
+    if not token:
+        return False
+    offered = headers.get('X-Admin-Token') or args.get('token') or ''
+    return hmac.compare_digest(offered.encode(), token.encode())
+
+def memory_snapshot(session_id=None, sample=50, hold=None):
+    """Memory breakdown of one session, or averaged over recently used ones
+    
+    hold(session_id) is a context manager that keeps the session still while
+    it is walked. Returns None for an unknown session_id.
+    """
+    if session_id:
+        game = games.peek(session_id)
+        if game is None:
+            return None
+        with hold(session_id):
+            return {
+                'session_id': session_id,
+                'breakdown': memory_report.session_breakdown(game),
+                'characters': memory_report.character_breakdown(game),
+                'traced_bytes': memory_report.traced_session_bytes(game, copies=5),
+            }
+    
+    breakdowns = []
+    pairs = games.sample(sample)
+    for sid, game in pairs:
+        with hold(sid):
+            breakdowns.append(memory_report.session_breakdown(game))
+    return {
+        'store': games.get_stats(),
+        'rss_bytes': process_rss_bytes(),
+        'sampled': len(breakdowns),
+        'breakdown': memory_report.aggregate(breakdowns),
+        'shared': memory_report.shared_breakdown(pairs[0][1]) if pairs else None,
+    }
+
+@app.route('/api/admin/memory')
+def admin_memory():
+    """Per-session memory breakdown (?session_id= for one, else ?sample=N recent ones)"""
+    if not admin_authorized(request.headers, request.args):
+        return jsonify({'error': 'Not found'}), 404
+    report = memory_snapshot(request.args.get('session_id'),
+                             request.args.get('sample', 50, type=int), session_locks.hold)
+    if report is None:
+        return jsonify({'error': 'Invalid session'}), 400
+    return jsonify(report)
+
+# Abilities never change for a student, so the client summary is built once per template
+_abilities_summaries = {}
+
+def get_abilities_summary(char):
+    """Client-facing abilities dict for a character (shared - don't mutate)"""
+    summary = _abilities_summaries.get(char.template)
+    if summary is None:
+        summary = {name: {'damage': data[0], 'cost': data[1], 'desc': data[3]}
+                   for name, data in char.abilities.items()}
+        _abilities_summaries[char.template] = summary
+    return summary
+
+
+class PartyEffects:
+    """Party-wide skill buffs, aggregated over the students who aren't captured
+
+    Only buying a party skill, a capture or a rescue can change these, and each
+    of those calls refresh(), so enemy turns and bench healing read them directly.
+    """
+    __slots__ = ('active', 'damage_reduction', 'ribbit_recovery')
+
+    def __init__(self):
+        self.active = ()
+        self.damage_reduction = 0
+        self.ribbit_recovery = False
+
+    def refresh(self, characters):
+        """Recompute from the roster"""
+        self.active = tuple(c for c in characters if not c.captured)
+        flags = 0
+        for c in self.active:
+            flags |= c.skill_flags
+        # PARTY BUFF: Acid Veil - 10% damage reduction for everyone
+        self.damage_reduction = 10 if flags & FLAG_ACID_VEIL else 0
+        self.ribbit_recovery = bool(flags & FLAG_RIBBIT_RECOVERY)
+
+
+# Client-visible state is split into sections that are versioned separately,
+# so /api/input only has to rebuild and ship the ones that changed. Each has a
+# bit in FullWebGame.dirty_sections, set by mark_dirty() when something it
+# shows may have changed - get_state_dict() only re-checks those sections.
+STATE_SECTIONS = ('meta', 'options', 'character', 'enemy', 'roster')
+SECTION_BITS = {section: 1 << index for index, section in enumerate(STATE_SECTIONS)}
+ALL_SECTIONS = (1 << len(STATE_SECTIONS)) - 1
+
+
 class FullWebGame:
     """Complete game session with all terminal features"""
     
-    def __init__(self, session_id):
+    def __init__(self, session_id, seed=None):
         self.session_id = session_id
+        # Client state sections to re-check (see get_state_dict) - all of them at first
+        self.dirty_sections = ALL_SECTIONS
+        
+        # PHASE 2.5: Every random roll in this session comes from its own generator,
+        # so a seed reproduces a whole run and concurrent sessions don't interleave
+        self.rng = SessionRandom(seed)
         
         # Core game state
         self.characters = create_class_1a()
+        # Roster index by name, and the students who can currently be team-up partners
+        self.characters_by_name = {c.name: c for c in self.characters}
+        self.team_up_ready = set()
+        self.party = PartyEffects()
+        self.party.refresh(self.characters)
         self.global_tree = GlobalSkillTree()
         self.current_zone = 1
         self.current_floor = 1
@@ -117,15 +226,133 @@ class FullWebGame:
         # Game flow
         self.game_state = 'intro'
         self.pending_input = None  # What type of input we're waiting for
-        self.messages = []
+        self.messages = MessageBuffer()
+        self.messages_enabled = True  # off while replaying the input journal
         self.last_action = None
         
         # Options/choices
         self.current_options = []
         
+        # Client state versioning (see get_state_dict) - not persisted, a restored
+        # session gets a new epoch so clients resync with a full state
+        self.state_epoch = secrets.token_hex(4)
+        self.state_version = 0
+        self.section_marks = {}
+        
         # Generate randomized zone themes
         self.zone_themes = self.generate_zone_sequence()
-    
+
+    # Attributes that are only created once the player reaches that part of the game
+    OPTIONAL_STATE_FIELDS = ('zone_encounters', 'pre_skill_state', 'current_poi_list')
+
+    def to_state(self):
+        """Full session state as JSON-friendly data (for session backends)"""
+        state = {
+            'session_id': self.session_id,
+            'rng': list(self.rng.getstate()),
+            'characters': [c.to_state() for c in self.characters],
+            'global_tree': self.global_tree.to_state(),
+            'current_zone': self.current_zone,
+            'current_floor': self.current_floor,
+            'zone_bosses': [[zone, boss.to_state()] for zone, boss in self.zone_bosses.items()],
+            'selected_character': (self.characters.index(self.selected_character)
+                                   if self.selected_character else None),
+            'current_theme': self.current_theme,
+            'zone_themes': self.zone_themes,
+            'zone_map': zone_map_to_state(self.zone_map),
+            'current_room': self.current_room,
+            'visited_rooms': sorted(self.visited_rooms),
+            'cleared_rooms': sorted(self.cleared_rooms),
+            'rested_in_rooms': sorted(self.rested_in_rooms),
+            'searched_rooms': sorted(getattr(self, 'searched_rooms', ())),
+            'in_combat': self.in_combat,
+            'current_enemy': None,
+            'combat_state': self.combat_state,
+            'shared_inventory': self.shared_inventory,
+            'game_state': self.game_state,
+            'pending_input': self.pending_input,
+            'messages': self.messages.to_list(),
+            'last_action': self.last_action,
+            'current_options': self.current_options,
+        }
+
+        # Bosses are shared between zone_bosses and current_enemy - keep the link
+        enemy = self.current_enemy
+        if enemy is not None:
+            boss_zone = next((z for z, b in self.zone_bosses.items() if b is enemy), None)
+            if boss_zone is not None:
+                state['current_enemy'] = {'boss_zone': boss_zone}
+            else:
+                state['current_enemy'] = {'enemy': enemy.to_state()}
+
+        for field in self.OPTIONAL_STATE_FIELDS:
+            if hasattr(self, field):
+                state[field] = getattr(self, field)
+        if hasattr(self, 'current_item_map'):
+            state['current_item_map'] = list(self.current_item_map.items())
+        if hasattr(self, 'current_team_ups'):
+            # Attack data points into the read-only character templates
+            state['current_team_ups'] = [[partner, dict(attack)] for partner, attack in self.current_team_ups]
+
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a session from to_state() output"""
+        game = cls(state['session_id'])
+        if 'rng' in state:
+            game.rng.setstate(tuple(state['rng']))
+
+        for char, char_state in zip(game.characters, state['characters']):
+            char.apply_state(char_state)
+            game.refresh_team_up_ready(char)
+        game.party.refresh(game.characters)
+        game.global_tree = GlobalSkillTree.from_state(state['global_tree'])
+        game.zone_bosses = {zone: BossEnemy.from_state(boss) for zone, boss in state['zone_bosses']}
+
+        if state['selected_character'] is not None:
+            game.selected_character = game.characters[state['selected_character']]
+
+        game.current_zone = state['current_zone']
+        game.current_floor = state['current_floor']
+        game.current_theme = state['current_theme']
+        game.zone_themes = list(state['zone_themes'])
+        game.zone_map = zone_map_from_state(state['zone_map'])
+        game.current_room = state['current_room']
+        game.visited_rooms = set(state['visited_rooms'])
+        game.cleared_rooms = set(state['cleared_rooms'])
+        game.rested_in_rooms = set(state['rested_in_rooms'])
+        game.searched_rooms = set(state['searched_rooms'])
+
+        game.in_combat = state['in_combat']
+        enemy = state['current_enemy']
+        if enemy is None:
+            game.current_enemy = None
+        elif 'boss_zone' in enemy:
+            game.current_enemy = game.zone_bosses[enemy['boss_zone']]
+        elif 'zone' in enemy['enemy']:
+            game.current_enemy = BossEnemy.from_state(enemy['enemy'])
+        else:
+            game.current_enemy = Enemy.from_state(enemy['enemy'])
+        game.combat_state = dict(state['combat_state'])
+
+        game.shared_inventory = list(state['shared_inventory'])
+        game.game_state = state['game_state']
+        game.pending_input = state['pending_input']
+        game.messages = MessageBuffer.from_list(state.get('messages', ()))
+        game.last_action = state['last_action']
+        game.current_options = list(state['current_options'])
+
+        for field in cls.OPTIONAL_STATE_FIELDS:
+            if field in state:
+                setattr(game, field, state[field])
+        if 'current_item_map' in state:
+            game.current_item_map = {int(k): v for k, v in state['current_item_map']}
+        if 'current_team_ups' in state:
+            game.current_team_ups = [tuple(t) for t in state['current_team_ups']]
+
+        return game
+
     def generate_zone_sequence(self):
         """Generate randomized zone sequence with no consecutive duplicates"""
         themes = ['forest', 'flashfire', 'urban', 'lake', 'mountain', 'blizzard', 'underground']
@@ -134,7 +361,7 @@ class FullWebGame:
         
         for i in range(20):
             available = [t for t in themes if t != last_theme]
-            chosen = random.choice(available)
+            chosen = self.rng.choice(available)
             sequence.append(chosen)
             last_theme = chosen
         
@@ -142,96 +369,121 @@ class FullWebGame:
     
     def get_room_description(self, zone_theme, room_number):
         """Get unique room description based on zone theme and room number (1-5)"""
-        descriptions = {
-            'forest': [
-                "You enter a dense grove where ancient trees tower overhead, their gnarled roots creating natural obstacles across the mossy floor. Shafts of dappled sunlight filter through the canopy above.",
-                "The room opens into a clearing dominated by a massive fallen oak, its hollow trunk large enough to serve as cover. Thick underbrush lines the perimeter, rustling with unseen movement.",
-                "Twisted vines hang from the ceiling like natural curtains, creating a maze-like environment. The air is thick with the scent of earth and decay, and mushrooms cluster on every surface.",
-                "You step into a rocky outcropping within the forest, where a small waterfall cascades into a crystal-clear pool. Moss-covered boulders provide elevated positions around the space.",
-                "The forest opens into a sun-drenched glade where wildflowers blanket the ground. A ring of ancient standing stones marks the center, their purpose long forgotten."
-            ],
-            'flashfire': [
-                "You step into a burning city street where storefronts blaze on both sides. Flames pour from shattered windows, and the asphalt itself seems to melt under the intense heat.",
-                "The room simulates a burning office building interior - desks and office equipment engulfed in flames, ceiling tiles raining down, emergency sprinklers long since failed.",
-                "You enter what appears to be a shopping district consumed by fire. Store mannequins melt in display windows, and neon signs spark and flicker before dying in the inferno.",
-                "The area resembles a city parking structure where vehicles have become explosive hazards. Flames leap from car to car, and concrete pillars glow red from the heat.",
-                "You step into a burning apartment complex with flames visible through every window. Fire escapes have warped from the heat, and smoke billows through hallways."
-            ],
-            'urban': [
-                "The room resembles a city street corner with storefronts, a bus stop bench, and a non-functional traffic light. Debris and abandoned vehicles provide cover throughout the space.",
-                "You enter what appears to be a multi-story parking garage section, with concrete pillars supporting low ceilings. Abandoned cars sit at odd angles, some with doors hanging open.",
-                "The area is set up like a small plaza with a dry fountain at its center. Cafe tables and chairs are scattered about, and shuttered shop windows line the walls.",
-                "This room recreates a subway platform complete with tracks, a stationary train car, and tiled walls covered in faded advertisements and graffiti.",
-                "You step into an urban rooftop environment with AC units, water towers, and ventilation systems creating a maze of obstacles. Gaps between sections simulate building edges."
-            ],
-            'lake': [
-                "The room features a large pool of water in its center, with floating platforms and partially submerged ruins visible beneath the surface. The air is cool and damp.",
-                "You enter a flooded chamber where water reaches knee-height throughout most of the space. A network of raised walkways and platforms provides dry paths across the room.",
-                "The area contains a series of connected pools at different depths, like natural tidal pools. Smooth stones and shells litter the shallow areas, while deeper sections are murky and dark.",
-                "This room houses what appears to be an underwater viewing area, with one wall of reinforced glass showing a darkened aquarium beyond. Puddles cover the floor from previous leaks.",
-                "You step into a room designed like a boat dock, with wooden planks extending over dark water. Mooring posts, coiled ropes, and fishing equipment are scattered about."
-            ],
-            'mountain': [
-                "The room is carved from rough stone, with jagged outcroppings creating natural pillars throughout. Loose rocks and gravel cover the uneven floor, making footing treacherous.",
-                "You enter a cavern-like space where stalactites hang from the ceiling and stalagmites rise from the floor. The walls glitter with embedded crystals that catch any available light.",
-                "The area resembles a narrow mountain pass with towering rock walls on either side. Large boulders are strewn about as if from an ancient avalanche.",
-                "This room features multiple levels connected by rough stone ledges and natural ramps. Small crevices and caves dot the walls, providing potential hiding spots.",
-                "You step into what appears to be the inside of a hollow mountain peak, with a spiraling path leading upward along the curved walls. The center drops away into darkness."
-            ],
-            'blizzard': [
-                "You enter a frozen chamber where ice coats every surface and your breath forms clouds in the frigid air. Icicles hang from the ceiling like frozen spears, and snow drifts pile against the walls.",
-                "The room is a winter wasteland with howling wind effects and artificial snow swirling through the air. Frozen sculptures of ice create obstacles, and the floor is treacherously slick.",
-                "You step into what appears to be the inside of a glacier - walls of blue ice surround you, and frozen formations jut out at odd angles. Frost creeps across any exposed surface.",
-                "The area resembles a frozen tundra with snow-covered ground and ice pillars rising from the floor. A bitter wind cuts through the space, and everything is coated in a layer of frost.",
-                "You enter a room dominated by a massive ice wall that reaches to the ceiling. Frozen waterfalls are suspended mid-cascade, and the temperature is well below freezing."
-            ],
-            'underground': [
-                "You descend into a cramped tunnel system with rough-hewn walls pressing in from all sides. Support beams creak ominously overhead, and the air is thick with the smell of earth and stone.",
-                "The room opens into a vast underground cavern with a ceiling lost in darkness above. Phosphorescent fungi provide eerie green light, casting strange shadows across ancient rock formations.",
-                "You enter what appears to be an abandoned mine shaft, with rusted rail tracks running along the floor and old mining equipment left to decay. The walls show pick marks from long-ago excavation.",
-                "The area is a natural cave system with multiple passages branching off in different directions. Water drips constantly from the ceiling, forming small pools on the uneven stone floor.",
-                "You step into an underground chamber that seems to be part of an ancient ruin - crumbling pillars support a low ceiling, and strange symbols are carved into the weathered stone walls."
-            ]
-        }
-        
-        theme_descriptions = descriptions.get(zone_theme, descriptions['forest'])
-        # Use room number (1-5) to index into the 5 unique descriptions
-        desc_index = (room_number - 1) % 5
-        return theme_descriptions[desc_index]
+        return room_description(zone_theme, room_number)
         
     def add_msg(self, text, msg_type='normal'):
         """Add message to buffer"""
-        # Handle separator specially - use CSS border instead of text
-        if msg_type == 'separator':
-            self.messages.append({'text': '', 'type': 'separator_line'})
-        elif text:
-            for line in str(text).split('\n'):
-                if line.strip():
-                    self.messages.append({'text': line, 'type': msg_type})
+        if self.messages_enabled:
+            # Separators become a CSS border (see MessageBuffer)
+            self.messages.add(text, msg_type)
+    
+    def add_template(self, template_id, msg_type='normal', **params):
+        """Add a message catalog template line (see message_catalog.py)"""
+        if self.messages_enabled:
+            self.messages.add_template(template_id, msg_type, params)
     
     def clear_msgs(self):
         """Clear message buffer"""
-        self.messages = []
-    
-    def get_state_dict(self):
-        """Convert to JSON-serializable dict"""
-        print(f"DEBUG get_state_dict: current_theme='{self.current_theme}', game_state='{self.game_state}'")
-        
-        state = {
-            'zone': self.current_zone,
-            'floor': self.current_floor,
-            'theme': self.current_theme,
-            'game_state': self.game_state,
-            'pending_input': self.pending_input,
-            'messages': self.messages,
-            'options': self.current_options,
-            'in_combat': self.in_combat,
-        }
+        self.messages.clear()
+    
+    # TEAM-UP ATTACKS: team_up_ready holds every partner who is Level 10+, not
+    # captured and unlocked. Anything that changes one of those calls
+    # refresh_team_up_ready(), so the combat menu never has to scan the roster
+    def refresh_team_up_ready(self, char):
+        """Re-check one student after a level up, capture, rescue or unlock"""
+        # The roster counts only change on these same events
+        self.mark_dirty('roster')
+        if char.level >= 10 and not char.captured and char.unlocked:
+            self.team_up_ready.add(char.name)
+        else:
+            self.team_up_ready.discard(char.name)
+    
+    def award_exp(self, char, amount):
+        """Give EXP and keep team-up availability current - returns True on level up"""
+        leveled_up = char.gain_exp(amount)
+        if leveled_up:
+            self.refresh_team_up_ready(char)
+        return leveled_up
+    
+    def get_available_team_ups(self, char):
+        """Team-up attacks char can use right now (both Level 10+, partner active)"""
+        if char.level < 10:
+            return []
+        ready = self.team_up_ready
+        return [(partner, attack) for partner, attack in char.team_up_attacks.items() if partner in ready]
+    
+    def heal_bench(self, char):
+        """PHASE 1: Passive healing for benched characters after a cleared room"""
+        # Heal based on vitality: 1 HP + (vitality bonus / 15)
+        vit_bonus = self.global_tree.get_hp_bonus()
+        heal_per_room = max(1, vit_bonus // 15)
+        
+        # PHASE 2.5: Ochaco's Helping Hand bonus
+        ochaco_bonus = 0
+        if char.unique_passive and char.unique_passive['type'] == 'helping_hand':
+            ochaco_bonus = 2
+        
+        # PHASE 2.5: Asui's Ribbit Recovery energy restore
+        asui_energy = 0
+        if char.unique_passive and char.unique_passive['type'] == 'ribbit_recovery':
+            asui_energy = 5
+        
+        for character in self.party.active:
+            if character is not char:
+                character.heal(heal_per_room + ochaco_bonus)
+                if asui_energy > 0:
+                    character.restore_energy(asui_energy)
+    
+    # Where each section changes: options through set_options(), the roster
+    # through refresh_team_up_ready(); meta, character and enemy fields move on
+    # almost every input, so process_input() marks those once per input
+    def mark_dirty(self, *sections):
+        """Have the next get_state_dict() re-check these sections"""
+        for section in sections:
+            self.dirty_sections |= SECTION_BITS[section]
+    
+    def set_options(self, options):
+        """Replace the menu options (appending to them afterwards is fine)"""
+        self.current_options = options
+        self.dirty_sections |= SECTION_BITS['options']
+
+    def _section_fingerprint(self, section):
+        """Cheap comparable snapshot of one section"""
+        if section == 'meta':
+            return (self.current_zone, self.current_floor, self.current_theme,
+                    self.game_state, self.pending_input, self.in_combat)
+        if section == 'options':
+            # Compared as is - get_state_dict() keeps a copy once it has moved
+            return self.current_options
+        if section == 'character':
+            char = self.selected_character
+            return None if char is None else (
+                char.template, char.level, char.hp, char.max_hp, char.energy, char.max_energy,
+                char.attack, char.defense, char.exp, char.exp_to_level, char.skill_points,
+                tuple(char.inventory), tuple(self.shared_inventory))
+        if section == 'enemy':
+            enemy = self.current_enemy
+            return None if enemy is None else (
+                enemy.name, enemy.level, enemy.hp, enemy.max_hp, type(enemy))
+        return tuple((c.captured, c.unlocked) for c in self.characters)
+
+    def _build_section(self, section, state):
+        """Write one section's client fields into state"""
+        if section == 'meta':
+            state['zone'] = self.current_zone
+            state['floor'] = self.current_floor
+            state['theme'] = self.current_theme
+            state['game_state'] = self.game_state
+            state['pending_input'] = self.pending_input
+            state['in_combat'] = self.in_combat
+        
+        elif section == 'options':
+            state['options'] = self.current_options
         
         # Character info
-        if self.selected_character:
+        elif section == 'character':
             char = self.selected_character
-            state['character'] = {
+            state['character'] = None if char is None else {
                 'name': char.name,
                 'quirk': char.quirk,
                 'level': char.level,
@@ -245,24 +497,78 @@ class FullWebGame:
                 'exp_to_level': char.exp_to_level,
                 'skill_points': char.skill_points,
                 'inventory': char.inventory,
-                'abilities': {name: {'damage': data[0], 'cost': data[1], 'desc': data[3]} 
-                             for name, data in char.abilities.items()}
+                # PHASE 1: items live in the shared inventory the item menu uses
+                'shared_inventory': self.shared_inventory,
+                'abilities': get_abilities_summary(char)
             }
         
         # Enemy info
-        if self.current_enemy:
-            state['enemy'] = {
-                'name': self.current_enemy.name,
-                'level': self.current_enemy.level,
-                'hp': self.current_enemy.hp,
-                'max_hp': self.current_enemy.max_hp,
-                'is_boss': isinstance(self.current_enemy, BossEnemy)
+        elif section == 'enemy':
+            enemy = self.current_enemy
+            state['enemy'] = None if enemy is None else {
+                'name': enemy.name,
+                'level': enemy.level,
+                'hp': enemy.hp,
+                'max_hp': enemy.max_hp,
+                'is_boss': isinstance(enemy, BossEnemy)
             }
         
         # Available characters count
-        available = [c for c in self.characters if not c.captured and c.unlocked]
-        state['active_count'] = len(available)
-        state['total_count'] = len([c for c in self.characters if c.unlocked])
+        elif section == 'roster':
+            active = total = 0
+            for c in self.characters:
+                if c.unlocked:
+                    total += 1
+                    if not c.captured:
+                        active += 1
+            state['active_count'] = active
+            state['total_count'] = total
+
+    def get_state_dict(self, ack=None, epoch=None, catalog=None):
+        """Convert to JSON-serializable dict
+        
+        With the version (ack) and epoch from the client's last state, only the
+        sections that changed since then are included ('delta': True). A client
+        that sends the current message catalog version gets catalog references
+        instead of message text.
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("get_state_dict", extra={'session_id': self.session_id, 'theme': self.current_theme,
+                                               'game_state': self.game_state, 'ack': ack})
+        
+        # Bump the version of every dirty section whose fingerprint moved
+        dirty = self.dirty_sections
+        if dirty:
+            self.dirty_sections = 0
+            bumped = False
+            for section in STATE_SECTIONS:
+                if not dirty & SECTION_BITS[section]:
+                    continue
+                fingerprint = self._section_fingerprint(section)
+                mark = self.section_marks.get(section)
+                if mark is None or mark[0] != fingerprint:
+                    if not bumped:
+                        self.state_version += 1
+                        bumped = True
+                    if section == 'options':
+                        # Options are small lists of dicts - copy so in-place edits still show up
+                        fingerprint = [dict(option) for option in fingerprint]
+                    self.section_marks[section] = (fingerprint, self.state_version)
+        
+        # A different epoch means the client saw another copy of this session
+        # (restart, reload from a backend) - its version numbers mean nothing here
+        delta = (epoch == self.state_epoch and isinstance(ack, int)
+                 and 0 <= ack <= self.state_version)
+        
+        state = {
+            'version': self.state_version,
+            'epoch': self.state_epoch,
+            'delta': delta,
+            'messages': self.messages.to_list(catalog is not None and catalog == CATALOG_VERSION),
+        }
+        for section in STATE_SECTIONS:
+            if not delta or self.section_marks[section][1] > ack:
+                self._build_section(section, state)
         
         return state
     
@@ -289,7 +595,7 @@ class FullWebGame:
         
         self.game_state = 'ready'
         self.pending_input = 'continue'
-        self.current_options = [{'key': 'continue', 'text': 'Press Enter to begin Zone 1'}]
+        self.set_options([{'key': 'continue', 'text': 'Press Enter to begin Zone 1'}])
     
     
     def begin_zone(self):
@@ -305,7 +611,7 @@ class FullWebGame:
         self.current_theme = theme_id
         
         # Generate zone map
-        self.zone_map = generate_zone_map()
+        self.zone_map = generate_zone_map(rng=self.rng)
         self.current_room = 1
         self.current_floor = 1
         self.visited_rooms = set()
@@ -320,13 +626,13 @@ class FullWebGame:
         
         # Display zone info
         self.add_msg("="*59, 'separator')
-        self.add_msg(f"ZONE {self.current_zone}/20 - {theme_id.upper()}", 'highlight')
-        self.add_msg(f"Environmental Type: {theme_id.title()}", 'normal')
+        self.add_template('zone.header', 'highlight', zone=self.current_zone, theme=theme_id.upper())
+        self.add_template('zone.environment', theme=theme_id.title())
         self.add_msg("="*59, 'separator')
         self.add_msg("")
         
         # Zone description
-        desc = get_zone_description(theme_id, self.current_zone)
+        desc = get_zone_description(theme_id, self.current_zone, rng=self.rng)
         self.add_msg(desc)
         self.add_msg("")
         self.add_msg("="*59, 'separator')
@@ -358,7 +664,7 @@ class FullWebGame:
         self.add_msg(f"  STA: +{self.global_tree.get_energy_bonus()} | EVA: +{self.global_tree.get_evasion_bonus()}%")
         self.add_msg("")
         
-        self.current_options = []
+        self.set_options([])
         for i, char in enumerate(available):
             if char.captured:
                 # Show captured characters but make them unselectable
@@ -465,7 +771,7 @@ class FullWebGame:
                 self.clear_msgs()
                 self.add_msg("")
                 self.add_msg(f"{char.name} deploys!", 'success')
-                self.add_msg(f'"{char.get_deployment_dialogue()}"')
+                self.add_msg(f'"{char.get_deployment_dialogue(rng=self.rng)}"')
                 self.add_msg(f'[Aizawa]: "{char.get_aizawa_response()}"')
                 self.add_msg("")
                 
@@ -546,11 +852,11 @@ class FullWebGame:
             spawn_combat = True
         else:
             # Normal 40% chance
-            spawn_combat = random.random() < 0.4
+            spawn_combat = self.rng.random() < 0.4
         
         if spawn_combat:
             self.zone_encounters += 1
-            enemy = create_enemy(self.current_zone, self.current_floor)
+            enemy = create_enemy(self.current_zone, self.current_floor, rng=self.rng)
             self.current_enemy = enemy
             self.in_combat = True
             self.combat_state = {
@@ -572,25 +878,7 @@ class FullWebGame:
             # Mark as cleared even if empty
             self.cleared_rooms.add(self.current_room)
             
-            # PHASE 1: Passive healing for benched characters
-            vit_bonus = self.global_tree.get_hp_bonus()
-            heal_per_room = max(1, vit_bonus // 15)
-            
-            # PHASE 2.5: Ochaco's Helping Hand bonus
-            ochaco_bonus = 0
-            if self.selected_character.unique_passive and self.selected_character.unique_passive['type'] == 'helping_hand':
-                ochaco_bonus = 2
-            
-            # PHASE 2.5: Asui's Ribbit Recovery energy restore
-            asui_energy = 0
-            if self.selected_character.unique_passive and self.selected_character.unique_passive['type'] == 'ribbit_recovery':
-                asui_energy = 5
-            
-            for character in self.characters:
-                if character != self.selected_character and not character.captured:
-                    character.heal(heal_per_room + ochaco_bonus)
-                    if asui_energy > 0:
-                        character.restore_energy(asui_energy)
+            self.heal_bench(self.selected_character)
             
             self.show_navigation_options()
     
@@ -614,16 +902,16 @@ class FullWebGame:
             option_number += 1
         
         # TEAM-UP ATTACKS: Check for available partners
-        team_ups = char.get_available_team_ups(self.characters)
+        team_ups = self.get_available_team_ups(char)
         if team_ups:
             self.add_msg(f"{option_number}. 🤝 TEAM-UP ATTACK - Massive damage with partner")
         
-        self.current_options = [
+        self.set_options([
             {'key': '1', 'text': 'Attack'},
             {'key': '2', 'text': 'Quirk'},
             {'key': '3', 'text': 'Item'},
             {'key': '4', 'text': 'Skills'}
-        ]
+        ])
         
         if char.plus_ultra_available and not char.plus_ultra_used_this_zone:
             self.current_options.append({'key': '5', 'text': 'Plus Ultra'})
@@ -642,9 +930,8 @@ class FullWebGame:
         self.add_msg("")
         
         # Generate POI descriptions based on zone theme
-        print(f"DEBUG show_poi_search_results: current_theme = '{self.current_theme}'")
-        print(f"DEBUG show_poi_search_results: zone_themes = {self.zone_themes}")
-        print(f"DEBUG show_poi_search_results: current_zone = {self.current_zone}")
+        log.debug("show_poi_search_results", extra={'session_id': self.session_id, 'theme': self.current_theme,
+                                                    'zone': self.current_zone})
         
         poi_descriptions = self.generate_poi_descriptions(self.current_theme, num_poi)
         
@@ -662,133 +949,33 @@ class FullWebGame:
         self.add_msg("")
         self.add_msg("Which point of interest do you want to investigate?")
         
-        self.current_options = [{'key': str(i), 'text': f'Investigate {i}'} for i in range(num_poi + 1)]
+        self.set_options([{'key': str(i), 'text': f'Investigate {i}'} for i in range(num_poi + 1)])
     
     def generate_poi_descriptions(self, zone_theme, count):
         """Generate POI descriptions based on zone theme"""
-        print(f"DEBUG: generate_poi_descriptions called with zone_theme='{zone_theme}', count={count}")
-        
-        poi_templates = {
-            'forest': [
-                "A hollow in an old tree trunk, partially concealed by hanging vines",
-                "A cluster of unusually large mushrooms growing in a perfect circle",
-                "A gap beneath a fallen log where the ground seems disturbed",
-                "Strange markings carved into a tree at chest height",
-                "A dense thicket of thorns with something glinting inside",
-                "An abandoned bird's nest large enough to hold objects",
-                "A burrow entrance at the base of a massive oak tree",
-                "Thick undergrowth where broken branches suggest recent passage",
-                "A natural hollow between tree roots filled with dead leaves",
-                "A cluster of unusual flowers that seem out of place"
-            ],
-            'flashfire': [
-                "A burning vehicle with its trunk still accessible",
-                "A collapsed storefront with something visible through the flames",
-                "A fire escape platform hanging at a dangerous angle",
-                "An office desk drawer that survived the blaze",
-                "A vending machine with its glass melted and warped",
-                "A mailbox partially protected by a concrete barrier",
-                "A phone booth with flames dancing around its frame",
-                "A newspaper stand engulfed but structurally intact",
-                "A park bench beneath a burning tree canopy",
-                "A bus stop shelter with one wall still standing",
-                "A storefront security gate warped by heat",
-                "An ATM alcove providing slight protection from flames"
-            ],
-            'urban': [
-                "A dumpster with its lid slightly open",
-                "A boarded-up doorway with one plank hanging loose",
-                "A newspaper stand with papers still inside",
-                "A manhole cover shifted to one side",
-                "A parked delivery truck with its back door unlocked",
-                "A phone booth with the door wedged open",
-                "A street vendor cart abandoned at an odd angle",
-                "A mailbox with a damaged lock",
-                "A maintenance access panel in the wall",
-                "A storm drain with something visible inside",
-                "A vending machine with a broken glass panel",
-                "An electrical junction box hanging open"
-            ],
-            'lake': [
-                "A partially submerged crate bobbing against the shore",
-                "A small cave entrance just above the waterline",
-                "A cluster of reeds thick enough to hide something",
-                "An overturned boat resting on the bank",
-                "A rope hanging down from above, disappearing into the water",
-                "A fishing net tangled around submerged debris",
-                "A waterlogged wooden chest caught between rocks",
-                "A drainage pipe opening at the water's edge",
-                "A collection of flotsam gathered in an eddy",
-                "Lily pads clustered unusually thick in one area",
-                "A submerged platform visible beneath the surface",
-                "A hollow in the rocky shoreline below the waterline"
-            ],
-            'mountain': [
-                "A narrow crevice in the rock face",
-                "A pile of loose stones that looks recently disturbed",
-                "A small cave opening partially blocked by rubble",
-                "A ledge with what might be an old campsite",
-                "A natural shelf in the rock where items could be hidden",
-                "A crack in the floor with something visible in the depths",
-                "A ring of stones arranged deliberately around a central point",
-                "An overhang creating a sheltered nook in the stone",
-                "A gap between two large boulders",
-                "Ancient mining equipment left to rust",
-                "A collapsed section of ceiling with loose rocks",
-                "Crystalline formations that seem hollow inside"
-            ],
-            'blizzard': [
-                "A snow drift piled suspiciously high against the wall",
-                "An ice formation with something frozen inside",
-                "A gap in the ice wall revealing a hidden alcove",
-                "Frost-covered debris clustered in the corner",
-                "An icicle formation hanging over a shadowed recess",
-                "A section of snow that appears recently disturbed",
-                "A frozen container partially visible through the ice",
-                "A natural ice shelf jutting from the wall",
-                "Compacted snow formed into an unnatural shape",
-                "A wind-carved hollow in a snowbank",
-                "Ice-encrusted equipment barely visible through frost",
-                "A crevasse in the frozen floor with darkness below"
-            ],
-            'underground': [
-                "A crack in the cave wall where loose rocks have fallen away",
-                "An old mining cart tipped on its side",
-                "A support beam that's partially collapsed, creating a gap",
-                "A cluster of glowing fungi growing around something buried",
-                "A pile of excavated earth and stone",
-                "A rusted toolbox half-buried in rubble",
-                "A side passage blocked by a recent cave-in",
-                "An ancient wooden crate covered in mineral deposits",
-                "A natural alcove hidden behind a rock formation",
-                "A section of wall where the stone appears different",
-                "A collapsed mine shaft with timbers still intact",
-                "A pool of stagnant water with something submerged",
-                "Railroad tracks that disappear into a dark tunnel",
-                "A ventilation shaft ascending into darkness"
-            ]
-        }
+        log.debug("generate_poi_descriptions", extra={'session_id': self.session_id,
+                                                      'theme': zone_theme, 'count': count})
         
-        templates = poi_templates.get(zone_theme, [])
+        templates = poi_descriptions(zone_theme)
         if not templates:
             # Log error and use generic POI
-            print(f"ERROR: No POI templates for zone_theme: {zone_theme}")
-            templates = ["A suspicious area worth investigating", "Something hidden here", "An area of interest"]
+            log.error("No POI templates for zone theme", extra={'session_id': self.session_id,
+                                                                'theme': zone_theme})
+            templates = GENERIC_POI_DESCRIPTIONS
         # Randomly select unique descriptions
-        selected = random.sample(templates, min(count, len(templates)))
+        selected = self.rng.sample(templates, min(count, len(templates)))
         return selected
     
     def determine_poi_content(self):
         """Determine what a POI contains"""
-        roll = random.random()
+        roll = self.rng.random()
         char = self.selected_character
         passive = char.unique_passive if char else None
         
         # PHASE 2.5: Check for Momo's Lucky Bag first
         if (char.name == "Momo Yaoyorozu" and 
-            hasattr(char, 'can_find_lucky_bags') and 
-            char.can_find_lucky_bags):
-            if random.random() < 0.05:  # 5% chance when she has the skill
+            char.skill_flags & FLAG_LUCKY_BAGS):
+            if self.rng.random() < 0.05:  # 5% chance when she has the skill
                 return {'type': 'lucky_bag'}
         
         # PHASE 2.5: Apply passive multipliers
@@ -808,7 +995,7 @@ class FullWebGame:
         if roll < 0.35:  # 35% - Nothing
             return {'type': 'nothing'}
         elif roll < 0.60:  # 25% - Items
-            item_count = 1 if random.random() < 0.7 else 2
+            item_count = 1 if self.rng.random() < 0.7 else 2
             items = []
             
             # PHASE 2.5: Sato's recovery item boost
@@ -817,12 +1004,12 @@ class FullWebGame:
                 recovery_chance *= passive['value']
             
             for _ in range(item_count):
-                if random.random() < recovery_chance:
-                    items.append(random.choice(["Health Potion", "Energy Drink"]))
+                if self.rng.random() < recovery_chance:
+                    items.append(self.rng.choice(["Health Potion", "Energy Drink"]))
                 else:
-                    items.append(random.choice(["Health Potion", "Energy Drink"]))
+                    items.append(self.rng.choice(["Health Potion", "Energy Drink"]))
             
-            return {'type': 'items', 'items': items, 'exp': random.randint(10, 20)}
+            return {'type': 'items', 'items': items, 'exp': self.rng.randint(10, 20)}
         elif roll < 0.85:  # 25% - Enemy encounter
             return {'type': 'enemy'}
         elif roll < (0.85 + rescue_chance):  # Rescue (boosted by passive)
@@ -833,7 +1020,7 @@ class FullWebGame:
                 return {'type': 'rescue'}
             else:
                 # No one captured - could trigger Shinso event
-                if self.current_zone >= 3 and not any(c.name == "Hitoshi Shinso" and c.unlocked for c in self.characters):
+                if self.current_zone >= 3 and not self.characters_by_name["Hitoshi Shinso"].unlocked:
                     return {'type': 'shinso_unlock'}
                 else:
                     civilian_exp = 100 * self.current_zone
@@ -843,7 +1030,7 @@ class FullWebGame:
             return {'type': 'civilian', 'exp': civilian_exp}
         else:  # Passage
             # Boosted by Hagakure/Mineta passive
-            passage_roll = random.random()
+            passage_roll = self.rng.random()
             if passage_roll < passage_chance and self.current_zone < 20:
                 return {'type': 'passage'}
             elif self.current_zone < 20:
@@ -872,7 +1059,7 @@ class FullWebGame:
         self.add_msg("")
         
         self.pending_input = 'poi_investigate'
-        self.current_options = [{'key': str(i), 'text': f'Investigate {i}'} for i in range(len(self.current_poi_list) + 1)]
+        self.set_options([{'key': str(i), 'text': f'Investigate {i}'} for i in range(len(self.current_poi_list) + 1)])
     
     def show_poi_encounter(self, poi_type, custom_exp=None):
         """Display POI (Point of Interest) encounter"""
@@ -885,7 +1072,7 @@ class FullWebGame:
                 ('Emergency Stash', 'An emergency stash is hidden in the corner.'),
                 ('Training Supplies', 'U.A. training supplies are stored here.'),
             ]
-            treasure_name, treasure_desc = random.choice(treasure_types)
+            treasure_name, treasure_desc = self.rng.choice(treasure_types)
             
             self.add_msg("🎁 TREASURE DISCOVERED!", 'highlight')
             self.add_msg("")
@@ -897,19 +1084,19 @@ class FullWebGame:
             rewards = []
             
             # Always get some EXP
-            exp_reward = random.randint(15, 30)
+            exp_reward = self.rng.randint(15, 30)
             rewards.append(('exp', exp_reward))
             self.add_msg(f"  • {exp_reward} EXP")
             
             # 60% chance for an item
-            if random.random() < 0.6:
-                item = random.choice(["Health Potion", "Energy Drink"])
+            if self.rng.random() < 0.6:
+                item = self.rng.choice(["Health Potion", "Energy Drink"])
                 rewards.append(('item', item))
                 self.add_msg(f"  • {item}")
             
             # 30% chance for second item
-            if random.random() < 0.3:
-                item = random.choice(["Health Potion", "Energy Drink"])
+            if self.rng.random() < 0.3:
+                item = self.rng.choice(["Health Potion", "Energy Drink"])
                 rewards.append(('item', item))
                 self.add_msg(f"  • {item}")
             
@@ -917,10 +1104,10 @@ class FullWebGame:
             self.add_msg("1. Take the supplies")
             self.add_msg("2. Leave them (move on)")
             
-            self.current_options = [
+            self.set_options([
                 {'key': '1', 'text': 'Take supplies', 'rewards': rewards},
                 {'key': '2', 'text': 'Leave'}
-            ]
+            ])
         
         elif poi_type == 'civilian':
             civilian_types = [
@@ -930,7 +1117,7 @@ class FullWebGame:
                 ('H.U.C. Civilian Actor (Pinned)', 'An H.U.C. civilian actor is pinned under debris near a damaged support beam!'),
                 ('H.U.C. Civilian Actor (Concealed)', 'You find an H.U.C. civilian actor concealed behind overturned furniture!'),
             ]
-            civilian_name, civilian_desc = random.choice(civilian_types)
+            civilian_name, civilian_desc = self.rng.choice(civilian_types)
             
             self.add_msg("👥 H.U.C. CIVILIAN ACTOR FOUND!", 'highlight')
             self.add_msg("")
@@ -939,12 +1126,12 @@ class FullWebGame:
             
             # Generate rewards for rescue - use custom_exp if provided (scaled by zone)
             rewards = []
-            exp_reward = custom_exp if custom_exp else random.randint(20, 40)
+            exp_reward = custom_exp if custom_exp else self.rng.randint(20, 40)
             rewards.append(('exp', exp_reward))
             
             # Hero work sometimes gives items
-            if random.random() < 0.4:
-                item = random.choice(["Health Potion", "Energy Drink"])
+            if self.rng.random() < 0.4:
+                item = self.rng.choice(["Health Potion", "Energy Drink"])
                 rewards.append(('item', item))
             
             self.add_msg("🌟 HIGH-VALUE RESCUE OPPORTUNITY! 🌟", 'highlight')
@@ -954,10 +1141,10 @@ class FullWebGame:
             self.add_msg("1. Rescue them (no cost)")
             self.add_msg("2. Ignore (keep moving)")
             
-            self.current_options = [
+            self.set_options([
                 {'key': '1', 'text': 'Rescue', 'rewards': rewards},
                 {'key': '2', 'text': 'Ignore'}
-            ]
+            ])
     
     def show_navigation_options(self):
         """Display navigation menu"""
@@ -967,7 +1154,7 @@ class FullWebGame:
         self.add_msg("NAVIGATION OPTIONS:", 'highlight')
         
         room = self.zone_map['rooms'][self.current_room]
-        self.current_options = []
+        self.set_options([])
         
         for direction in ['north', 'south', 'east', 'west']:
             next_room = room.get(direction)
@@ -1028,12 +1215,12 @@ class FullWebGame:
         self.add_msg("4. Back")
         self.add_msg("")
         
-        self.current_options = [
+        self.set_options([
             {'key': '1', 'text': 'Global Skills'},
             {'key': '2', 'text': 'Personal Skills'},
             {'key': '3', 'text': 'View Bonuses'},
             {'key': '4', 'text': 'Back'}
-        ]
+        ])
     
     def show_global_skills(self):
         """Show global skill upgrade menu"""
@@ -1066,14 +1253,14 @@ class FullWebGame:
                     bonus_pct = int((mult - 1.0) * 100)
                     self.add_msg(f"   ★ {skill_display} (+{bonus_pct}% more per level!)")
         
-        self.current_options = [
+        self.set_options([
             {'key': '1', 'text': 'Strength'},
             {'key': '2', 'text': 'Defense'},
             {'key': '3', 'text': 'Vitality'},
             {'key': '4', 'text': 'Stamina'},
             {'key': '5', 'text': 'Evasion'},
             {'key': '0', 'text': 'Back'}
-        ]
+        ])
     
     def show_personal_skills(self):
         """Show personal quirk skill upgrade menu"""
@@ -1106,7 +1293,7 @@ class FullWebGame:
         self.add_msg("0. Back to Skill Tree")
         self.add_msg("")
         
-        self.current_options = [{'key': str(i+1), 'text': skill_id} for i, (skill_id, _) in enumerate(skills_list)]
+        self.set_options([{'key': str(i+1), 'text': skill_id} for i, (skill_id, _) in enumerate(skills_list)])
         self.current_options.append({'key': '0', 'text': 'Back'})
     
     def show_current_bonuses(self):
@@ -1149,12 +1336,12 @@ class FullWebGame:
         self.add_msg("")
         self.add_msg("Press Enter to continue...")
         
-        self.current_options = [{'key': 'continue', 'text': 'Continue'}]
+        self.set_options([{'key': 'continue', 'text': 'Continue'}])
     
     def apply_special_zone_bonuses(self, char, zone_theme):
         """Apply special bonuses for characters with environmental advantages"""
         # Reset any previous special bonuses
-        if hasattr(char, 'special_zone_bonus'):
+        if char.special_zone_bonus:
             char.attack -= char.special_zone_bonus.get('attack', 0)
             char.defense -= char.special_zone_bonus.get('defense', 0)
             char.evasion -= char.special_zone_bonus.get('evasion', 0)
@@ -1328,34 +1515,254 @@ class FullWebGame:
             boss = self.zone_bosses[self.current_zone]
             if not boss.defeated:
                 hp_pct = (boss.hp / boss.max_hp) * 100
-                self.add_msg(f"Boss Status: {boss.name} - HP: {boss.hp}/{boss.max_hp} ({hp_pct:.0f}%)")
+                self.add_template('boss.status', name=boss.name, hp=boss.hp, max_hp=boss.max_hp, pct=f"{hp_pct:.0f}")
                 self.add_msg("")
         
         self.add_msg("1. Enter Boss Room")
         self.add_msg("2. Retreat to previous area")
         self.add_msg("")
         
-        self.current_options = [
+        self.set_options([
             {'key': '1', 'text': 'Enter Boss Room'},
             {'key': '2', 'text': 'Retreat'}
-        ]
+        ])
     
     # combat will continue in next part
+
+def serialize_game(game):
+    """Encode a session for the persistent backend (compact binary snapshot)"""
+    return encode_state(game.to_state())
+
+def deserialize_game(data):
+    """Decode a session written by serialize_game()"""
+    return FullWebGame.from_state(decode_state(data))
+
+# Store game sessions - bounded by idle TTL and a memory budget so abandoned
+# tabs can't grow the process forever (see session_store.py).
+# TDS_SESSION_BACKEND=sqlite[:path] persists them so restarts and other
+# workers can pick sessions back up (see session_backend.py).
+# Character templates are shared by every session, so don't bill them to each one
+register_shared_type(CharacterTemplate)
+games = SessionStore(
+    idle_ttl=int(os.environ.get('TDS_SESSION_TTL', 1800)),
+    max_bytes=int(os.environ.get('TDS_SESSION_BUDGET_MB', 128)) * 1024 * 1024,
+    janitor_interval=int(os.environ.get('TDS_JANITOR_INTERVAL', 60)),
+    backend=make_backend(os.environ.get('TDS_SESSION_BACKEND', 'none')),
+    dumps=serialize_game,
+    loads=deserialize_game,
+)
+
+def start_journaled_session(session_id, seed):
+    """Recreate a session from its seed (journal replay)"""
+    game = FullWebGame(session_id, seed=seed)
+    game.messages_enabled = False
+    game.start_game()
+    game.messages_enabled = True
+    return game
+
+def replay_input(game, user_input):
+    """Re-apply a journaled input without building any messages
     
-@app.route('/api/start', methods=['POST'])
-def start_game():
-    """Start new game"""
+    Replays don't count as requests: no metrics, input stats or input log.
+    """
+    game.messages_enabled = False
+    try:
+        process_input(game, user_input, replay=True)
+    finally:
+        game.messages_enabled = True
+
+# TDS_JOURNAL_DIR turns on the input journal (see journal.py): every accepted
+# input is appended and fsynced, and sessions missing from memory after a
+# restart are rebuilt by replaying them. Use it instead of a snapshot backend.
+journal = None
+if os.environ.get('TDS_JOURNAL_DIR'):
+    journal = InputJournal(
+        os.environ['TDS_JOURNAL_DIR'],
+        start_session=start_journaled_session,
+        apply_input=replay_input,
+        dumps=serialize_game,
+        loads=deserialize_game,
+        shards=int(os.environ.get('TDS_JOURNAL_SHARDS', 8)),
+        compact_inputs=int(os.environ.get('TDS_JOURNAL_COMPACT_INPUTS', 200)),
+        compact_interval=int(os.environ.get('TDS_JOURNAL_COMPACT_INTERVAL', 300)),
+    )
+
+# Importing this module starts no threads - simulate.py, the benchmarks and
+# their process-pool workers only want the engine. Servers start them.
+def start_background():
+    """Start the session janitor and journal flusher/compactor (safe to call twice)"""
+    games.start_janitor()
+    if journal is not None:
+        journal.start_background()
+
+def create_app():
+    """The Flask app with its background threads running - for WSGI servers"""
+    start_background()
+    return app
+
+def load_session(session_id):
+    """Session from memory, the backend, or a journal replay - None if unknown"""
+    game = games.get(session_id)
+    if game is None and journal is not None and session_id and session_id in journal:
+        game = journal.recover(session_id)
+        games[session_id] = game
+        log.info("Session recovered from journal", extra={'session_id': session_id})
+    return game
+
+# Input routing: each pending_input state registers its handler with
+# @input_handler(state) - see input_dispatch.py
+input_dispatcher = InputDispatcher()
+input_handler = input_dispatcher.register
+
+# Metrics served at /metrics in the Prometheus text format (see metrics.py)
+metrics_registry = Registry()
+input_requests = metrics_registry.counter(
+    'tds_input_requests_total', 'Inputs handled, per pending_input state', ('state', 'handler'))
+input_errors = metrics_registry.counter(
+    'tds_input_errors_total', 'Exceptions caught while handling an input', ('state', 'handler'))
+input_latency = metrics_registry.histogram(
+    'tds_input_latency_seconds', 'Time spent in the input handler', ('state', 'handler'))
+games_started = metrics_registry.counter('tds_games_started_total', 'Games started via /api/start')
+metrics_registry.callback('tds_sessions_active', 'Sessions held in memory', lambda: len(games))
+metrics_registry.callback('tds_sessions_bytes', 'Estimated memory held by in-memory sessions',
+                          lambda: games.get_stats()['bytes'])
+metrics_registry.callback('tds_sessions_evicted_total', 'Sessions dropped from memory',
+                          lambda: {('idle',): games.stats['evicted_idle'],
+                                   ('budget',): games.stats['evicted_budget']},
+                          ('reason',), kind='counter')
+metrics_registry.callback('tds_session_janitor_errors_total', 'Session janitor sweeps that failed',
+                          lambda: games.stats['janitor_errors'], kind='counter')
+metrics_registry.callback('tds_process_resident_memory_bytes', 'Resident memory of this worker',
+                          process_rss_bytes)
+
+@input_dispatcher.add_hook
+def record_input_metrics(state, elapsed, error):
+    """Dispatcher hook - per-state request count, latency and errors"""
+    handler = input_dispatcher.handlers.get(state, input_dispatcher.fallback)[0].__name__
+    labels = (str(state), handler)
+    input_requests.labels(*labels).inc()
+    input_latency.labels(*labels).observe(elapsed)
+    if error is not None:
+        input_errors.labels(*labels).inc()
+    
+# Serving is split between the game work (CPU, microseconds) and persisting it
+# (backend writes, journal fsyncs), so the asyncio server in asgi_app.py can run
+# the first on its event loop and push the second to a thread
+def new_session():
+    """Create, store and start a freshly seeded session - returns (game, seed)"""
     session_id = secrets.token_hex(8)
-    game = FullWebGame(session_id)
+    seed = secrets.randbits(64)
+    game = FullWebGame(session_id, seed=seed)
     games[session_id] = game
+    games_started.inc()
     
     game.start_game()
+    return game, seed
+
+def persist_start(session_id, seed):
+    """Write a new session through to the backend and journal"""
+    games.save(session_id)
+    if journal is not None:
+        journal.start(session_id, seed)
+
+def persist_input(session_id, user_input):
+    """Write an applied input through to the backend and journal"""
+    games.save(session_id)
+    if journal is not None and session_id in journal:
+        journal.append(session_id, user_input)
+
+def persist_inputs(session_id, user_inputs):
+    """persist_input() for a batch - one backend write and one journal fsync"""
+    games.save(session_id)
+    if journal is not None and session_id in journal and user_inputs:
+        for user_input in user_inputs[:-1]:
+            journal.append(session_id, user_input, wait=False)
+        journal.append(session_id, user_inputs[-1])
+
+# Another worker can save the same session between our load and save (see
+# SessionBackend.save) - the input is then redone on its state this many times
+SAVE_ATTEMPTS = 3
+CONFLICT_ERROR = 'Session was updated elsewhere - please retry'
+
+def run_persisted(session_id, apply, persist):
+    """load_session(), apply(game) and persist(), redone from the stored state on a VersionConflict
+    
+    Returns (game, apply's result), or (None, None) for an unknown session.
+    Raises VersionConflict when every attempt lost the race.
+    """
+    for attempt in range(SAVE_ATTEMPTS):
+        game = load_session(session_id)
+        if game is None:
+            return None, None
+        result = apply(game)
+        try:
+            persist()
+        except VersionConflict:
+            log.warning("Session saved by another worker, retrying input",
+                        extra={'session_id': session_id, 'attempt': attempt + 1})
+            continue
+        return game, result
+    raise VersionConflict(session_id)
+
+def persistence_blocks():
+    """True when persist_*() / load_session() may touch disk or the network"""
+    return games.backend is not None or journal is not None
+
+# Requests for one session are handled one at a time (see session_locks.py)
+session_locks = SessionLocks()
+
+# Open event streams / WebSockets per session (see channels.py)
+channels = ChannelHub()
+metrics_registry.callback('tds_channels_open', 'Open event streams and WebSockets', lambda: len(channels))
+
+def request_object():
+    """The JSON body as a dict - {} without one, None when it isn't a JSON object"""
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
+
+def request_session_id(data):
+    """session_id from a request body - raises ValueError unless it's a string"""
+    session_id = data.get('session_id', '')
+    if not isinstance(session_id, str):
+        raise ValueError('session_id must be a string')
+    return session_id
+
+def request_input(data):
+    """(session_id, input) from an input request body - raises ValueError
+    
+    A missing input counts as empty; any other input that isn't a string is
+    rejected, so every transport treats the same body the same way.
+    """
+    user_input = data.get('input', '')
+    if not isinstance(user_input, str):
+        raise ValueError('input must be a string')
+    return request_session_id(data), user_input.strip()
+
+@app.route('/api/start', methods=['POST'])
+def start_game():
+    """Start new game"""
+    data = request_object()
+    if data is None:
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    game, seed = new_session()
+    persist_start(game.session_id, seed)
     
     return jsonify({
-        'session_id': session_id,
-        'state': game.get_state_dict()
+        'session_id': game.session_id,
+        'state': game.get_state_dict(catalog=data.get('catalog'))
     })
 
+@app.route('/api/catalog')
+def message_catalog():
+    """Fixed message text for clients to cache (see message_catalog.py)"""
+    etag = f'"{CATALOG_VERSION}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+    return Response(CATALOG_JSON, mimetype='application/json',
+                    headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
 
 def show_debug_menu(game):
     """Show hidden debug menu"""
@@ -1377,7 +1784,7 @@ def show_debug_menu(game):
     
     game.game_state = 'debug'
     game.pending_input = 'debug_menu'
-    game.current_options = [
+    game.set_options([
         {'key': '1', 'text': 'Title Screen'},
         {'key': '2', 'text': 'Go to Floor'},
         {'key': '3', 'text': 'Unlock Skills'},
@@ -1388,8 +1795,9 @@ def show_debug_menu(game):
         {'key': '8', 'text': 'New Zone'},
         {'key': '9', 'text': 'Level 10 All'},
         {'key': '0', 'text': 'Exit'}
-    ]
+    ])
 
+@input_handler('debug_menu')
 def handle_debug_menu(game, choice):
     """Handle debug menu selection"""
     if choice == '0':
@@ -1404,7 +1812,7 @@ def handle_debug_menu(game, choice):
         # Go to specific floor
         game.add_msg("Enter floor number (1-100):", 'highlight')
         game.pending_input = 'debug_floor'
-        game.current_options = []
+        game.set_options([])
     
     elif choice == '3':
         # Unlock all skills
@@ -1425,9 +1833,10 @@ def handle_debug_menu(game, choice):
     
     elif choice == '5':
         # Unlock Shinso
-        shinso = next((c for c in game.characters if c.name == "Hitoshi Shinso"), None)
+        shinso = game.characters_by_name.get("Hitoshi Shinso")
         if shinso:
             shinso.unlocked = True
+            game.refresh_team_up_ready(shinso)
             game.add_msg("✅ Hitoshi Shinso unlocked!", 'success')
         game.add_msg("")
         show_debug_menu(game)
@@ -1452,7 +1861,7 @@ def handle_debug_menu(game, choice):
         game.add_msg("7. Underground")
         game.add_msg("")
         game.pending_input = 'debug_zone_type'
-        game.current_options = []
+        game.set_options([])
     
     elif choice == '9':
         # TEAM-UP TESTING: Level all characters to 10
@@ -1468,12 +1877,14 @@ def handle_debug_menu(game, choice):
                 char.attack = char.base_attack
                 char.defense = char.base_defense
                 char.skill_points += 1
+            game.refresh_team_up_ready(char)
         
         game.add_msg("✅ All characters leveled to 10!", 'success')
         game.add_msg("🤝 Team-Up Attacks now available for testing!", 'highlight')
         game.add_msg("")
         show_debug_menu(game)
 
+@input_handler('debug_zone_type')
 def handle_debug_zone_type(game, choice):
     """Handle zone type selection in debug"""
     zone_map = {
@@ -1495,159 +1906,284 @@ def handle_debug_zone_type(game, choice):
         game.add_msg("Invalid choice!", 'warning')
         show_debug_menu(game)
 
-@app.route('/api/input', methods=['POST'])
-def handle_input():
-    """Handle any user input"""
-    data = request.json
-    session_id = data.get('session_id')
-    user_input = data.get('input', '').strip()
-    user_input_lower = user_input.lower()
-    
-    if session_id not in games:
-        return jsonify({'error': 'Invalid session'}), 400
+def process_input(game, user_input, replay=False):
+    """Apply one player input to a session - shared by every transport
     
-    game = games[session_id]
+    replay=True re-applies an input that was already handled once (journal
+    recovery and compaction), so it isn't observed or logged again.
+    """
     game.clear_msgs()
+    game.mark_dirty('meta', 'character', 'enemy')
     
     # Check for debug command
-    if user_input_lower == 'froppenheimer':
+    if user_input.lower() == 'froppenheimer':
         show_debug_menu(game)
-        return jsonify({'state': game.get_state_dict()})
+        return
     
+    pending_input = game.pending_input
+    start = time.perf_counter()
     try:
-        # Route input based on game state
-        if game.pending_input == 'continue':
-            game.begin_zone()
-        
-        elif game.pending_input == 'debug_menu':
-            handle_debug_menu(game, user_input)
-        
-        elif game.pending_input == 'debug_zone_type':
-            handle_debug_zone_type(game, user_input)
-        
-        elif game.pending_input == 'character_number':
-            game.select_character(user_input_lower)
-        
-        elif game.pending_input == 'direction':
-            handle_navigation(game, user_input_lower)
-        
-        elif game.pending_input == 'combat_action':
-            handle_combat_action(game, user_input_lower)
-        
-        elif game.pending_input == 'quirk_choice':
-            handle_quirk_choice(game, user_input_lower)
-        
-        elif game.pending_input == 'item_choice':
-            handle_item_choice(game, user_input_lower)
-        
-        elif game.pending_input == 'team_up_choice':
-            handle_team_up_choice(game, user_input_lower)
-        
-        elif game.pending_input == 'debug_floor':
-            try:
-                floor_num = int(user_input)
-                if 1 <= floor_num <= 100:
-                    # Calculate zone and floor
-                    zone = ((floor_num - 1) // 5) + 1
-                    floor_in_zone = ((floor_num - 1) % 5) + 1
-                    
-                    game.current_zone = zone
-                    game.current_floor = floor_in_zone
-                    
-                    # Set the zone theme
-                    theme_id = game.zone_themes[zone - 1]
-                    game.current_theme = theme_id
-                    
-                    game.add_msg(f"✅ Jumped to Zone {zone}, Floor {floor_in_zone} (Overall Floor {floor_num})", 'success')
-                    game.add_msg(f"Zone type: {theme_id.title()}", 'normal')
-                    game.add_msg("")
-                    show_debug_menu(game)
-                else:
-                    game.add_msg("Floor must be 1-100!", 'warning')
-                    show_debug_menu(game)
-            except ValueError:
-                game.add_msg("Invalid floor number!", 'warning')
-                show_debug_menu(game)
-        
-        elif game.pending_input == 'passage_choice':
-            if user_input == '1':
-                game.add_msg("You enter the secret passage...", 'success')
-                game.add_msg("")
-                game.current_zone += 1
-                game.selected_character.heal(50)
-                game.selected_character.restore_energy(30)
-                game.add_msg("The passage leads you safely to the next zone!", 'success')
-                game.add_msg("HP and Energy restored from the safe travel!", 'success')
-                game.add_msg("")
-                if game.current_zone <= 20:
-                    game.begin_zone()
-                else:
-                    game.start_final_boss()
-            else:
-                game.add_msg("You decide to continue through this zone normally.", 'normal')
-                game.add_msg("")
-                game.show_navigation_options()
-        
-        elif game.pending_input == 'poi_investigate':
-            handle_poi_investigation(game, user_input)
-        
-        elif game.pending_input == 'poi_choice':
-            handle_poi_choice(game, user_input)
-        
-        elif game.pending_input == 'skill_tree_choice':
-            if user_input == '1':
-                game.show_global_skills()
-            elif user_input == '2':
-                game.show_personal_skills()
-            elif user_input == '3':
-                game.show_current_bonuses()
-            elif user_input == '4':
-                # Return to previous state (combat or navigation)
-                if hasattr(game, 'pre_skill_state') and game.pre_skill_state == 'combat':
-                    game.show_combat_options()
-                elif game.in_combat:
-                    game.show_combat_options()
-                else:
-                    # Return to navigation - show current room info
-                    room_desc = game.get_room_description(game.current_theme, game.current_room)
-                    game.add_msg(room_desc, 'normal')
-                    game.add_msg("")
-                    game.show_navigation_options()
-                # Clear the stored state
-                if hasattr(game, 'pre_skill_state'):
-                    delattr(game, 'pre_skill_state')
-        
-        elif game.pending_input == 'global_skill_choice':
-            handle_global_skill_choice(game, user_input)
-        
-        elif game.pending_input == 'personal_skill_choice':
-            handle_personal_skill_choice(game, user_input)
-        
-        elif game.pending_input == 'continue':
-            # From view bonuses screen
-            if game.game_state == 'view_bonuses':
-                game.show_skill_tree_main()
-            else:
-                # Default continue behavior
-                if game.game_state == 'ready':
-                    game.begin_zone()
-        
-        elif game.pending_input == 'boss_decision':
-            if user_input == '1':
-                enter_boss_room(game)
-            elif user_input == '2':
-                retreat_from_boss(game)
-        
-        else:
-            game.add_msg("Waiting for input...", 'normal')
-        
+        input_dispatcher.dispatch(game, user_input, observe=not replay)
     except Exception as e:
         game.add_msg(f"Error: {str(e)}", 'warning')
-        import traceback
-        traceback.print_exc()
+        if replay:
+            log.debug("Replayed input failed again", extra={'session_id': game.session_id,
+                                                           'pending_input': pending_input})
+            return
+        log.exception("Input handler failed", extra={'session_id': game.session_id,
+                                                      'pending_input': pending_input,
+                                                      'duration_ms': elapsed_ms(start)})
+        return
+    
+    # One record per input - noisy, so sampled via TDS_LOG_SAMPLE
+    if not replay and log.isEnabledFor(logging.INFO):
+        log.info("input", extra={'session_id': game.session_id, 'pending_input': pending_input,
+                                 'next_input': game.pending_input, 'duration_ms': elapsed_ms(start),
+                                 'sample_key': 'input'})
+
+@app.route('/api/input', methods=['POST'])
+def handle_input():
+    """Handle any user input"""
+    data = request_object()
+    if data is None:
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        session_id, user_input = request_input(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with session_locks.hold(session_id):
+        try:
+            game, _ = run_persisted(session_id, lambda game: process_input(game, user_input),
+                                    lambda: persist_input(session_id, user_input))
+        except VersionConflict:
+            return jsonify({'error': CONFLICT_ERROR}), 409
+        if game is None:
+            return jsonify({'error': 'Invalid session'}), 400
+        
+        return jsonify({'state': game.get_state_dict(data.get('ack'), data.get('epoch'), data.get('catalog'))})
+
+# Longest batch /api/input/batch accepts - a whole zone is a few hundred inputs
+MAX_BATCH_INPUTS = 500
+
+def batch_inputs(value):
+    """Validated input list from a batch request - raises ValueError"""
+    if not isinstance(value, list) or not value:
+        raise ValueError('inputs must be a non-empty list')
+    if len(value) > MAX_BATCH_INPUTS:
+        raise ValueError(f'At most {MAX_BATCH_INPUTS} inputs per batch')
+    if not all(isinstance(user_input, str) for user_input in value):
+        raise ValueError('inputs must be strings')
+    return [user_input.strip() for user_input in value]
+
+def process_inputs(game, user_inputs, keep_messages=False):
+    """Apply inputs in order through process_input()
     
-    return jsonify({'state': game.get_state_dict()})
+    Only the last input builds its messages unless keep_messages is set, in
+    which case every input's messages are returned as a list of lists.
+    """
+    steps = [] if keep_messages else None
+    try:
+        for user_input in user_inputs[:-1]:
+            game.messages_enabled = keep_messages
+            process_input(game, user_input)
+            if keep_messages:
+                steps.append(game.messages.to_list())
+    finally:
+        game.messages_enabled = True
+    process_input(game, user_inputs[-1])
+    if keep_messages:
+        steps.append(game.messages.to_list())
+    return steps
+
+@app.route('/api/input/batch', methods=['POST'])
+def handle_input_batch():
+    """Apply an ordered list of inputs in one request and return the final state"""
+    data = request_object()
+    if data is None:
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        session_id = request_session_id(data)
+        user_inputs = batch_inputs(data.get('inputs'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with session_locks.hold(session_id):
+        try:
+            game, steps = run_persisted(session_id,
+                                        lambda game: process_inputs(game, user_inputs, bool(data.get('messages'))),
+                                        lambda: persist_inputs(session_id, user_inputs))
+        except VersionConflict:
+            return jsonify({'error': CONFLICT_ERROR}), 409
+        if game is None:
+            return jsonify({'error': 'Invalid session'}), 400
+        
+        reply = {'state': game.get_state_dict(data.get('ack'), data.get('epoch'), data.get('catalog')), 'applied': len(user_inputs)}
+        if steps is not None:
+            reply['steps'] = steps
+        return jsonify(reply)
+
+@app.route('/api/send', methods=['POST'])
+def send_input():
+    """Input from a client with an open event stream - the state goes out on the stream"""
+    data = request_object()
+    if data is None:
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        session_id, user_input = request_input(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with session_locks.hold(session_id):
+        try:
+            game, _ = run_persisted(session_id, lambda game: process_input(game, user_input),
+                                    lambda: persist_input(session_id, user_input))
+        except VersionConflict:
+            return jsonify({'error': CONFLICT_ERROR}), 409
+        if game is None:
+            return jsonify({'error': 'Invalid session'}), 400
+        
+        if channels.publish_state(game):
+            return '', 204
+        # The stream dropped in between - answer like /api/input
+        return jsonify({'state': game.get_state_dict(data.get('ack'), data.get('epoch'), data.get('catalog'))})
+
+@app.route('/api/events')
+def event_stream():
+    """Server-Sent Events channel for one session (state updates and pushes)"""
+    session_id = request.args.get('session_id')
+    frames = queue.Queue()
+    channel = Channel(session_id, frames.put, parse_ack(request.args.get('ack')), request.args.get('epoch'),
+                      request.args.get('catalog'))
+    # Under the lock: a journal recovery must not race an input to this session
+    with session_locks.hold(session_id):
+        if load_session(session_id) is None:
+            return jsonify({'error': 'Invalid session'}), 400
+        channels.subscribe(channel)
+    
+    def stream():
+        try:
+            yield SSE_KEEPALIVE
+            while True:
+                try:
+                    frame = frames.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield sse_event(frame)
+        finally:
+            channels.unsubscribe(channel)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/input_stats')
+def input_stats():
+    """Per-state input handler timings and error counts"""
+    return jsonify(input_dispatcher.get_stats())
+
+@input_handler('continue')
+def handle_continue(game, choice):
+    """Enter pressed on the zone intro or the bonuses screen"""
+    # From view bonuses screen
+    if game.game_state == 'view_bonuses':
+        game.show_skill_tree_main()
+    else:
+        game.begin_zone()
+
+@input_handler('character_number', lowercase=True)
+def handle_character_number(game, choice):
+    """Pick the student for this zone"""
+    game.select_character(choice)
+
+@input_handler('debug_floor')
+def handle_debug_floor(game, choice):
+    """Handle floor jump in debug"""
+    try:
+        floor_num = int(choice)
+        if 1 <= floor_num <= 100:
+            # Calculate zone and floor
+            zone = ((floor_num - 1) // 5) + 1
+            floor_in_zone = ((floor_num - 1) % 5) + 1
+            
+            game.current_zone = zone
+            game.current_floor = floor_in_zone
+            
+            # Set the zone theme
+            theme_id = game.zone_themes[zone - 1]
+            game.current_theme = theme_id
+            
+            game.add_msg(f"✅ Jumped to Zone {zone}, Floor {floor_in_zone} (Overall Floor {floor_num})", 'success')
+            game.add_msg(f"Zone type: {theme_id.title()}", 'normal')
+            game.add_msg("")
+            show_debug_menu(game)
+        else:
+            game.add_msg("Floor must be 1-100!", 'warning')
+            show_debug_menu(game)
+    except ValueError:
+        game.add_msg("Invalid floor number!", 'warning')
+        show_debug_menu(game)
 
+@input_handler('passage_choice')
+def handle_passage_choice(game, choice):
+    """Handle taking (or skipping) a secret passage"""
+    if choice == '1':
+        game.add_msg("You enter the secret passage...", 'success')
+        game.add_msg("")
+        game.current_zone += 1
+        game.selected_character.heal(50)
+        game.selected_character.restore_energy(30)
+        game.add_msg("The passage leads you safely to the next zone!", 'success')
+        game.add_msg("HP and Energy restored from the safe travel!", 'success')
+        game.add_msg("")
+        if game.current_zone <= 20:
+            game.begin_zone()
+        else:
+            start_final_boss(game)
+    else:
+        game.add_msg("You decide to continue through this zone normally.", 'normal')
+        game.add_msg("")
+        game.show_navigation_options()
+
+@input_handler('skill_tree_choice')
+def handle_skill_tree_choice(game, choice):
+    """Handle the skill tree main menu"""
+    if choice == '1':
+        game.show_global_skills()
+    elif choice == '2':
+        game.show_personal_skills()
+    elif choice == '3':
+        game.show_current_bonuses()
+    elif choice == '4':
+        # Return to previous state (combat or navigation)
+        if hasattr(game, 'pre_skill_state') and game.pre_skill_state == 'combat':
+            game.show_combat_options()
+        elif game.in_combat:
+            game.show_combat_options()
+        else:
+            # Return to navigation - show current room info
+            room_desc = game.get_room_description(game.current_theme, game.current_room)
+            game.add_msg(room_desc, 'normal')
+            game.add_msg("")
+            game.show_navigation_options()
+        # Clear the stored state
+        if hasattr(game, 'pre_skill_state'):
+            delattr(game, 'pre_skill_state')
+
+@input_handler('boss_decision')
+def handle_boss_decision(game, choice):
+    """Handle fighting or retreating at the boss door"""
+    if choice == '1':
+        enter_boss_room(game)
+    elif choice == '2':
+        retreat_from_boss(game)
+
+@input_dispatcher.register_fallback
+def handle_unexpected_input(game, choice):
+    """Any state without a handler"""
+    game.add_msg("Waiting for input...", 'normal')
+
+@input_handler('global_skill_choice')
 def handle_global_skill_choice(game, choice):
     """Handle global skill upgrade"""
     char = game.selected_character
@@ -1687,6 +2223,7 @@ def handle_global_skill_choice(game, choice):
         game.add_msg("Invalid choice!", 'warning')
         game.show_global_skills()
 
+@input_handler('personal_skill_choice')
 def handle_personal_skill_choice(game, choice):
     """Handle personal skill upgrade"""
     char = game.selected_character
@@ -1705,7 +2242,7 @@ def handle_personal_skill_choice(game, choice):
             current_level = char.personal_skills.get(skill_id, 0)
             
             if current_level < skill_data['max']:
-                char.personal_skills[skill_id] = current_level + 1
+                char.upgrade_personal_skill(skill_id)
                 char.skill_points -= 1
                 
                 # Apply bonuses
@@ -1734,29 +2271,27 @@ def handle_personal_skill_choice(game, choice):
                         char.secret_detection += value
                     elif bonus_type == 'rescue_boost':
                         # Stored for POI determination
-                        if not hasattr(char, 'rescue_boost'):
-                            char.rescue_boost = 0
                         char.rescue_boost += value
                     elif bonus_type == 'post_combat_heal':
                         # Stored for combat victory
-                        if not hasattr(char, 'post_combat_heal'):
-                            char.post_combat_heal = 0
                         char.post_combat_heal += value
                     elif bonus_type == 'lucky_bag':
                         # Flag for POI special content
-                        char.can_find_lucky_bags = True
+                        char.skill_flags |= FLAG_LUCKY_BAGS
                     # NEW PARTY BUFF SKILLS
                     elif bonus_type == 'acid_veil':
-                        char.has_acid_veil = True
+                        char.skill_flags |= FLAG_ACID_VEIL
+                        game.party.refresh(game.characters)
                         game.add_msg("💧 ACID VEIL ACTIVATED! All characters gain damage reduction!", 'success')
                     elif bonus_type == 'ribbit_recovery':
-                        char.has_ribbit_recovery = True
+                        char.skill_flags |= FLAG_RIBBIT_RECOVERY
+                        game.party.refresh(game.characters)
                         game.add_msg("🐸 RIBBIT RECOVERY ACTIVATED! All characters gain survival protection!", 'success')
                     elif bonus_type == 'cant_stop_sparkle':
-                        char.has_cant_stop_sparkle = True
+                        char.skill_flags |= FLAG_CANT_STOP_SPARKLE
                         game.add_msg("✨ CAN'T STOP OUR SPARKLE! All characters gain +5% evasion!", 'success')
                     elif bonus_type == 'defensive_instinct':
-                        char.has_defensive_instinct = True
+                        char.skill_flags |= FLAG_DEFENSIVE_INSTINCT
                         game.add_msg("💚 DEFENSIVE INSTINCT ACTIVATED! 2x defense when HP ≤ 25%!", 'success')
                 
                 # Check if Plus Ultra unlocked
@@ -1793,6 +2328,7 @@ def handle_personal_skill_choice(game, choice):
         game.add_msg("Invalid choice!", 'warning')
         game.show_personal_skills()
 
+@input_handler('poi_investigate')
 def handle_poi_investigation(game, choice):
     """Handle investigating a specific POI"""
     try:
@@ -1808,7 +2344,7 @@ def handle_poi_investigation(game, choice):
         if 1 <= choice_num <= len(game.current_poi_list):
             poi = game.current_poi_list[choice_num - 1]
             
-            game.add_msg(f"You investigate point of interest #{choice_num}...")
+            game.add_template('poi.investigate', n=choice_num)
             game.add_msg("")
             
             if poi['type'] == 'nothing':
@@ -1818,7 +2354,7 @@ def handle_poi_investigation(game, choice):
                     "Nothing here but dust and shadows.",
                     "A thorough search reveals nothing useful."
                 ]
-                game.add_msg(random.choice(messages), 'normal')
+                game.add_msg(game.rng.choice(messages), 'normal')
                 game.add_msg("")
                 # Remove this POI and show remaining
                 game.current_poi_list.pop(choice_num - 1)
@@ -1839,7 +2375,7 @@ def handle_poi_investigation(game, choice):
                 # PHASE 2: Show level up if it occurs
                 char = game.selected_character
                 old_level = char.level
-                leveled_up = char.gain_exp(poi['exp'])
+                leveled_up = game.award_exp(char, poi['exp'])
                 game.add_msg(f"  • {poi['exp']} EXP", 'success')
                 
                 if leveled_up:
@@ -1873,8 +2409,10 @@ def handle_poi_investigation(game, choice):
                 # Rescue a captured student!
                 captured = [c for c in game.characters if c.captured and c.unlocked]
                 if captured:
-                    rescued = random.choice(captured)
+                    rescued = game.rng.choice(captured)
                     rescued.captured = False
+                    game.refresh_team_up_ready(rescued)
+                    game.party.refresh(game.characters)
                     rescued.hp = rescued.max_hp // 2  # Return at half health
                     rescued.energy = rescued.max_energy // 2
                     
@@ -1891,9 +2429,10 @@ def handle_poi_investigation(game, choice):
             
             elif poi['type'] == 'shinso_unlock':
                 # Unlock Shinso!
-                shinso = next((c for c in game.characters if c.name == "Hitoshi Shinso"), None)
+                shinso = game.characters_by_name.get("Hitoshi Shinso")
                 if shinso and not shinso.unlocked:
                     shinso.unlocked = True
+                    game.refresh_team_up_ready(shinso)
                     
                     game.add_msg("❗ SPECIAL EVENT!", 'highlight')
                     game.add_msg("")
@@ -1915,7 +2454,7 @@ def handle_poi_investigation(game, choice):
             elif poi['type'] == 'enemy':
                 # Generate logical description based on zone and POI description
                 poi_desc = poi.get('description', '').lower()
-                enemy = create_enemy(game.current_zone, game.current_floor)
+                enemy = create_enemy(game.current_zone, game.current_floor, rng=game.rng)
                 
                 # Determine hiding action based on POI size/type
                 if any(word in poi_desc for word in ['cave', 'hollow', 'crevice', 'gap', 'alcove', 'burrow', 'shelter', 'nook', 'recess']):
@@ -1955,7 +2494,7 @@ def handle_poi_investigation(game, choice):
                 # Massive rewards!
                 items = []
                 for _ in range(3):  # 3 guaranteed items
-                    items.append(random.choice(["Health Potion", "Energy Drink"]))
+                    items.append(game.rng.choice(["Health Potion", "Energy Drink"]))
                 
                 exp = 200 * game.current_zone  # Huge EXP!
                 
@@ -1968,7 +2507,7 @@ def handle_poi_investigation(game, choice):
                 
                 # Apply EXP with level up check
                 old_level = char.level
-                leveled_up = char.gain_exp(exp)
+                leveled_up = game.award_exp(char, exp)
                 
                 if leveled_up:
                     game.add_msg("")
@@ -1996,10 +2535,10 @@ def handle_poi_investigation(game, choice):
                 game.add_msg("1. Take the passage (skip to next zone)")
                 game.add_msg("2. Ignore it (continue normally)")
                 game.pending_input = 'passage_choice'
-                game.current_options = [
+                game.set_options([
                     {'key': '1', 'text': 'Take passage'},
                     {'key': '2', 'text': 'Ignore'}
-                ]
+                ])
                 game.current_poi_list = []
         else:
             game.add_msg("Invalid choice!", 'warning')
@@ -2009,6 +2548,7 @@ def handle_poi_investigation(game, choice):
         game.add_msg("Invalid input!", 'warning')
         game.show_remaining_poi()
 
+@input_handler('poi_choice')
 def handle_poi_choice(game, choice):
     """Handle POI (Point of Interest) choices"""
     char = game.selected_character
@@ -2022,7 +2562,7 @@ def handle_poi_choice(game, choice):
         for reward_type, reward_value in option.get('rewards', []):
             if reward_type == 'exp':
                 old_level = char.level
-                leveled_up = char.gain_exp(reward_value)
+                leveled_up = game.award_exp(char, reward_value)
                 game.add_msg(f"✨ Gained {reward_value} EXP!", 'success')
                 
                 # PHASE 2: Show level up notification
@@ -2058,6 +2598,7 @@ def handle_poi_choice(game, choice):
         game.add_msg("")
         game.show_navigation_options()
 
+@input_handler('direction', lowercase=True)
 def handle_navigation(game, direction):
     """Handle room navigation"""
     direction_map = {'n': 'north', 's': 'south', 'e': 'east', 'w': 'west'}
@@ -2075,7 +2616,7 @@ def handle_navigation(game, direction):
             game.searched_rooms.add(game.current_room)
             
             # Determine number of POI (0-3, with 3 being rare)
-            roll = random.random()
+            roll = game.rng.random()
             if roll < 0.3:  # 30% chance for 0 POI
                 num_poi = 0
             elif roll < 0.75:  # 45% chance for 1 POI
@@ -2147,6 +2688,7 @@ def handle_navigation(game, direction):
         game.add_msg("Can't go that way!", 'warning')
         game.show_navigation_options()
 
+@input_handler('item_choice', lowercase=True)
 def handle_item_choice(game, choice):
     """Handle item selection and usage"""
     char = game.selected_character
@@ -2194,6 +2736,7 @@ def handle_item_choice(game, choice):
         game.add_msg("Invalid input!", 'warning')
         game.show_combat_options()
 
+@input_handler('quirk_choice', lowercase=True)
 def handle_quirk_choice(game, choice):
     """Handle quirk ability selection"""
     char = game.selected_character
@@ -2242,7 +2785,7 @@ def handle_quirk_choice(game, choice):
                 
                 # PHASE 2.5: Kaminari's Stun Chance
                 if passive and passive['type'] == 'stun_chance':
-                    if random.random() * 100 < passive['value']:
+                    if game.rng.random() * 100 < passive['value']:
                         game.combat_state['enemy_stunned'] = 1
                         game.add_msg(f"⚡ ELECTRIC SHOCK! {enemy.name} is stunned!", 'highlight')
                 
@@ -2264,6 +2807,7 @@ def handle_quirk_choice(game, choice):
         game.add_msg("Invalid input!", 'warning')
         game.show_combat_options()
 
+@input_handler('combat_action', lowercase=True)
 def handle_combat_action(game, action):
     """Handle combat actions"""
     char = game.selected_character
@@ -2271,7 +2815,7 @@ def handle_combat_action(game, action):
     
     if action == '1':
         # Basic attack
-        base_damage = char.attack + random.randint(-3, 5)
+        base_damage = char.attack + game.rng.randint(-3, 5)
         
         # PHASE 2.5: Apply combat passives
         passive = char.unique_passive
@@ -2294,7 +2838,7 @@ def handle_combat_action(game, action):
         
         # PHASE 2.5: Kaminari's Stun Chance
         if passive and passive['type'] == 'stun_chance':
-            if random.random() * 100 < passive['value']:
+            if game.rng.random() * 100 < passive['value']:
                 game.combat_state['enemy_stunned'] = 1
                 game.add_msg(f"⚡ ELECTRIC SHOCK! {enemy.name} is stunned!", 'highlight')
         
@@ -2321,7 +2865,7 @@ def handle_combat_action(game, action):
             game.add_msg(f"{i}. {name} ({cost} energy) - {desc}")
         game.add_msg("0. Back to combat menu")
         
-        game.current_options = [{'key': str(i+1), 'text': name} for i, (name, _) in enumerate(abilities)]
+        game.set_options([{'key': str(i+1), 'text': name} for i, (name, _) in enumerate(abilities)])
         game.current_options.append({'key': '0', 'text': 'Back'})
         
     elif action == '3':
@@ -2350,7 +2894,7 @@ def handle_combat_action(game, action):
             
             # Store item map for selection
             game.current_item_map = item_map
-            game.current_options = [{'key': str(i), 'text': item} for i, item in item_map.items()]
+            game.set_options([{'key': str(i), 'text': item} for i, item in item_map.items()])
             game.current_options.append({'key': '0', 'text': 'Back'})
         else:
             game.add_msg("No items in inventory!", 'warning')
@@ -2363,7 +2907,7 @@ def handle_combat_action(game, action):
     
     elif action == '5':
         # PHASE 2.5: Plus Ultra OR Team-Up (depends on availability)
-        team_ups = char.get_available_team_ups(game.characters)
+        team_ups = game.get_available_team_ups(char)
         
         if char.plus_ultra_available and not char.plus_ultra_used_this_zone:
             # Action 5 is Plus Ultra
@@ -2391,7 +2935,7 @@ def handle_combat_action(game, action):
     
     elif action == '6':
         # Team-Up Attack (when Plus Ultra also available)
-        team_ups = char.get_available_team_ups(game.characters)
+        team_ups = game.get_available_team_ups(char)
         if team_ups:
             show_team_up_menu(game, team_ups)
         else:
@@ -2420,9 +2964,10 @@ def show_team_up_menu(game, team_ups):
     
     # Store team-ups for selection
     game.current_team_ups = team_ups
-    game.current_options = [{'key': str(i+1), 'text': team_ups[i][1]['name']} for i in range(len(team_ups))]
+    game.set_options([{'key': str(i+1), 'text': team_ups[i][1]['name']} for i in range(len(team_ups))])
     game.current_options.append({'key': '0', 'text': 'Back'})
 
+@input_handler('team_up_choice', lowercase=True)
 def handle_team_up_choice(game, choice):
     """Handle team-up attack selection"""
     char = game.selected_character
@@ -2501,17 +3046,10 @@ def enemy_turn(game):
         game.show_combat_options()
         return
     
-    base_damage = enemy.attack + random.randint(-2, 4)
-    
-    # PARTY BUFF: Check for Acid Veil damage reduction (applies to ALL characters)
-    acid_veil_reduction = 0
-    acid_veil_char = None
-    for c in game.characters:
-        if hasattr(c, 'has_acid_veil') and c.has_acid_veil and not c.captured:
-            acid_veil_reduction = 10
-            acid_veil_char = c
-            break
+    base_damage = enemy.attack + game.rng.randint(-2, 4)
     
+    # PARTY BUFF: Acid Veil damage reduction (applies to ALL characters)
+    acid_veil_reduction = game.party.damage_reduction
     if acid_veil_reduction > 0:
         base_damage = int(base_damage * (1.0 - acid_veil_reduction / 100))
     
@@ -2523,7 +3061,7 @@ def enemy_turn(game):
     
     # NEW: Midoriya's Defensive Instinct - 2x defense at ≤25% HP
     char_defense = char.defense
-    if hasattr(char, 'has_defensive_instinct') and char.has_defensive_instinct:
+    if char.skill_flags & FLAG_DEFENSIVE_INSTINCT:
         hp_percent = (char.hp / char.max_hp) * 100
         if hp_percent <= 25:
             char_defense = char.defense * 2
@@ -2536,9 +3074,9 @@ def enemy_turn(game):
     game.add_msg(f"🔴 {enemy.name} attacks for {actual_damage} damage!", 'warning')
     
     # PARTY BUFF: Acid Veil recoil damage
-    if acid_veil_char and acid_veil_reduction > 0:
+    if acid_veil_reduction > 0:
         # Enemy takes 5% recoil of the ORIGINAL damage (before reductions)
-        original_damage = enemy.attack + random.randint(-2, 4)
+        original_damage = enemy.attack + game.rng.randint(-2, 4)
         recoil = max(1, int(original_damage * 0.05))
         enemy.hp -= recoil
         game.add_msg(f"💧 ACID VEIL! {enemy.name} takes {recoil} recoil damage!", 'highlight')
@@ -2555,13 +3093,7 @@ def enemy_turn(game):
         hp_before_hit = char.hp + actual_damage
         
         # PARTY BUFF: Ribbit Recovery - ALL characters survive at 1 HP
-        ribbit_active = False
-        for c in game.characters:
-            if hasattr(c, 'has_ribbit_recovery') and c.has_ribbit_recovery and not c.captured:
-                ribbit_active = True
-                break
-        
-        if ribbit_active and hp_before_hit > 1:  # Was above 1 HP before the hit
+        if game.party.ribbit_recovery and hp_before_hit > 1:  # Was above 1 HP before the hit
             char.hp = 1
             game.add_msg("🐸 RIBBIT RECOVERY! 🐸", 'success')
             game.add_msg(f"Asui's tongue pulls {char.name} to safety! HP: 1", 'success')
@@ -2585,7 +3117,7 @@ def handle_victory(game):
     
     # Gain EXP
     old_level = char.level
-    char.gain_exp(enemy.exp_reward)
+    game.award_exp(char, enemy.exp_reward)
     
     # Check if leveled up
     if char.level > old_level:
@@ -2608,13 +3140,13 @@ def handle_victory(game):
         return
     
     # Random item drop (30% chance)
-    if random.random() < 0.3:
-        item = random.choice(["Health Potion", "Energy Drink"])
+    if game.rng.random() < 0.3:
+        item = game.rng.choice(["Health Potion", "Energy Drink"])
         game.shared_inventory.append(item)
         game.add_msg(f"💎 Found: {item}!", 'highlight')
     
     # PHASE 2.5: Ochaco's Float Recovery
-    if hasattr(char, 'post_combat_heal') and char.post_combat_heal > 0:
+    if char.post_combat_heal > 0:
         char.heal(char.post_combat_heal)
         game.add_msg(f"💚 Float Recovery! {char.name} healed {char.post_combat_heal} HP!", 'success')
     
@@ -2625,32 +3157,7 @@ def handle_victory(game):
     # Mark room as cleared and apply passive healing
     game.cleared_rooms.add(game.current_room)
     
-    # PHASE 1: Passive healing for benched characters
-    # Heal based on vitality: 1 HP + (vitality bonus / 15)
-    vit_bonus = game.global_tree.get_hp_bonus()
-    heal_per_room = max(1, vit_bonus // 15)
-    
-    # PHASE 2.5: Ochaco's Helping Hand bonus
-    ochaco_bonus = 0
-    if char.unique_passive and char.unique_passive['type'] == 'helping_hand':
-        ochaco_bonus = 2
-    
-    # PHASE 2.5: Asui's Ribbit Recovery energy restore
-    asui_energy = 0
-    if char.unique_passive and char.unique_passive['type'] == 'ribbit_recovery':
-        asui_energy = 5
-    
-    for character in game.characters:
-        if character != char and not character.captured:
-            old_hp = character.hp
-            character.heal(heal_per_room + ochaco_bonus)
-            
-            # Asui's energy recovery
-            if asui_energy > 0:
-                character.restore_energy(asui_energy)
-            # Optionally log healing (commented out to avoid spam)
-            # if character.hp > old_hp:
-            #     game.add_msg(f"{character.name} rests (+{character.hp - old_hp} HP)", 'normal')
+    game.heal_bench(char)
     
     # Check if this was a boss
     if isinstance(enemy, BossEnemy):
@@ -2669,7 +3176,7 @@ def handle_victory(game):
         total_boss_exp = enemy.exp_reward + bonus_exp
         game.add_msg(f"Boss Bonus EXP: +{bonus_exp}", 'highlight')
         game.add_msg(f"Total Boss EXP: {total_boss_exp}", 'highlight')
-        char.gain_exp(bonus_exp)  # Already got base exp earlier
+        game.award_exp(char, bonus_exp)  # Already got base exp earlier
         game.add_msg("")
         
         # Zone completion
@@ -2693,7 +3200,7 @@ def handle_victory(game):
         else:
             game.game_state = 'ready'
             game.pending_input = 'continue'
-            game.current_options = [{'key': 'continue', 'text': f'Press Enter to begin Zone {game.current_zone}'}]
+            game.set_options([{'key': 'continue', 'text': f'Press Enter to begin Zone {game.current_zone}'}])
     else:
         game.show_navigation_options()
 
@@ -2757,6 +3264,8 @@ def handle_defeat(game):
     
     char.captured = True
     char.reset_personal_skills()
+    game.refresh_team_up_ready(char)
+    game.party.refresh(game.characters)
     game.selected_character = None
     game.in_combat = False
     game.current_enemy = None
@@ -2851,7 +3360,7 @@ def start_final_boss(game):
 def enter_boss_room(game):
     """Enter boss room"""
     if game.current_zone not in game.zone_bosses:
-        game.zone_bosses[game.current_zone] = create_boss(game.current_zone)
+        game.zone_bosses[game.current_zone] = create_boss(game.current_zone, rng=game.rng)
     
     boss = game.zone_bosses[game.current_zone]
     
@@ -2982,4 +3491,8 @@ if __name__ == '__main__':
     print("Press CTRL+C to stop")
     print("="*70 + "\n")
     
+    # The debug reloader runs this block in a watcher process too - only the
+    # child that serves requests starts the background threads
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,538 @@
+"""
+ASGI SERVING MODE
+The game API as plain asyncio handlers, for serving many concurrent players
+from one process without a thread per request. Uses the same FullWebGame
+engine, session store, journal and metrics as the Flask app in app_full.py,
+which keeps working unchanged (python app_full.py).
+
+Game inputs run directly on the event loop - a handler takes microseconds -
+while requests for one session queue on an asyncio lock. Anything that can
+block (backend reads/writes, journal fsyncs, static files) runs on a small
+I/O thread pool (TDS_ASGI_IO_THREADS, default 32).
+
+Besides POST /api/input, clients can keep one channel open per session
+(see channels.py): a WebSocket at /ws, or the /api/events stream plus
+POST /api/send.
+
+Run with: python asgi_app.py --port 8000
+(or any ASGI server: uvicorn asgi_app:app --backlog 16384)
+Needs uvicorn: pip install -r requirements-extra.txt
+"""
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import parse_qs, unquote
+
+from app_full import (CONFLICT_ERROR, SAVE_ATTEMPTS, admin_authorized, batch_inputs, channels, games,
+                      input_dispatcher, load_session, memory_snapshot, metrics_registry, new_session,
+                      persist_input, persist_inputs, persist_start, persistence_blocks, process_input,
+                      process_inputs, journal, log, request_input, request_session_id, start_background)
+from channels import (Channel, SSE_KEEPALIVE, SSE_KEEPALIVE_SECONDS, decode_input, encode_frame,
+                      parse_ack, sse_event)
+from game_logging import elapsed_ms
+from message_catalog import CATALOG_JSON, VERSION as CATALOG_VERSION
+from metrics import CONTENT_TYPE
+from session_backend import VersionConflict
+from session_locks import AsyncSessionLocks
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# /api/input bodies are a session id and a short command
+MAX_BODY_BYTES = 64 * 1024
+
+_io_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('TDS_ASGI_IO_THREADS', 32)),
+                              thread_name_prefix='tds-io')
+session_locks = AsyncSessionLocks()
+
+
+class HTTPError(Exception):
+    """Turned into a JSON error response"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def run_blocking(func, *args):
+    """Run func on the I/O pool and wait for it without blocking the loop"""
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, func, *args)
+
+
+@contextmanager
+def hold_from_thread(loop, session_id):
+    """session_locks.hold() for code running on the I/O pool - the loop takes the lock"""
+    held = session_locks.hold(session_id)
+    asyncio.run_coroutine_threadsafe(held.__aenter__(), loop).result()
+    try:
+        yield
+    finally:
+        asyncio.run_coroutine_threadsafe(held.__aexit__(None, None, None), loop).result()
+
+
+# ----------------------------------------------------------------------
+# Request / response plumbing
+# ----------------------------------------------------------------------
+
+async def read_body(receive):
+    """Whole request body, up to MAX_BODY_BYTES"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise HTTPError(400, 'Client disconnected')
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, 'Request body too large')
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def read_json(receive):
+    """Request body parsed as a JSON object"""
+    body = await read_body(receive)
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, 'Invalid JSON')
+    if not isinstance(data, dict):
+        raise HTTPError(400, 'Expected a JSON object')
+    return data
+
+
+async def send_response(send, status, body, content_type='application/json', headers=()):
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    header_list = [(b'content-type', content_type.encode('latin-1')),
+                   (b'content-length', str(len(body)).encode('latin-1'))]
+    header_list.extend(headers)
+    await send({'type': 'http.response.start', 'status': status, 'headers': header_list})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, data, status=200):
+    await send_response(send, status, json.dumps(data, separators=(',', ':')))
+
+
+# ----------------------------------------------------------------------
+# Static files
+# ----------------------------------------------------------------------
+
+def safe_path(directory, relative):
+    """Absolute path of relative inside directory, or None if it escapes it"""
+    root = os.path.realpath(os.path.join(BASE_DIR, directory))
+    full = os.path.realpath(os.path.join(root, relative))
+    if full != root and not full.startswith(root + os.sep):
+        return None
+    return full
+
+
+def _read_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+
+
+async def send_file(send, path, content_type=None):
+    data = None if path is None else await run_blocking(_read_file, path)
+    if data is None:
+        await send_response(send, 404, 'Not found', 'text/plain; charset=utf-8')
+        return
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    await send_response(send, 200, data, content_type)
+
+
+def _image_path(relative):
+    """Same fallback as the Flask route: the image, else the placeholder"""
+    path = safe_path('images', relative)
+    if path is not None and os.path.isfile(path):
+        return path
+    placeholder = safe_path('images', 'placeholder.png')
+    return placeholder if os.path.isfile(placeholder) else None
+
+
+# ----------------------------------------------------------------------
+# Routes
+# ----------------------------------------------------------------------
+
+async def api_start(scope, receive, send):
+    """Start new game"""
+    data = await read_json(receive)
+    game, seed = new_session()
+    state = game.get_state_dict(catalog=data.get('catalog'))
+    if persistence_blocks():
+        await run_blocking(persist_start, game.session_id, seed)
+    await send_json(send, {'session_id': game.session_id, 'state': state})
+
+
+async def get_session(session_id):
+    """load_session() without blocking the loop on a backend or journal"""
+    if persistence_blocks():
+        return await run_blocking(load_session, session_id)
+    return load_session(session_id)
+
+
+async def run_persisted(session_id, apply, persist, *args):
+    """app_full.run_persisted() for the loop - call under the session's lock
+
+    Loads the session, runs apply(game) here and persist(*args) on the I/O
+    pool, redoing the input from the stored state on a VersionConflict.
+    Returns (game, apply's result).
+    """
+    for attempt in range(SAVE_ATTEMPTS):
+        game = await get_session(session_id)
+        if game is None:
+            raise HTTPError(400, 'Invalid session')
+        result = apply(game)
+        if not persistence_blocks():
+            return game, result
+        try:
+            await run_blocking(persist, *args)
+        except VersionConflict:
+            log.warning("Session saved by another worker, retrying input",
+                        extra={'session_id': session_id, 'attempt': attempt + 1})
+            continue
+        return game, result
+    raise HTTPError(409, CONFLICT_ERROR)
+
+
+async def apply_input(session_id, user_input, respond=None):
+    """Run one input under the session's lock and persist it
+
+    respond(game) is called while the lock is still held (e.g. to build the
+    reply state or publish to channels); its result is returned.
+    """
+    async with session_locks.hold(session_id):
+        game, _ = await run_persisted(session_id, lambda game: process_input(game, user_input),
+                                      persist_input, session_id, user_input)
+        return respond(game) if respond else None
+
+
+def input_fields(data):
+    """request_input() with a malformed field as a 400"""
+    try:
+        return request_input(data)
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+
+async def api_input(scope, receive, send):
+    """Handle any user input"""
+    data = await read_json(receive)
+    session_id, user_input = input_fields(data)
+
+    state = await apply_input(session_id, user_input,
+                              lambda game: game.get_state_dict(data.get('ack'), data.get('epoch'),
+                                                               data.get('catalog')))
+    await send_json(send, {'state': state})
+
+
+async def api_input_batch(scope, receive, send):
+    """Apply an ordered list of inputs in one request and return the final state"""
+    data = await read_json(receive)
+    try:
+        session_id = request_session_id(data)
+        user_inputs = batch_inputs(data.get('inputs'))
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+    async with session_locks.hold(session_id):
+        game, steps = await run_persisted(session_id,
+                                          lambda game: process_inputs(game, user_inputs, bool(data.get('messages'))),
+                                          persist_inputs, session_id, user_inputs)
+        reply = {'state': game.get_state_dict(data.get('ack'), data.get('epoch'), data.get('catalog')),
+                 'applied': len(user_inputs)}
+    if steps is not None:
+        reply['steps'] = steps
+    await send_json(send, reply)
+
+
+def _publish_or_state(ack, epoch, catalog=None):
+    """respond() for channel inputs - None once the channels have the state"""
+    def respond(game):
+        if channels.publish_state(game):
+            return None
+        return game.get_state_dict(ack, epoch, catalog)
+    return respond
+
+
+async def api_send(scope, receive, send):
+    """Input from a client with an open event stream - the state goes out on the stream"""
+    data = await read_json(receive)
+    session_id, user_input = input_fields(data)
+
+    respond = _publish_or_state(data.get('ack'), data.get('epoch'), data.get('catalog'))
+    state = await apply_input(session_id, user_input, respond)
+    if state is None:
+        await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+    else:
+        # The stream dropped in between - answer like /api/input
+        await send_json(send, {'state': state})
+
+
+def _query(scope):
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return {key: values[0] for key, values in query.items()}
+
+
+async def open_channel(scope):
+    """Subscribe a channel for the session named in the query string
+
+    Returns (channel, frame queue), or (None, None) for an unknown session.
+    """
+    query = _query(scope)
+    session_id = query.get('session_id')
+    if not session_id:
+        return None, None
+    frames = asyncio.Queue()
+    channel = Channel(session_id, frames.put_nowait, parse_ack(query.get('ack')), query.get('epoch'),
+                      query.get('catalog'))
+    # Under the lock: a journal recovery must not race an input to this session
+    async with session_locks.hold(session_id):
+        if await get_session(session_id) is None:
+            return None, None
+        channels.subscribe(channel)
+    return channel, frames
+
+
+async def api_events(scope, receive, send):
+    """Server-Sent Events channel for one session (state updates and pushes)"""
+    channel, frames = await open_channel(scope)
+    if channel is None:
+        raise HTTPError(400, 'Invalid session')
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    disconnected = asyncio.ensure_future(wait_disconnect())
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await send({'type': 'http.response.body', 'body': SSE_KEEPALIVE.encode(), 'more_body': True})
+        while not disconnected.done():
+            next_frame = asyncio.ensure_future(frames.get())
+            done, _ = await asyncio.wait((next_frame, disconnected), timeout=SSE_KEEPALIVE_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if next_frame in done:
+                chunk = sse_event(next_frame.result())
+            else:
+                next_frame.cancel()
+                if disconnected in done:
+                    break
+                chunk = SSE_KEEPALIVE
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+    finally:
+        channels.unsubscribe(channel)
+        disconnected.cancel()
+
+
+async def websocket_endpoint(scope, receive, send):
+    """WebSocket channel: {"i": input} frames in, state/msg/error frames out"""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    channel, frames = await open_channel(scope)
+    if channel is None:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    await send({'type': 'websocket.accept'})
+
+    async def write_frames():
+        while True:
+            await send({'type': 'websocket.send', 'text': await frames.get()})
+
+    writer = asyncio.ensure_future(write_frames())
+    respond = _publish_or_state(None, None)
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message['type'] != 'websocket.receive':
+                continue
+            try:
+                user_input = decode_input(message.get('text') or message.get('bytes') or b'')
+                await apply_input(channel.session_id, user_input, respond)
+            except (ValueError, HTTPError) as e:
+                frames.put_nowait(encode_frame('error', m=getattr(e, 'message', str(e))))
+    finally:
+        channels.unsubscribe(channel)
+        writer.cancel()
+
+
+async def api_session_stats(scope, receive, send):
+    """Report session store occupancy and eviction counts"""
+    stats = games.get_stats()
+    if journal is not None:
+        stats['journal'] = journal.get_stats()
+    await send_json(send, stats)
+
+
+async def api_input_stats(scope, receive, send):
+    """Per-state input handler timings and error counts"""
+    await send_json(send, input_dispatcher.get_stats())
+
+
+async def admin_memory(scope, receive, send):
+    """Per-session memory breakdown (?session_id= for one, else ?sample=N recent ones)"""
+    headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope['headers']}
+    query = _query(scope)
+    if not admin_authorized(headers, query):
+        raise HTTPError(404, 'Not found')
+    try:
+        sample = int(query.get('sample', 50))
+    except ValueError:
+        raise HTTPError(400, 'sample must be a number')
+    # Walking sessions (and the tracemalloc pass) is slow - do it on the I/O pool,
+    # taking each session's lock so inputs wait while it is walked
+    loop = asyncio.get_running_loop()
+    report = await run_blocking(memory_snapshot, query.get('session_id'), sample,
+                                lambda session_id: hold_from_thread(loop, session_id))
+    if report is None:
+        raise HTTPError(400, 'Invalid session')
+    await send_json(send, report)
+
+
+async def api_catalog(scope, receive, send):
+    """Fixed message text for clients to cache (see message_catalog.py)"""
+    etag = f'"{CATALOG_VERSION}"'.encode('latin-1')
+    if (b'if-none-match', etag) in scope['headers']:
+        await send_response(send, 304, b'', headers=[(b'etag', etag)])
+        return
+    await send_response(send, 200, CATALOG_JSON, headers=[(b'etag', etag), (b'cache-control', b'no-cache')])
+
+
+async def metrics_endpoint(scope, receive, send):
+    """Prometheus scrape endpoint"""
+    await send_response(send, 200, metrics_registry.render(), CONTENT_TYPE)
+
+
+def _static(directory, filename, content_type=None):
+    async def serve(scope, receive, send):
+        await send_file(send, safe_path(directory, filename), content_type)
+    return serve
+
+
+# (method, path) -> handler
+ROUTES = {
+    ('POST', '/api/start'): api_start,
+    ('POST', '/api/input'): api_input,
+    ('POST', '/api/input/batch'): api_input_batch,
+    ('POST', '/api/send'): api_send,
+    ('GET', '/api/events'): api_events,
+    ('GET', '/api/session_stats'): api_session_stats,
+    ('GET', '/api/input_stats'): api_input_stats,
+    ('GET', '/api/admin/memory'): admin_memory,
+    ('GET', '/api/catalog'): api_catalog,
+    ('GET', '/metrics'): metrics_endpoint,
+    ('GET', '/'): _static('.', 'homepage.html'),
+    ('GET', '/game'): _static('templates', 'game.html'),
+    ('GET', '/tip.jpeg'): _static('.', 'tip.jpeg'),
+    ('GET', '/favicon.ico'): _static('.', 'favicon.ico', 'image/x-icon'),
+    ('GET', '/player_guide'): _static('player_guide', 'player_guide.html'),
+    ('GET', '/player_guide/'): _static('player_guide', 'player_guide.html'),
+    ('GET', '/player_guide/player_guide.html'): _static('player_guide', 'player_guide.html'),
+}
+
+
+async def route(scope, receive, send):
+    method = scope['method']
+    path = scope['path']
+    handler = ROUTES.get((method, path))
+    if handler is not None:
+        await handler(scope, receive, send)
+    elif method == 'GET' and path.startswith('/static/'):
+        await send_file(send, safe_path('static', unquote(path[len('/static/'):])))
+    elif method == 'GET' and path.startswith('/images/'):
+        relative = unquote(path[len('/images/'):])
+        await send_file(send, await run_blocking(_image_path, relative))
+    elif any(p == path for _, p in ROUTES):
+        raise HTTPError(405, 'Method not allowed')
+    else:
+        raise HTTPError(404, 'Not found')
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Session janitor and journal threads - importing app_full starts none
+            start_background()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            channels.broadcast([{'text': 'Server restarting - your progress is kept, reconnecting...',
+                                 'type': 'warning'}])
+            # Let queued backend writes finish, then flush the journal - both block,
+            # so wait for them on the default executor rather than on the loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _io_pool.shutdown, True)
+            await loop.run_in_executor(None, games.stop_janitor)
+            if journal is not None:
+                await loop.run_in_executor(None, journal.close)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 3 entry point"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] == 'websocket':
+        if scope['path'] == '/ws':
+            await websocket_endpoint(scope, receive, send)
+        else:
+            await send({'type': 'websocket.close', 'code': 4404})
+        return
+    if scope['type'] != 'http':
+        return
+
+    start = time.perf_counter()
+    try:
+        await route(scope, receive, send)
+    except HTTPError as e:
+        await send_json(send, {'error': e.message}, e.status)
+    except Exception:
+        log.exception("Request failed", extra={'path': scope['path'], 'duration_ms': elapsed_ms(start)})
+        await send_json(send, {'error': 'Internal server error'}, 500)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the game API on asyncio')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--backlog', type=int, default=16384, help='pending connection queue')
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("asgi_app needs an ASGI server: pip install -r requirements-extra.txt",
+              file=sys.stderr)
+        return 1
+    # One worker process - sessions live in this process's memory
+    uvicorn.run(app, host=args.host, port=args.port, backlog=args.backlog,
+                timeout_keep_alive=30, access_log=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
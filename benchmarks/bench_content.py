@@ -0,0 +1,49 @@
+"""
+CONTENT BENCHMARK
+Registry lookups vs rebuilding the text/skill-tree dict literals on every call.
+Run with: python benchmarks/bench_content.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import content_registry
+from content_registry import poi_descriptions, room_description, zone_descriptions
+from mha_roguelike_complete import build_character_skill_trees, get_character_skill_tree
+
+
+def rebuilt(by_theme):
+    """Stand-in for evaluating one of the old per-call dict literals"""
+    return {theme: list(texts) for theme, texts in by_theme.items()}
+
+
+def main():
+    number = 20000
+    rng = random.Random(0)
+    cases = (
+        ('room description',
+         lambda: rebuilt(content_registry.ROOM_DESCRIPTIONS_BY_THEME).get('lake')[2],
+         lambda: room_description('lake', 3)),
+        ('zone description',
+         lambda: rng.choice(rebuilt(content_registry.ZONE_DESCRIPTIONS).get('lake')),
+         lambda: rng.choice(zone_descriptions('lake'))),
+        ('POI pool',
+         lambda: rng.sample(rebuilt(content_registry.POI_DESCRIPTIONS).get('lake'), 4),
+         lambda: rng.sample(poi_descriptions('lake'), 4)),
+        ('skill tree',
+         lambda: build_character_skill_trees().get('Denki Kaminari', {}),
+         lambda: get_character_skill_tree('Denki Kaminari')),
+    )
+
+    print(f"{'':18} {'rebuilt':>10} {'registry':>10}")
+    for label, old, new in cases:
+        old_us = min(timeit.repeat(old, number=number, repeat=3)) / number * 1e6
+        new_us = min(timeit.repeat(new, number=number, repeat=3)) / number * 1e6
+        print(f"{label:18} {old_us:8.2f}us {new_us:8.2f}us  {old_us / new_us:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
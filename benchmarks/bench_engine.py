@@ -0,0 +1,441 @@
+"""
+ENGINE BENCHMARK SUITE
+Times the engine's hot paths in isolation on seeded early- and late-game
+fixtures, writes the results as JSON and compares them with a stored baseline.
+Each timed call gets its own copy of the fixture (built untimed beforehand),
+with its RNG stream offset so branchy code is averaged over many rolls.
+Rounds are interleaved across benchmarks and the best round counts, so a
+noisy stretch on the machine doesn't land on one benchmark; a slowdown only
+counts when the median round agrees and a second, fresh timing of that
+benchmark shows it again. A fixed
+pure-Python workload is timed alongside; comparisons are scaled by how
+its speed moved, which cancels out a machine that is simply slower today.
+Per-session memory (memory_report.py) is measured on the same fixtures and
+a long seeded playthrough; sizes are deterministic, so their threshold is
+tighter.
+
+Run with: python benchmarks/bench_engine.py
+          python benchmarks/bench_engine.py --threshold 0.20 --threshold-for 'late/*=0.4'
+          python benchmarks/bench_engine.py --timing-advisory  (only memory can fail)
+          python benchmarks/bench_engine.py --save-baseline    (after an intended change)
+Exits with status 1 when any benchmark's best and median rounds are both slower
+than baseline * (1 + threshold) twice running, or any session has grown by more
+than --memory-threshold.
+Baselines are machine-specific - regenerate on the box you compare on.
+"""
+
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_full import (FullWebGame, enemy_turn, handle_combat_action, handle_quirk_choice,
+                      handle_victory, process_input)
+from mha_roguelike_complete import create_class_1a
+import memory_report
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline_engine.json')
+DEFAULT_OUT = os.path.join(HERE, 'results_engine.json')
+SUITE_VERSION = 1
+
+FIXTURE_SEED = 20240601
+LATE_ZONE = 15
+LATE_LEVEL = 12
+LATE_CAPTURED = 5
+PLAYED_STEPS = 3000
+# SessionRandom is two ints - a Mersenne Twister table would be ~2.5 KB
+RNG_MAX_BYTES = 64
+
+
+# ----------------------------------------------------------------------
+# Fixtures - to_state() dicts, so every timed call starts from a fresh copy
+# ----------------------------------------------------------------------
+
+def _spend_skill_points(game):
+    """Alternate global and personal upgrades through the real menus"""
+    char = game.selected_character
+    for attempt in range(60):
+        if char.skill_points <= 0:
+            break
+        process_input(game, 'skills')
+        process_input(game, '2' if attempt % 2 else '1')
+        process_input(game, str(attempt % 5 + 1))
+        process_input(game, '0')
+        if game.pending_input == 'skill_tree_choice':
+            process_input(game, '4')
+
+
+def build_fixtures(stage, seed=FIXTURE_SEED):
+    """Named session states for one stage: navigation, combat and quirk menu"""
+    game = FullWebGame(f'bench-{stage}', seed=seed)
+    game.start_game()
+    if stage == 'late':
+        game.current_zone = LATE_ZONE
+        for char in game.characters:
+            while char.level < LATE_LEVEL:
+                game.award_exp(char, char.exp_to_level - char.exp)
+    process_input(game, 'continue')
+    process_input(game, '1')
+    if stage == 'late':
+        _spend_skill_points(game)
+        # A few students lost along the way
+        for char in game.characters[-LATE_CAPTURED:]:
+            char.captured = True
+            game.refresh_team_up_ready(char)
+        game.party.refresh(game.characters)
+    fixtures = {'navigation': game.to_state()}
+
+    # Force an encounter: the last room before the boss with none fought yet
+    game.zone_encounters = 0
+    game.current_room = game.zone_map['boss_room'] - 1
+    game.start_room_exploration()
+    assert game.pending_input == 'combat_action', game.pending_input
+    fixtures['combat'] = game.to_state()
+
+    process_input(game, '2')
+    assert game.pending_input == 'quirk_choice', game.pending_input
+    fixtures['quirk'] = game.to_state()
+    return fixtures
+
+
+def clone(state, index):
+    """Fresh session from a fixture, on its own stretch of the RNG stream"""
+    game = FullWebGame.from_state(state)
+    seed, counter = game.rng.getstate()
+    game.rng.setstate((seed, counter + index * 7919))
+    return game
+
+
+def _first_new_room(game):
+    """Prepare start_room_exploration: step into an unexplored, non-boss room"""
+    rooms = game.zone_map['rooms'][game.current_room]
+    for direction in ('north', 'east', 'west', 'south'):
+        room = rooms[direction]
+        if room and room != game.zone_map['boss_room'] and room not in game.visited_rooms:
+            game.current_room = room
+            break
+    return game
+
+
+def _ready_for_delta(game):
+    game.get_state_dict()
+    return game
+
+
+def _enemy_defeated(game):
+    game.current_enemy.hp = 0
+    return game
+
+
+# (name, fixture, prepare(game) -> game, call(game)) - fixture None means no game needed
+STAGE_BENCHMARKS = (
+    ('get_state_dict', 'navigation', None, lambda g: g.get_state_dict()),
+    ('get_state_dict_delta', 'combat', _ready_for_delta,
+     lambda g: g.get_state_dict(g.state_version, g.state_epoch)),
+    ('start_room_exploration', 'navigation', _first_new_room, lambda g: g.start_room_exploration()),
+    ('handle_combat_action', 'combat', None, lambda g: handle_combat_action(g, '1')),
+    ('handle_quirk_choice', 'quirk', None, lambda g: handle_quirk_choice(g, '1')),
+    ('enemy_turn', 'combat', None, enemy_turn),
+    ('handle_victory', 'combat', _enemy_defeated, handle_victory),
+    ('determine_poi_content', 'navigation', None, lambda g: g.determine_poi_content()),
+    ('show_navigation_options', 'navigation', None, lambda g: g.show_navigation_options()),
+)
+
+CALIBRATION = 'calibration/interpreter'
+
+
+def _calibration_workload(i):
+    """Fixed interpreter-bound work - dict, string and list churn like the engine's"""
+    table = {}
+    for n in range(64):
+        key = f'k{n}'
+        table[key] = table.get(key, 0) + n
+    return sorted(table.items())
+
+
+COMMON_BENCHMARKS = (
+    ('FullWebGame.__init__', lambda i: i, lambda i: FullWebGame('bench', seed=i)),
+    ('create_class_1a', lambda i: i, lambda i: create_class_1a()),
+)
+
+
+# ----------------------------------------------------------------------
+# Timing
+# ----------------------------------------------------------------------
+
+def time_round(make_arg, call, number):
+    """Per-call seconds over one round of number calls
+
+    Arguments are built before the round and garbage collection is off
+    while it runs, so only call() itself is measured.
+    """
+    args = [make_arg(i) for i in range(number)]
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for arg in args:
+            call(arg)
+        return (time.perf_counter() - start) / number
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def collect_benchmarks(only=None):
+    """(name, make_arg, call) for every benchmark matching the only glob"""
+    def wanted(name):
+        return only is None or fnmatch.fnmatch(name, only)
+
+    # Calibration always runs - comparisons are scaled by it
+    benchmarks = [(CALIBRATION, lambda i: i, _calibration_workload)]
+    benchmarks += [(f'common/{name}', make_arg, call)
+                   for name, make_arg, call in COMMON_BENCHMARKS if wanted(f'common/{name}')]
+    for stage in ('early', 'late'):
+        fixtures = None
+        for bench_name, fixture, prepare, call in STAGE_BENCHMARKS:
+            name = f'{stage}/{bench_name}'
+            if not wanted(name):
+                continue
+            if fixtures is None:
+                fixtures = build_fixtures(stage)
+            state = fixtures[fixture]
+            if prepare is None:
+                make_arg = lambda i, state=state: clone(state, i)
+            else:
+                make_arg = lambda i, state=state, prepare=prepare: prepare(clone(state, i))
+            benchmarks.append((name, make_arg, call))
+    return benchmarks
+
+
+def run_suite(number=100, repeat=30, only=None, log=print):
+    """Run every (matching) benchmark and return {name: result}"""
+    benchmarks = collect_benchmarks(only)
+    rounds = {name: [] for name, _, _ in benchmarks}
+    # One untimed warm-up round, then interleaved timed rounds
+    for timed in [False] + [True] * repeat:
+        for name, make_arg, call in benchmarks:
+            seconds = time_round(make_arg, call, number)
+            if timed:
+                rounds[name].append(seconds)
+
+    results = {}
+    for name, _, _ in benchmarks:
+        results[name] = {
+            'best_us': min(rounds[name]) * 1e6,
+            'median_us': statistics.median(rounds[name]) * 1e6,
+            'rounds': repeat,
+            'number': number,
+        }
+        log(f"  {name:42} {results[name]['best_us']:10.2f} us  (median {results[name]['median_us']:.2f})")
+    return results
+
+
+def measure_memory(log=print):
+    """{name: session_breakdown()} for every fixture and a long playthrough"""
+    memory = {}
+    for stage in ('early', 'late'):
+        for fixture, state in build_fixtures(stage).items():
+            memory[f'{stage}/{fixture}'] = memory_report.session_breakdown(FullWebGame.from_state(state))
+    game = memory_report.played_session(FIXTURE_SEED, PLAYED_STEPS)
+    memory[f'played/{PLAYED_STEPS}'] = memory_report.session_breakdown(game)
+    # The sizes above are only comparable if a seed replays the same run
+    again = memory_report.played_session(FIXTURE_SEED, PLAYED_STEPS)
+    assert again.rng.getstate() == game.rng.getstate(), "seeded playthrough didn't replay the same rolls"
+    assert sys.getsizeof(game.rng) <= RNG_MAX_BYTES, f"SessionRandom is {sys.getsizeof(game.rng)} bytes"
+    for name, breakdown in memory.items():
+        log(f"  {name:42} {breakdown['total']:10,} bytes")
+    return memory
+
+
+# ----------------------------------------------------------------------
+# Baseline comparison
+# ----------------------------------------------------------------------
+
+def threshold_for(name, default, overrides):
+    """Last matching NAME_PATTERN=FRACTION override, else the default"""
+    threshold = default
+    for pattern, value in overrides:
+        if fnmatch.fnmatch(name, pattern):
+            threshold = value
+    return threshold
+
+
+def machine_scale(results, baseline, stat='best_us'):
+    """How much slower (>1) or faster the machine ran the calibration workload"""
+    now = results.get(CALIBRATION, {}).get(stat)
+    base = baseline.get('results', {}).get(CALIBRATION, {}).get(stat)
+    return now / base if now and base else 1.0
+
+
+def compare(results, baseline, default_threshold=0.30, overrides=(), normalize=True):
+    """One row per benchmark: (name, baseline us, current us, change, threshold, status)
+
+    With normalize, change is measured against the baseline scaled by
+    machine_scale(), i.e. relative to the interpreter's speed right now.
+    A best round past the threshold is only a REGRESSION when the median
+    round is too; otherwise the row is marked 'noisy'.
+    """
+    rows = []
+    base_results = baseline.get('results', {})
+    scale = machine_scale(results, baseline) if normalize else 1.0
+    median_scale = machine_scale(results, baseline, 'median_us') if normalize else 1.0
+    for name, result in results.items():
+        if name == CALIBRATION:
+            continue
+        now = result['best_us']
+        base = base_results.get(name, {}).get('best_us')
+        threshold = threshold_for(name, default_threshold, overrides)
+        if base is None:
+            rows.append((name, None, now, None, threshold, 'new'))
+            continue
+        change = now / (base * scale) - 1.0
+        if change > threshold:
+            base_median = base_results[name].get('median_us')
+            median_change = (result['median_us'] / (base_median * median_scale) - 1.0
+                             if base_median else change)
+            status = 'REGRESSION' if median_change > threshold else 'noisy'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, base, now, change, threshold, status))
+    return rows
+
+
+def compare_memory(memory, baseline, threshold=0.05):
+    """One row per session: (name, baseline bytes, current bytes, change, threshold, status)
+
+    Categories that grew past the threshold are named in the status.
+    """
+    rows = []
+    base_memory = baseline.get('memory', {})
+    for name, breakdown in memory.items():
+        base = base_memory.get(name)
+        if base is None:
+            rows.append((name, None, breakdown['total'], None, threshold, 'new'))
+            continue
+        change = breakdown['total'] / base['total'] - 1.0
+        if change > threshold:
+            grown = [category for category, size in breakdown.items()
+                     if category != 'total' and size > base.get(category, 0) * (1 + threshold)]
+            status = f"REGRESSION ({', '.join(grown)})" if grown else 'REGRESSION'
+        elif change < -threshold:
+            status = 'smaller'
+        else:
+            status = 'ok'
+        rows.append((name, base['total'], breakdown['total'], change, threshold, status))
+    return rows
+
+
+def print_comparison(rows, unit='us'):
+    number = '10,.0f' if unit == 'bytes' else '10.2f'
+    print(f"{'benchmark':42} {'baseline':>10} {'now':>10} {'change':>8} {'limit':>6}  status  ({unit})")
+    for name, base, now, change, threshold, status in rows:
+        base_text = format(base, number) if base is not None else '         -'
+        change_text = f"{change * 100:+7.1f}%" if change is not None else '       -'
+        print(f"{name:42} {base_text} {format(now, number)} {change_text} {threshold * 100:5.0f}%  {status}")
+
+
+def parse_override(text):
+    pattern, _, value = text.rpartition('=')
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"expected NAME_PATTERN=FRACTION, got {text!r}")
+    return pattern, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Engine hot-path microbenchmarks')
+    parser.add_argument('--number', type=int, default=100, help='calls per round')
+    parser.add_argument('--repeat', type=int, default=30, help='rounds (the best one counts)')
+    parser.add_argument('--only', help="glob over benchmark names, e.g. 'late/*'")
+    parser.add_argument('--out', default=DEFAULT_OUT, help='where to write the JSON results')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.30,
+                        help='allowed slowdown as a fraction (default 0.30 = 30%%)')
+    parser.add_argument('--threshold-for', type=parse_override, action='append', default=[],
+                        metavar='NAME_PATTERN=FRACTION', help='per-benchmark threshold, repeatable')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--no-normalize', action='store_true',
+                        help='compare raw times instead of scaling by the calibration workload')
+    parser.add_argument('--memory-threshold', type=float, default=0.05,
+                        help='allowed per-session memory growth as a fraction (default 0.05 = 5%%)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the per-session memory checks')
+    parser.add_argument('--timing-advisory', action='store_true',
+                        help="report timing regressions without failing (memory still can)")
+    args = parser.parse_args(argv)
+
+    print(f"Engine benchmarks ({args.repeat} x {args.number} calls, best round):")
+    results = run_suite(args.number, args.repeat, args.only)
+    memory = {}
+    if not args.no_memory:
+        print("\nSession memory:")
+        memory = measure_memory()
+    report = {
+        'suite': 'engine',
+        'version': SUITE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'fixture_seed': FIXTURE_SEED,
+        'results': results,
+        'memory': memory,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} - run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('version') != SUITE_VERSION:
+        print("Baseline was written by another suite version - regenerate it")
+        return 0
+
+    print()
+    normalize = not args.no_normalize
+    if normalize:
+        print(f"Machine speed vs baseline: calibration x{machine_scale(results, baseline):.2f}")
+    rows = compare(results, baseline, args.threshold, args.threshold_for, normalize)
+    suspects = [row[0] for row in rows if row[5] == 'REGRESSION']
+    if suspects and not args.timing_advisory:
+        # A real slowdown shows up again; a noisy stretch on the machine usually doesn't
+        print(f"Re-timing {len(suspects)} slower benchmark(s) to confirm...")
+        confirmed = {}
+        for name in suspects:
+            retry = run_suite(args.number, args.repeat, name, log=lambda line: None)
+            confirmed.update((row[0], row) for row in compare(retry, baseline, args.threshold,
+                                                               args.threshold_for, normalize))
+        rows = [confirmed.get(row[0], row) for row in rows]
+    print_comparison(rows)
+    if args.timing_advisory:
+        rows = []
+    if memory:
+        print()
+        memory_rows = compare_memory(memory, baseline, args.memory_threshold)
+        print_comparison(memory_rows, unit='bytes')
+        rows += memory_rows
+    regressions = [row[0] for row in rows if row[5].startswith('REGRESSION')]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+SNAPSHOT BENCHMARK
+Compares the binary snapshot codec against pickle and JSON on real sessions.
+Run with: python benchmarks/bench_snapshot.py
+"""
+
+import json
+import os
+import pickle
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app_full
+from app_full import FullWebGame
+from snapshot import encode_state, decode_state
+
+
+def build_game(seed, steps):
+    """Play a session forward with random menu inputs through the API"""
+    random.seed(seed)
+    client = app_full.app.test_client()
+    session_id = client.post('/api/start').get_json()['session_id']
+    choices = ['continue', '1', '2', '3', '4', '5', '0', 'n', 's', 'e', 'w', 'search', 'rest']
+    for _ in range(steps):
+        state = client.post('/api/input', json={'session_id': session_id,
+                                                'input': random.choice(choices)}).get_json()['state']
+        if state['game_state'] in ('game_over', 'victory'):
+            break
+    return app_full.games[session_id]
+
+
+def measure(label, encode, decode, obj, number):
+    data = encode(obj)
+    enc = min(timeit.repeat(lambda: encode(obj), number=number, repeat=3)) / number
+    dec = min(timeit.repeat(lambda: decode(data), number=number, repeat=3)) / number
+    print(f"  {label:10} {len(data):8} bytes | encode {enc * 1e6:8.1f} us | decode {dec * 1e6:8.1f} us")
+    return len(data), enc, dec
+
+
+def main():
+    number = 200
+    for label, steps in (('early game', 5), ('mid game', 400)):
+        game = build_game(7, steps)
+        state = game.to_state()
+        print(f"{label} (zone {game.current_zone}, state '{game.game_state}'):")
+        measure('pickle', lambda g: pickle.dumps(g, pickle.HIGHEST_PROTOCOL), pickle.loads, game, number)
+        measure('json', lambda s: json.dumps(s, separators=(',', ':')).encode('utf-8'), json.loads, state, number)
+        measure('snapshot', encode_state, decode_state, state, number)
+        # Snapshots carry only mutable state, so include the to_state() walk for a fair total
+        measure('snap+walk', lambda g: encode_state(g.to_state()),
+                lambda d: FullWebGame.from_state(decode_state(d)), game, number // 4)
+        print()
+
+
+if __name__ == '__main__':
+    main()
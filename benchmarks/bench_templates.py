@@ -0,0 +1,69 @@
+"""
+TEMPLATE BENCHMARK
+Shared character templates vs rebuilding every student's static data per session.
+Run with: python benchmarks/bench_templates.py
+"""
+
+import gc
+import os
+import pickle
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app_full
+from app_full import FullWebGame
+from mha_roguelike_complete import Character, build_class_1a_templates, create_class_1a
+
+
+def create_class_1a_rebuilt():
+    """The old behaviour - every session gets its own copy of all static data
+    (templates are also frozen here, so this is a little slower than the old code)"""
+    return [Character.from_template(template) for template in build_class_1a_templates()]
+
+
+def session_bytes(factory, sessions):
+    """Average traced allocation per session for a roster factory"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rosters = [factory() for _ in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rosters
+    return (after - before) / sessions
+
+
+def main():
+    number = 200
+    sessions = 500
+    create_class_1a()  # warm the shared templates
+
+    print("roster build (create_class_1a):")
+    results = {}
+    for label, factory in (('rebuilt', create_class_1a_rebuilt), ('shared', create_class_1a)):
+        per_call = min(timeit.repeat(factory, number=number, repeat=3)) / number
+        per_session = session_bytes(factory, sessions)
+        results[label] = (per_call, per_session)
+        print(f"  {label:8} {per_call * 1e6:9.1f} us | {per_session / 1024:8.1f} KiB per session")
+
+    # Full /api/start cost: FullWebGame.__init__ builds the roster plus the rest of the session
+    print("\nFullWebGame() construction:")
+    for label, factory in (('rebuilt', create_class_1a_rebuilt), ('shared', create_class_1a)):
+        app_full.create_class_1a = factory
+        per_call = min(timeit.repeat(lambda: FullWebGame('bench'), number=number, repeat=3)) / number
+        per_session = session_bytes(lambda: FullWebGame('bench'), sessions)
+        print(f"  {label:8} {per_call * 1e6:9.1f} us | {per_session / 1024:8.1f} KiB per session")
+    app_full.create_class_1a = create_class_1a
+
+    # Shared templates pickle by reference, so pickled sessions shrink too
+    print(f"\npickled session: {len(pickle.dumps(FullWebGame('bench'), pickle.HIGHEST_PROTOCOL))} bytes")
+
+    rebuilt, shared = results['rebuilt'], results['shared']
+    print(f"\nshared templates: {rebuilt[0] / shared[0]:.1f}x faster, "
+          f"{rebuilt[1] / shared[1]:.1f}x less memory per roster")
+
+
+if __name__ == '__main__':
+    main()
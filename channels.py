@@ -0,0 +1,148 @@
+"""
+SESSION CHANNELS
+Persistent per-session connections for the browser client: a WebSocket
+(asgi_app.py), or Server-Sent Events plus small input POSTs where WebSockets
+aren't available (both servers). Plain POST /api/input keeps working for
+clients without either.
+
+Frames are compact JSON text:
+
+    client -> server   {"i": "<input>"}                  one input
+    server -> client   {"t": "state", "s": {...}}        state update
+                       {"t": "msg", "m": [{text, type}]}  pushed messages
+                       {"t": "error", "m": "..."}
+
+Each channel remembers the last state version it delivered, so state frames
+are deltas against what that connection has and the client never sends acks.
+Every channel of a session gets the state after an input made on any of them.
+"""
+
+import json
+import threading
+
+
+# Comment line that keeps idle SSE streams (and proxies in between) open
+SSE_KEEPALIVE = ': keepalive\n\n'
+SSE_KEEPALIVE_SECONDS = 15
+
+# Server -> client frames are tiny; inputs more so
+MAX_INPUT_FRAME = 1024
+
+
+def encode_frame(kind, **fields):
+    """Server -> client frame text"""
+    fields['t'] = kind
+    return json.dumps(fields, separators=(',', ':'))
+
+
+def decode_input(text):
+    """The input carried by a client frame - raises ValueError if malformed"""
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    if len(text) > MAX_INPUT_FRAME:
+        raise ValueError('Frame too large')
+    frame = json.loads(text)
+    if not isinstance(frame, dict) or not isinstance(frame.get('i', ''), str):
+        raise ValueError('Expected {"i": "<input>"}')
+    return frame.get('i', '').strip()
+
+
+def sse_event(frame):
+    """One frame as a Server-Sent Events message"""
+    return f'data: {frame}\n\n'
+
+
+def parse_ack(value):
+    """Client-reported state version from a query string, or None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Channel:
+    """One open connection to a session
+
+    deliver(frame_text) queues a frame for the connection's writer and must
+    not block; state_frame() has to run under the session's lock. catalog
+    is the message catalog version the client holds, if any.
+    """
+    __slots__ = ('session_id', 'deliver', 'ack', 'epoch', 'catalog')
+
+    def __init__(self, session_id, deliver, ack=None, epoch=None, catalog=None):
+        self.session_id = session_id
+        self.deliver = deliver
+        self.ack = ack
+        self.epoch = epoch
+        self.catalog = catalog
+
+    def state_frame(self, game):
+        state = game.get_state_dict(self.ack, self.epoch, self.catalog)
+        self.ack = state['version']
+        self.epoch = state['epoch']
+        return encode_frame('state', s=state)
+
+
+class ChannelHub:
+    """Open channels by session, for fanning out state updates and pushes"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'closed': 0, 'frames': 0, 'pushes': 0}
+
+    def subscribe(self, channel):
+        with self._lock:
+            self._sessions.setdefault(channel.session_id, set()).add(channel)
+            self.stats['opened'] += 1
+
+    def unsubscribe(self, channel):
+        with self._lock:
+            channels = self._sessions.get(channel.session_id)
+            if channels is None or channel not in channels:
+                return
+            channels.discard(channel)
+            if not channels:
+                del self._sessions[channel.session_id]
+            self.stats['closed'] += 1
+
+    def channels(self, session_id):
+        with self._lock:
+            return list(self._sessions.get(session_id, ()))
+
+    def has_channels(self, session_id):
+        return session_id in self._sessions
+
+    def publish_state(self, game):
+        """Send the session's new state to each of its channels - returns how many"""
+        channels = self.channels(game.session_id)
+        for channel in channels:
+            channel.deliver(channel.state_frame(game))
+        self.stats['frames'] += len(channels)
+        return len(channels)
+
+    def push(self, session_id, messages):
+        """Server-initiated messages ({'text', 'type'} dicts) for one session"""
+        frame = encode_frame('msg', m=messages)
+        channels = self.channels(session_id)
+        for channel in channels:
+            channel.deliver(frame)
+        self.stats['pushes'] += len(channels)
+        return len(channels)
+
+    def broadcast(self, messages):
+        """Push messages to every connected session (e.g. a restart notice)"""
+        with self._lock:
+            session_ids = list(self._sessions)
+        return sum(self.push(session_id, messages) for session_id in session_ids)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(channels) for channels in self._sessions.values())
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['sessions'] = len(self._sessions)
+            stats['channels'] = sum(len(channels) for channels in self._sessions.values())
+        return stats
@@ -0,0 +1,244 @@
+"""
+CONTENT REGISTRY
+Flavour text the web game shows on every room entry and POI search, built
+once at import instead of as a dict literal on every call. Everything here is
+read-only (mapping proxies of tuples) because it is shared by all sessions.
+
+    room_description('lake', 3)       # one lookup by (theme, room)
+    zone_descriptions('lake')         # both zone intros for a theme
+    poi_descriptions('lake')          # POI pool for a theme
+    skill_tree('Denki Kaminari')      # personal skill tree by student name
+"""
+
+from types import MappingProxyType
+
+from mha_roguelike_complete import CHARACTER_SKILL_TREES, get_character_skill_tree
+
+
+_ZONE_TEXT = {
+    'forest': [
+        "Dense foliage surrounds you as ancient trees form a natural canopy overhead. The air is thick with the scent of moss and earth, and wildlife sounds echo through the undergrowth.",
+        "A primeval woodland stretches in all directions, where twisted roots and hanging vines create natural obstacles. Shafts of green-filtered light pierce through the dense canopy above."
+    ],
+    'flashfire': [
+        "Extreme heat radiates from every surface as flames dance along the walls in controlled patterns. The air shimmers with thermal distortion, and the temperature is almost unbearable.",
+        "This zone simulates a catastrophic fire scenario where intense heat and periodic flame bursts test your ability to withstand extreme temperatures. Every breath feels like inhaling fire."
+    ],
+    'urban': [
+        "The simulation recreates a dense city environment with abandoned streets, damaged buildings, and urban debris. The atmosphere of a disaster zone permeates every corner.",
+        "Concrete and steel dominate this metropolitan landscape where everyday city elements have been transformed into tactical obstacles and hiding spots."
+    ],
+    'lake': [
+        "Water is the dominant feature here - from shallow pools to deeper channels. The air is heavy with moisture, and the sound of dripping water echoes constantly.",
+        "This aquatic environment challenges your ability to navigate partially flooded spaces where water levels vary and platforms shift beneath your feet."
+    ],
+    'mountain': [
+        "Rough stone and jagged rock formations define this high-altitude simulation. The uneven terrain and rocky obstacles demand careful footing and strategic positioning.",
+        "A harsh mountain environment where elevation changes, loose gravel, and stone outcroppings create a treacherous battlefield requiring both strength and agility."
+    ],
+    'blizzard': [
+        "Frigid temperatures and ice-covered surfaces dominate this frozen zone. Your breath forms clouds in the air, and frost creeps across every surface with supernatural speed.",
+        "An extreme cold environment where sub-zero temperatures, ice formations, and simulated wind chill test your endurance against the harshest winter conditions."
+    ],
+    'underground': [
+        "Claustrophobic tunnels and cave systems wind through compressed earth and stone. The air is stale, support structures creak ominously, and darkness presses in from all sides.",
+        "This subterranean zone simulates the dangers of underground rescue operations - from mine collapses to cave systems where every shadow could hide danger."
+    ]
+}
+
+_ROOM_TEXT = {
+    'forest': [
+        "You enter a dense grove where ancient trees tower overhead, their gnarled roots creating natural obstacles across the mossy floor. Shafts of dappled sunlight filter through the canopy above.",
+        "The room opens into a clearing dominated by a massive fallen oak, its hollow trunk large enough to serve as cover. Thick underbrush lines the perimeter, rustling with unseen movement.",
+        "Twisted vines hang from the ceiling like natural curtains, creating a maze-like environment. The air is thick with the scent of earth and decay, and mushrooms cluster on every surface.",
+        "You step into a rocky outcropping within the forest, where a small waterfall cascades into a crystal-clear pool. Moss-covered boulders provide elevated positions around the space.",
+        "The forest opens into a sun-drenched glade where wildflowers blanket the ground. A ring of ancient standing stones marks the center, their purpose long forgotten."
+    ],
+    'flashfire': [
+        "You step into a burning city street where storefronts blaze on both sides. Flames pour from shattered windows, and the asphalt itself seems to melt under the intense heat.",
+        "The room simulates a burning office building interior - desks and office equipment engulfed in flames, ceiling tiles raining down, emergency sprinklers long since failed.",
+        "You enter what appears to be a shopping district consumed by fire. Store mannequins melt in display windows, and neon signs spark and flicker before dying in the inferno.",
+        "The area resembles a city parking structure where vehicles have become explosive hazards. Flames leap from car to car, and concrete pillars glow red from the heat.",
+        "You step into a burning apartment complex with flames visible through every window. Fire escapes have warped from the heat, and smoke billows through hallways."
+    ],
+    'urban': [
+        "The room resembles a city street corner with storefronts, a bus stop bench, and a non-functional traffic light. Debris and abandoned vehicles provide cover throughout the space.",
+        "You enter what appears to be a multi-story parking garage section, with concrete pillars supporting low ceilings. Abandoned cars sit at odd angles, some with doors hanging open.",
+        "The area is set up like a small plaza with a dry fountain at its center. Cafe tables and chairs are scattered about, and shuttered shop windows line the walls.",
+        "This room recreates a subway platform complete with tracks, a stationary train car, and tiled walls covered in faded advertisements and graffiti.",
+        "You step into an urban rooftop environment with AC units, water towers, and ventilation systems creating a maze of obstacles. Gaps between sections simulate building edges."
+    ],
+    'lake': [
+        "The room features a large pool of water in its center, with floating platforms and partially submerged ruins visible beneath the surface. The air is cool and damp.",
+        "You enter a flooded chamber where water reaches knee-height throughout most of the space. A network of raised walkways and platforms provides dry paths across the room.",
+        "The area contains a series of connected pools at different depths, like natural tidal pools. Smooth stones and shells litter the shallow areas, while deeper sections are murky and dark.",
+        "This room houses what appears to be an underwater viewing area, with one wall of reinforced glass showing a darkened aquarium beyond. Puddles cover the floor from previous leaks.",
+        "You step into a room designed like a boat dock, with wooden planks extending over dark water. Mooring posts, coiled ropes, and fishing equipment are scattered about."
+    ],
+    'mountain': [
+        "The room is carved from rough stone, with jagged outcroppings creating natural pillars throughout. Loose rocks and gravel cover the uneven floor, making footing treacherous.",
+        "You enter a cavern-like space where stalactites hang from the ceiling and stalagmites rise from the floor. The walls glitter with embedded crystals that catch any available light.",
+        "The area resembles a narrow mountain pass with towering rock walls on either side. Large boulders are strewn about as if from an ancient avalanche.",
+        "This room features multiple levels connected by rough stone ledges and natural ramps. Small crevices and caves dot the walls, providing potential hiding spots.",
+        "You step into what appears to be the inside of a hollow mountain peak, with a spiraling path leading upward along the curved walls. The center drops away into darkness."
+    ],
+    'blizzard': [
+        "You enter a frozen chamber where ice coats every surface and your breath forms clouds in the frigid air. Icicles hang from the ceiling like frozen spears, and snow drifts pile against the walls.",
+        "The room is a winter wasteland with howling wind effects and artificial snow swirling through the air. Frozen sculptures of ice create obstacles, and the floor is treacherously slick.",
+        "You step into what appears to be the inside of a glacier - walls of blue ice surround you, and frozen formations jut out at odd angles. Frost creeps across any exposed surface.",
+        "The area resembles a frozen tundra with snow-covered ground and ice pillars rising from the floor. A bitter wind cuts through the space, and everything is coated in a layer of frost.",
+        "You enter a room dominated by a massive ice wall that reaches to the ceiling. Frozen waterfalls are suspended mid-cascade, and the temperature is well below freezing."
+    ],
+    'underground': [
+        "You descend into a cramped tunnel system with rough-hewn walls pressing in from all sides. Support beams creak ominously overhead, and the air is thick with the smell of earth and stone.",
+        "The room opens into a vast underground cavern with a ceiling lost in darkness above. Phosphorescent fungi provide eerie green light, casting strange shadows across ancient rock formations.",
+        "You enter what appears to be an abandoned mine shaft, with rusted rail tracks running along the floor and old mining equipment left to decay. The walls show pick marks from long-ago excavation.",
+        "The area is a natural cave system with multiple passages branching off in different directions. Water drips constantly from the ceiling, forming small pools on the uneven stone floor.",
+        "You step into an underground chamber that seems to be part of an ancient ruin - crumbling pillars support a low ceiling, and strange symbols are carved into the weathered stone walls."
+    ]
+}
+
+_POI_TEXT = {
+    'forest': [
+        "A hollow in an old tree trunk, partially concealed by hanging vines",
+        "A cluster of unusually large mushrooms growing in a perfect circle",
+        "A gap beneath a fallen log where the ground seems disturbed",
+        "Strange markings carved into a tree at chest height",
+        "A dense thicket of thorns with something glinting inside",
+        "An abandoned bird's nest large enough to hold objects",
+        "A burrow entrance at the base of a massive oak tree",
+        "Thick undergrowth where broken branches suggest recent passage",
+        "A natural hollow between tree roots filled with dead leaves",
+        "A cluster of unusual flowers that seem out of place"
+    ],
+    'flashfire': [
+        "A burning vehicle with its trunk still accessible",
+        "A collapsed storefront with something visible through the flames",
+        "A fire escape platform hanging at a dangerous angle",
+        "An office desk drawer that survived the blaze",
+        "A vending machine with its glass melted and warped",
+        "A mailbox partially protected by a concrete barrier",
+        "A phone booth with flames dancing around its frame",
+        "A newspaper stand engulfed but structurally intact",
+        "A park bench beneath a burning tree canopy",
+        "A bus stop shelter with one wall still standing",
+        "A storefront security gate warped by heat",
+        "An ATM alcove providing slight protection from flames"
+    ],
+    'urban': [
+        "A dumpster with its lid slightly open",
+        "A boarded-up doorway with one plank hanging loose",
+        "A newspaper stand with papers still inside",
+        "A manhole cover shifted to one side",
+        "A parked delivery truck with its back door unlocked",
+        "A phone booth with the door wedged open",
+        "A street vendor cart abandoned at an odd angle",
+        "A mailbox with a damaged lock",
+        "A maintenance access panel in the wall",
+        "A storm drain with something visible inside",
+        "A vending machine with a broken glass panel",
+        "An electrical junction box hanging open"
+    ],
+    'lake': [
+        "A partially submerged crate bobbing against the shore",
+        "A small cave entrance just above the waterline",
+        "A cluster of reeds thick enough to hide something",
+        "An overturned boat resting on the bank",
+        "A rope hanging down from above, disappearing into the water",
+        "A fishing net tangled around submerged debris",
+        "A waterlogged wooden chest caught between rocks",
+        "A drainage pipe opening at the water's edge",
+        "A collection of flotsam gathered in an eddy",
+        "Lily pads clustered unusually thick in one area",
+        "A submerged platform visible beneath the surface",
+        "A hollow in the rocky shoreline below the waterline"
+    ],
+    'mountain': [
+        "A narrow crevice in the rock face",
+        "A pile of loose stones that looks recently disturbed",
+        "A small cave opening partially blocked by rubble",
+        "A ledge with what might be an old campsite",
+        "A natural shelf in the rock where items could be hidden",
+        "A crack in the floor with something visible in the depths",
+        "A ring of stones arranged deliberately around a central point",
+        "An overhang creating a sheltered nook in the stone",
+        "A gap between two large boulders",
+        "Ancient mining equipment left to rust",
+        "A collapsed section of ceiling with loose rocks",
+        "Crystalline formations that seem hollow inside"
+    ],
+    'blizzard': [
+        "A snow drift piled suspiciously high against the wall",
+        "An ice formation with something frozen inside",
+        "A gap in the ice wall revealing a hidden alcove",
+        "Frost-covered debris clustered in the corner",
+        "An icicle formation hanging over a shadowed recess",
+        "A section of snow that appears recently disturbed",
+        "A frozen container partially visible through the ice",
+        "A natural ice shelf jutting from the wall",
+        "Compacted snow formed into an unnatural shape",
+        "A wind-carved hollow in a snowbank",
+        "Ice-encrusted equipment barely visible through frost",
+        "A crevasse in the frozen floor with darkness below"
+    ],
+    'underground': [
+        "A crack in the cave wall where loose rocks have fallen away",
+        "An old mining cart tipped on its side",
+        "A support beam that's partially collapsed, creating a gap",
+        "A cluster of glowing fungi growing around something buried",
+        "A pile of excavated earth and stone",
+        "A rusted toolbox half-buried in rubble",
+        "A side passage blocked by a recent cave-in",
+        "An ancient wooden crate covered in mineral deposits",
+        "A natural alcove hidden behind a rock formation",
+        "A section of wall where the stone appears different",
+        "A collapsed mine shaft with timbers still intact",
+        "A pool of stagnant water with something submerged",
+        "Railroad tracks that disappear into a dark tunnel",
+        "A ventilation shaft ascending into darkness"
+    ]
+}
+
+# Used when a theme has no POI pool of its own
+GENERIC_POI_DESCRIPTIONS = ("A suspicious area worth investigating", "Something hidden here", "An area of interest")
+
+# Unknown themes fall back to the forest text, as the game always has
+DEFAULT_THEME = 'forest'
+
+
+def _by_theme(text):
+    return MappingProxyType({theme: tuple(entries) for theme, entries in text.items()})
+
+
+ZONE_DESCRIPTIONS = _by_theme(_ZONE_TEXT)
+ROOM_DESCRIPTIONS_BY_THEME = _by_theme(_ROOM_TEXT)
+ROOM_DESCRIPTIONS = MappingProxyType({(theme, room): text
+                                      for theme, entries in _ROOM_TEXT.items()
+                                      for room, text in enumerate(entries, 1)})
+POI_DESCRIPTIONS = _by_theme(_POI_TEXT)
+SKILL_TREES = CHARACTER_SKILL_TREES
+del _ZONE_TEXT, _ROOM_TEXT, _POI_TEXT
+
+
+def zone_descriptions(theme):
+    """Zone intro texts for a theme"""
+    return ZONE_DESCRIPTIONS.get(theme) or ZONE_DESCRIPTIONS[DEFAULT_THEME]
+
+
+def room_description(theme, room):
+    """Description of room 1-5 in a theme (other numbers wrap around)"""
+    text = ROOM_DESCRIPTIONS.get((theme, room))
+    if text is None:
+        texts = ROOM_DESCRIPTIONS_BY_THEME.get(theme) or ROOM_DESCRIPTIONS_BY_THEME[DEFAULT_THEME]
+        text = texts[(room - 1) % len(texts)]
+    return text
+
+
+def poi_descriptions(theme):
+    """POI pool for a theme - empty for themes without one"""
+    return POI_DESCRIPTIONS.get(theme, ())
+
+
+def skill_tree(name):
+    """Personal skill tree for a student (empty mapping if they have none)"""
+    return get_character_skill_tree(name)
@@ -0,0 +1,158 @@
+"""
+GAME LOGGING
+Leveled, structured logging for the web app that never blocks a request.
+Records go onto an in-memory queue and a background listener thread does the
+actual formatting and writing, so a slow stdout/stderr can't add latency.
+
+Configured from the environment:
+    TDS_LOG_LEVEL   DEBUG / INFO / WARNING (default) / ERROR
+    TDS_LOG_FORMAT  json (default) or text
+    TDS_LOG_SAMPLE  fraction of noisy records to keep, e.g. 0.05 (default 1)
+
+Noisy records opt into sampling with extra={'sample_key': '<event>'}; every
+Nth record per key is kept. Warnings and errors are never sampled.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+
+ROOT_LOGGER = 'tds'
+
+# Attributes every LogRecord has - anything else came in through extra={}
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sample_key'}
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human readable line with extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extras = ' '.join(f"{key}={value}" for key, value in vars(record).items()
+                          if key not in _RESERVED)
+        if extras:
+            # Tracebacks are already on the end of the line, keep extras on the first line
+            first, _, rest = line.partition('\n')
+            line = f"{first} [{extras}]" + (f"\n{rest}" if rest else '')
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener's formatter"""
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, while the arguments and
+        # frames are still valid - everything else is formatted off-thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every N records per sample_key (warnings and up always pass)"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'sample_key', None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        if not self.every:
+            return False
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+def setup_logging(level=None, fmt=None, sample=None, stream=None):
+    """Attach the queue handler to the 'tds' logger (safe to call twice)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return logging.getLogger(ROOT_LOGGER)
+
+        level = (level or os.environ.get('TDS_LOG_LEVEL', 'WARNING')).upper()
+        fmt = fmt or os.environ.get('TDS_LOG_FORMAT', 'json')
+        sample = float(os.environ.get('TDS_LOG_SAMPLE', 1.0) if sample is None else sample)
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+
+        # Sample before enqueueing so dropped records cost next to nothing
+        log_queue = queue.SimpleQueue()
+        handler = _QueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(sample))
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(level)
+        for old in [h for h in logger.handlers if isinstance(h, _QueueHandler)]:
+            logger.removeHandler(old)
+        logger.addHandler(handler)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name):
+    """Child of the 'tds' logger, e.g. get_logger('app') -> 'tds.app'"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def elapsed_ms(start):
+    """Milliseconds since a time.perf_counter() start, rounded for logs"""
+    return round((time.perf_counter() - start) * 1000, 3)
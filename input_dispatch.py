@@ -0,0 +1,96 @@
+"""
+INPUT DISPATCH
+Maps each pending-input state to its handler so /api/input routes in O(1)
+instead of walking an if/elif chain. Every dispatch is timed and counted
+per state, and hooks can observe each call (metrics, logging...).
+"""
+
+import threading
+import time
+
+
+class InputDispatcher:
+    """Registry of pending_input state -> handler(game, user_input)"""
+
+    def __init__(self):
+        self.handlers = {}
+        self.fallback = None
+        self.hooks = []
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, state, lowercase=False):
+        """Decorator: handle input while game.pending_input == state
+
+        With lowercase=True the handler gets the input lowercased.
+        """
+        def decorator(func):
+            if state in self.handlers:
+                raise ValueError(f"Input state '{state}' already has a handler")
+            self.handlers[state] = (func, lowercase)
+            return func
+        return decorator
+
+    def register_fallback(self, func):
+        """Decorator: handler for states nothing is registered for"""
+        self.fallback = (func, False)
+        return func
+
+    def add_hook(self, hook):
+        """Call hook(state, elapsed_seconds, error) after every dispatch"""
+        self.hooks.append(hook)
+        return hook
+
+    def dispatch(self, game, user_input, observe=True):
+        """Route one input to the handler for the game's current state
+
+        With observe=False (journal replays) the call is neither counted in
+        the stats nor passed to the hooks.
+        """
+        state = game.pending_input
+        entry = self.handlers.get(state, self.fallback)
+        if entry is None:
+            raise LookupError(f"No input handler for state '{state}'")
+        func, lowercase = entry
+        if not observe:
+            return func(game, user_input.lower() if lowercase else user_input)
+
+        error = None
+        start = time.perf_counter()
+        try:
+            return func(game, user_input.lower() if lowercase else user_input)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._record(state, elapsed, error)
+            for hook in self.hooks:
+                try:
+                    hook(state, elapsed, error)
+                except Exception:
+                    # Observers must never break the game
+                    pass
+
+    def _record(self, state, elapsed, error):
+        with self._lock:
+            stats = self._stats.get(state)
+            if stats is None:
+                stats = self._stats[state] = {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            elapsed_ms = elapsed * 1000
+            stats['calls'] += 1
+            stats['total_ms'] += elapsed_ms
+            if elapsed_ms > stats['max_ms']:
+                stats['max_ms'] = elapsed_ms
+            if error is not None:
+                stats['errors'] += 1
+
+    def get_stats(self):
+        """Per-state call counts, errors and timings"""
+        with self._lock:
+            report = {}
+            for state, stats in self._stats.items():
+                stats = dict(stats)
+                stats['avg_ms'] = stats['total_ms'] / stats['calls']
+                report[str(state)] = stats
+            return report
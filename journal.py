@@ -0,0 +1,424 @@
+"""
+INPUT JOURNAL
+Append-only record of every accepted input, so a session can be rebuilt by
+replaying its inputs instead of snapshotting the whole game after each turn.
+
+Sessions are spread over a few shard files. Each shard holds, per session,
+a base record (the seed it started from, or a compacted snapshot) followed by
+the inputs applied since. A turn costs one small append; appends that arrive
+while another thread is fsyncing the shard ride along with the next fsync
+(group commit), so concurrent sessions share the cost of durability.
+
+Record layout (little endian):
+    body length (4) | crc32 of the rest (4) | kind (1) | seq (8) | time (8)
+    session id length (1) | session id | data
+kinds: START (data = 8 byte seed), INPUT (utf-8 text), SNAPSHOT (dumps(game))
+
+The journal knows nothing about the game - the app passes in how to start a
+session from a seed, how to replay one input and how to (de)serialize a game.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+
+
+START = 1
+INPUT = 2
+SNAPSHOT = 3
+
+_HEADER = struct.Struct('<II')
+_FIELDS = struct.Struct('<BQdB')
+_SEED = struct.Struct('<Q')
+
+
+class JournalError(ValueError):
+    """Journal is missing or inconsistent for a session"""
+
+
+def _pack(kind, seq, ts, session_id, data):
+    sid = session_id.encode('utf-8')
+    rest = _FIELDS.pack(kind, seq, ts, len(sid)) + sid + data
+    return _HEADER.pack(len(rest), zlib.crc32(rest)) + rest
+
+
+def _scan(buf, start=0):
+    """Yield (offset, end, kind, seq, ts, session_id, data) for each intact record
+
+    Stops at the first truncated or corrupt record (a torn write at the tail).
+    """
+    pos = start
+    size = len(buf)
+    while pos + _HEADER.size <= size:
+        length, crc = _HEADER.unpack_from(buf, pos)
+        body = pos + _HEADER.size
+        end = body + length
+        if length < _FIELDS.size or end > size or zlib.crc32(buf[body:end]) != crc:
+            return
+        kind, seq, ts, sid_len = _FIELDS.unpack_from(buf, body)
+        sid_start = body + _FIELDS.size
+        session_id = bytes(buf[sid_start:sid_start + sid_len]).decode('utf-8')
+        yield pos, end, kind, seq, ts, session_id, bytes(buf[sid_start + sid_len:end])
+        pos = end
+
+
+class _SessionEntry:
+    """Where a session's records start in its shard, and how far it has got"""
+    __slots__ = ('offset', 'base_seq', 'last_seq', 'last_ts')
+
+    def __init__(self, offset, base_seq, ts):
+        self.offset = offset
+        self.base_seq = base_seq
+        self.last_seq = base_seq
+        self.last_ts = ts
+
+
+class _Shard:
+    """One journal file plus its write buffer"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'ab')
+        self.pending = bytearray()
+        self.end = 0        # logical end, including pending bytes
+        self.durable = 0    # everything before this offset is fsynced
+        self.sessions = {}
+        self.appended_since_compact = 0
+        # lock guards pending/end/sessions; io_lock serializes write+fsync and compaction
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+
+
+class InputJournal:
+    """Sharded append-only input log with group fsync and replay recovery"""
+
+    def __init__(self, directory, start_session, apply_input, dumps, loads,
+                 shards=8, flush_interval=0.05, compact_inputs=200,
+                 compact_interval=300, retention=7 * 24 * 3600, clock=time.time):
+        self.directory = directory
+        self.start_session = start_session
+        self.apply_input = apply_input
+        self.dumps = dumps
+        self.loads = loads
+        self.flush_interval = flush_interval
+        self.compact_inputs = compact_inputs
+        self.compact_interval = compact_interval
+        self.retention = retention
+        self.clock = clock
+
+        self.stats = {
+            'appends': 0,
+            'fsyncs': 0,
+            'bytes_written': 0,
+            'recovered': 0,
+            'replayed_inputs': 0,
+            'compactions': 0,
+            'snapshots': 0,
+            'dropped': 0,
+            'torn_bytes': 0,
+        }
+
+        os.makedirs(directory, exist_ok=True)
+        self._shards = [self._open_shard(i) for i in range(shards)]
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def _open_shard(self, index):
+        """Index a shard file, cutting off a torn record left by a crash"""
+        path = os.path.join(self.directory, f'journal-{index:02d}.log')
+        buf = b''
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                buf = f.read()
+
+        sessions = {}
+        good_end = 0
+        records = 0
+        for offset, end, kind, seq, ts, session_id, data in _scan(buf):
+            if kind == INPUT:
+                entry = sessions.get(session_id)
+                if entry is not None:
+                    entry.last_seq = seq
+                    entry.last_ts = ts
+            else:
+                # START or SNAPSHOT - a newer base supersedes everything before it
+                sessions[session_id] = _SessionEntry(offset, seq, ts)
+            good_end = end
+            records += 1
+
+        if good_end < len(buf):
+            self.stats['torn_bytes'] += len(buf) - good_end
+            with open(path, 'r+b') as f:
+                f.truncate(good_end)
+                os.fsync(f.fileno())
+
+        shard = _Shard(path)
+        shard.sessions = sessions
+        shard.end = shard.durable = good_end
+        # Not compacted in this process yet - let the first pass look at it
+        shard.appended_since_compact = records
+        return shard
+
+    def _shard_for(self, session_id):
+        return self._shards[zlib.crc32(session_id.encode('utf-8')) % len(self._shards)]
+
+    def __contains__(self, session_id):
+        return session_id in self._shard_for(session_id).sessions
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def start(self, session_id, seed, wait=True):
+        """Record a new session and the seed it was created with"""
+        shard = self._shard_for(session_id)
+        now = self.clock()
+        record = _pack(START, 0, now, session_id, _SEED.pack(seed))
+        with shard.lock:
+            shard.sessions[session_id] = _SessionEntry(shard.end, 0, now)
+            target = self._buffer(shard, record)
+        if wait:
+            self._flush_shard(shard, target)
+        return 0
+
+    def append(self, session_id, user_input, wait=True):
+        """Record one accepted input and return its sequence number
+
+        With wait=True this returns once the record is fsynced - concurrent
+        callers on the same shard share a single fsync.
+        """
+        shard = self._shard_for(session_id)
+        now = self.clock()
+        with shard.lock:
+            entry = shard.sessions.get(session_id)
+            if entry is None:
+                raise JournalError(f"Session {session_id} was never started in the journal")
+            seq = entry.last_seq + 1
+            entry.last_seq = seq
+            entry.last_ts = now
+            target = self._buffer(shard, _pack(INPUT, seq, now, session_id, user_input.encode('utf-8')))
+        if wait:
+            self._flush_shard(shard, target)
+        return seq
+
+    def _buffer(self, shard, record):
+        # Caller holds shard.lock
+        shard.pending += record
+        shard.end += len(record)
+        shard.appended_since_compact += 1
+        self.stats['appends'] += 1
+        return shard.end
+
+    def _flush_shard(self, shard, target=None):
+        """Write and fsync the shard's buffer (at least up to target)"""
+        with shard.io_lock:
+            if target is not None and shard.durable >= target:
+                # Someone else's fsync already covered our record
+                return
+            with shard.lock:
+                data = shard.pending
+                shard.pending = bytearray()
+                end = shard.end
+            if data:
+                shard.file.write(data)
+                shard.file.flush()
+                os.fsync(shard.file.fileno())
+                self.stats['fsyncs'] += 1
+                self.stats['bytes_written'] += len(data)
+            shard.durable = end
+
+    def flush(self):
+        """Make everything appended so far durable"""
+        for shard in self._shards:
+            self._flush_shard(shard)
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _read_session(self, shard, session_id):
+        """Base record plus later inputs for a session, read from disk"""
+        self._flush_shard(shard)
+        with shard.io_lock:
+            with shard.lock:
+                entry = shard.sessions.get(session_id)
+                if entry is None:
+                    return None
+                offset = entry.offset
+            with open(shard.path, 'rb') as f:
+                f.seek(offset)
+                buf = f.read()
+
+        base = None
+        inputs = []
+        for _, _, kind, seq, _, record_sid, data in _scan(buf):
+            if record_sid != session_id:
+                continue
+            if base is None:
+                if kind == INPUT:
+                    raise JournalError(f"Session {session_id} has no base record")
+                base = (kind, seq, data)
+            elif kind == INPUT and seq > base[1]:
+                inputs.append((seq, data.decode('utf-8')))
+        return base, inputs
+
+    def _rebuild(self, session_id, base, inputs):
+        kind, seq, data = base
+        if kind == START:
+            game = self.start_session(session_id, _SEED.unpack(data)[0])
+        else:
+            game = self.loads(data)
+        for expected, (input_seq, user_input) in enumerate(inputs, seq + 1):
+            if input_seq != expected:
+                raise JournalError(f"Session {session_id} is missing input {expected}")
+            self.apply_input(game, user_input)
+        self.stats['replayed_inputs'] += len(inputs)
+        return game
+
+    def recover(self, session_id):
+        """Rebuild a session by replaying its journal, or None if it isn't journaled"""
+        record = self._read_session(self._shard_for(session_id), session_id)
+        if record is None:
+            return None
+        game = self._rebuild(session_id, *record)
+        self.stats['recovered'] += 1
+        return game
+
+    def session_ids(self):
+        """Every session the journal can recover"""
+        ids = []
+        for shard in self._shards:
+            with shard.lock:
+                ids.extend(shard.sessions)
+        return ids
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def compact_shard(self, shard):
+        """Fold long input runs into snapshots and drop expired sessions
+
+        Replaying sessions into snapshots is the slow part and happens without
+        blocking appends. Only the final rewrite of the file holds the shard.
+        """
+        cutoff = self.clock() - self.retention if self.retention else None
+        with shard.lock:
+            candidates = [sid for sid, entry in shard.sessions.items()
+                          if entry.last_seq - entry.base_seq >= self.compact_inputs]
+
+        snapshots = {}
+        for session_id in candidates:
+            record = self._read_session(shard, session_id)
+            if record is None:
+                continue
+            base, inputs = record
+            game = self._rebuild(session_id, base, inputs)
+            last_seq = inputs[-1][0] if inputs else base[1]
+            snapshots[session_id] = (last_seq, self.dumps(game))
+
+        with shard.io_lock:
+            with shard.lock:
+                # Everything buffered goes to the old file first so the rewrite sees it
+                data = shard.pending
+                shard.pending = bytearray()
+                if data:
+                    shard.file.write(data)
+                    shard.file.flush()
+                shard.file.close()
+                with open(shard.path, 'rb') as f:
+                    buf = f.read()
+
+                records = {}
+                for offset, end, kind, seq, ts, session_id, body in _scan(buf):
+                    entry = shard.sessions.get(session_id)
+                    if entry is None or offset < entry.offset:
+                        continue
+                    records.setdefault(session_id, []).append((kind, seq, ts, buf[offset:end]))
+
+                out = bytearray()
+                now = self.clock()
+                for session_id, session_records in records.items():
+                    entry = shard.sessions[session_id]
+                    if cutoff is not None and entry.last_ts < cutoff:
+                        del shard.sessions[session_id]
+                        self.stats['dropped'] += 1
+                        continue
+                    entry.offset = len(out)
+                    snapshot = snapshots.get(session_id)
+                    if snapshot is not None:
+                        entry.base_seq = snapshot[0]
+                        out += _pack(SNAPSHOT, snapshot[0], now, session_id, snapshot[1])
+                        self.stats['snapshots'] += 1
+                    for kind, seq, ts, raw in session_records:
+                        if snapshot is None or (kind == INPUT and seq > snapshot[0]):
+                            out += raw
+
+                tmp_path = shard.path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(out)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, shard.path)
+                shard.file = open(shard.path, 'ab')
+                shard.end = shard.durable = len(out)
+                shard.appended_since_compact = 0
+        self.stats['compactions'] += 1
+
+    def compact(self):
+        """Compact every shard that has been written to since its last compaction"""
+        for shard in self._shards:
+            if shard.appended_since_compact:
+                self.compact_shard(shard)
+
+    # ------------------------------------------------------------------
+    # Background threads
+    # ------------------------------------------------------------------
+
+    def start_background(self):
+        """Start the flusher (for wait=False appends) and compactor threads"""
+        if self._threads:
+            return
+        self._stop_event.clear()
+        for name, interval, task in (('journal-flusher', self.flush_interval, self.flush),
+                                     ('journal-compactor', self.compact_interval, self.compact)):
+            if not interval:
+                continue
+            thread = threading.Thread(target=self._loop, args=(interval, task), name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _loop(self, interval, task):
+        while not self._stop_event.wait(interval):
+            try:
+                task()
+            except Exception:
+                # Keep going - the next pass retries
+                pass
+
+    def close(self):
+        """Stop background threads and flush everything to disk"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self.flush()
+        for shard in self._shards:
+            shard.file.close()
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['shards'] = len(self._shards)
+        stats['sessions'] = sum(len(shard.sessions) for shard in self._shards)
+        stats['bytes'] = sum(shard.end for shard in self._shards)
+        return stats
@@ -0,0 +1,348 @@
+"""
+LOAD TEST
+Synthetic players hammering /api/start and /api/input, either over HTTP
+against a running server or in-process through the Flask test client.
+Players use the simulator's scripted policies (simulate.py) on the state
+the API returns: they explore, search, fight, spend skill points and take
+on bosses, starting a new game whenever one ends.
+
+Players are spread over a fixed number of client threads, so the session
+count (--players) and the requests in flight (--threads) vary separately.
+With --ramp the players join gradually and the timeline shows where
+throughput, latency or server memory stop keeping up.
+
+Run with: python load_test.py --players 200 --threads 8 --duration 60
+          python load_test.py --url http://localhost:5000 --players 2000 --ramp 120
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from simulate import POLICIES, StateView
+
+
+RSS_METRIC = 'tds_process_resident_memory_bytes'
+
+
+# ----------------------------------------------------------------------
+# Transports - post(path, payload) -> (status, json), get_text(path)
+# ----------------------------------------------------------------------
+
+class HttpTransport:
+    """JSON over keep-alive HTTP connections, one per client thread"""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            conn = self._connection()
+            conn.request(method, self.prefix + path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the connection so the next request reconnects
+            self._local.conn = None
+            raise
+
+    def post(self, path, payload):
+        status, body = self._request('POST', path, json.dumps(payload))
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, None
+
+    def get_text(self, path):
+        return self._request('GET', path)[1].decode('utf-8', 'replace')
+
+
+class InProcessTransport:
+    """The Flask app in this process, through one test client per thread"""
+
+    def __init__(self):
+        from app_full import app
+        self.app = app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def post(self, path, payload):
+        response = self._client().post(path, json=payload)
+        return response.status_code, response.get_json(silent=True)
+
+    def get_text(self, path):
+        return self._client().get(path).get_data(as_text=True)
+
+
+def scrape_rss(transport):
+    """Server resident memory from /metrics, or None"""
+    try:
+        text = transport.get_text('/metrics')
+    except (OSError, http.client.HTTPException):
+        return None
+    for line in text.splitlines():
+        if line.startswith(RSS_METRIC + ' ') or line.startswith(RSS_METRIC + '{'):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+# ----------------------------------------------------------------------
+# Players
+# ----------------------------------------------------------------------
+
+class Player:
+    """One synthetic player: a session, its merged state and a policy"""
+
+    def __init__(self, index, policy, seed):
+        self.index = index
+        self.rng = random.Random(seed * 7919 + index)
+        self.policy_name = policy
+        self.policy = POLICIES[policy]()
+        self.session_id = None
+        self.state = None
+        self.next_due = 0.0
+        self.games = 0
+
+    def start(self, transport, record):
+        start = time.perf_counter()
+        status, data = transport.post('/api/start', {})
+        ok = status == 200 and data is not None and 'session_id' in data
+        record('start', time.perf_counter() - start, ok)
+        if ok:
+            self.session_id = data['session_id']
+            self.state = data['state']
+            self.policy = POLICIES[self.policy_name]()
+            self.games += 1
+
+    def step(self, transport, record):
+        """Send one input (starting a game first if needed)"""
+        if self.state is None or self.state.get('game_state') in ('victory', 'game_over'):
+            self.start(transport, record)
+            return
+
+        view = StateView.from_state(self.state)
+        payload = {'session_id': self.session_id, 'input': self.policy(view, self.rng),
+                   'ack': self.state.get('version'), 'epoch': self.state.get('epoch')}
+        start = time.perf_counter()
+        status, data = transport.post('/api/input', payload)
+        elapsed = time.perf_counter() - start
+
+        state = data.get('state') if status == 200 and data else None
+        record(str(view.pending_input), elapsed, state is not None,
+               state is not None and any(m['text'].startswith('Error:') for m in state.get('messages', ())))
+        if state is None:
+            # Lost session (evicted, server restarted) - begin again
+            self.state = None
+        elif state.get('delta'):
+            self.state = dict(self.state, **state)
+        else:
+            self.state = state
+
+
+class Recorder:
+    """Per-thread samples: (finish time, state, latency, ok, game error)"""
+
+    def __init__(self, started):
+        self.started = started
+        self.samples = []
+
+    def __call__(self, state, latency, ok, game_error=False):
+        self.samples.append((time.perf_counter() - self.started, state, latency, ok, game_error))
+
+
+# ----------------------------------------------------------------------
+# Running
+# ----------------------------------------------------------------------
+
+def run_load(transport, players=50, threads=4, duration=30.0, ramp=0.0, think=0.0,
+             policy='greedy', seed=0, sample_interval=1.0):
+    """Drive the players for duration seconds - returns (samples, rss timeline, seconds)"""
+    roster = [Player(i, policy, seed) for i in range(players)]
+    started = time.perf_counter()
+    stop = threading.Event()
+    recorders = [Recorder(started) for _ in range(threads)]
+
+    def active_count(now):
+        if ramp <= 0:
+            return players
+        return min(players, int(players * (now - started) / ramp) + 1)
+
+    def work(index):
+        mine = roster[index::threads]
+        record = recorders[index]
+        while not stop.is_set():
+            now = time.perf_counter()
+            limit = active_count(now)
+            did_work = False
+            for player in mine:
+                if stop.is_set():
+                    break
+                if player.index >= limit or player.next_due > now:
+                    continue
+                try:
+                    player.step(transport, record)
+                except (OSError, http.client.HTTPException):
+                    record('transport', 0.0, False)
+                    player.state = None
+                player.next_due = time.perf_counter() + think
+                did_work = True
+            if not did_work:
+                time.sleep(0.005)
+
+    rss = []
+
+    def sample():
+        while True:
+            now = time.perf_counter() - started
+            rss.append((now, active_count(time.perf_counter()), scrape_rss(transport)))
+            if stop.wait(sample_interval):
+                return
+
+    workers = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(threads)]
+    sampler = threading.Thread(target=sample, daemon=True)
+    for thread in workers:
+        thread.start()
+    sampler.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    sampler.join()
+
+    samples = [s for recorder in recorders for s in recorder.samples]
+    return samples, rss, time.perf_counter() - started
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000 if latencies else None,
+        'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+        'max_ms': latencies[-1] * 1000 if latencies else None,
+    }
+
+
+def summarize(samples, rss, elapsed, interval=1.0):
+    """Throughput, per-state latency percentiles, errors and the timeline"""
+    by_state = defaultdict(list)
+    errors = game_errors = 0
+    for _, state, latency, ok, game_error in samples:
+        if ok:
+            by_state[state].append(latency)
+        else:
+            errors += 1
+        game_errors += game_error
+    requests = len(samples)
+
+    # Timeline buckets: throughput and p95 per interval next to active players and RSS
+    buckets = defaultdict(list)
+    for finished, _, latency, ok, _ in samples:
+        buckets[int(finished // interval)].append(latency)
+    timeline = []
+    for when, active, rss_bytes in rss:
+        latencies = sorted(buckets.get(int(when // interval) - 1, ()))
+        timeline.append({
+            'second': round(when, 1),
+            'players': active,
+            'rps': len(latencies) / interval,
+            'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+            'rss_mb': rss_bytes / (1024 * 1024) if rss_bytes else None,
+        })
+
+    return {
+        'requests': requests,
+        'seconds': elapsed,
+        'throughput_rps': requests / elapsed if elapsed else 0.0,
+        'error_rate': errors / requests if requests else 0.0,
+        'errors': errors,
+        'game_errors': game_errors,
+        'overall': latency_summary([s[2] for s in samples if s[3]]),
+        'states': {state: latency_summary(values) for state, values in sorted(by_state.items())},
+        'timeline': timeline,
+    }
+
+
+def _ms(value):
+    return f"{value:8.2f}" if value is not None else '       -'
+
+
+def print_report(report):
+    print(f"Requests:    {report['requests']} in {report['seconds']:.1f}s "
+          f"({report['throughput_rps']:.0f} req/s)")
+    print(f"Errors:      {report['errors']} ({report['error_rate'] * 100:.2f}%), "
+          f"{report['game_errors']} handler errors")
+    print()
+    print(f"{'state':22} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(report['states'].items()) + [('ALL', report['overall'])]
+    for state, s in rows:
+        print(f"{state:22} {s['count']:8} {_ms(s['p50_ms'])} {_ms(s['p95_ms'])} "
+              f"{_ms(s['p99_ms'])} {_ms(s['max_ms'])}")
+    print()
+    print(f"{'second':>7} {'players':>8} {'req/s':>8} {'p95 ms':>8} {'RSS MB':>8}")
+    for point in report['timeline']:
+        rss = f"{point['rss_mb']:8.1f}" if point['rss_mb'] is not None else '       -'
+        print(f"{point['second']:7.1f} {point['players']:8} {point['rps']:8.0f} {_ms(point['p95_ms'])} {rss}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Synthetic-player load test for the game API')
+    parser.add_argument('--url', help='server to test, e.g. http://localhost:5000 (default: in-process)')
+    parser.add_argument('--players', type=int, default=50, help='concurrent sessions')
+    parser.add_argument('--threads', type=int, default=4, help='client threads (requests in flight)')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run')
+    parser.add_argument('--ramp', type=float, default=0.0, help='seconds over which players join')
+    parser.add_argument('--think', type=float, default=0.0, help='seconds each player waits between inputs')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--interval', type=float, default=1.0, help='timeline / RSS sampling interval')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    transport = HttpTransport(args.url) if args.url else InProcessTransport()
+    samples, rss, elapsed = run_load(transport, args.players, args.threads, args.duration, args.ramp,
+                                     args.think, args.policy, args.seed, args.interval)
+    report = summarize(samples, rss, elapsed, args.interval)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
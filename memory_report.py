@@ -0,0 +1,151 @@
+"""
+MEMORY REPORT
+Where a session's bytes go. session_breakdown() walks a FullWebGame with the
+session store's deep_sizeof() and splits the total by what owns it; every
+object is billed once, to the first category that reaches it. Shared
+character templates (dialogue, abilities, skill trees) are reported
+separately because no single session pays for them. traced_session_bytes()
+cross-checks the estimate with tracemalloc on real copies of the session.
+
+Used by the admin endpoint (GET /api/admin/memory, see app_full.py) and by
+the engine benchmark suite to catch per-session growth.
+
+Run with: python memory_report.py --steps 0 300 3000
+"""
+
+import argparse
+import json
+import sys
+import tracemalloc
+
+from session_store import deep_sizeof
+
+
+# (category, attributes of FullWebGame it owns) - order matters, first reach wins
+CATEGORIES = (
+    ('characters', ('characters', 'characters_by_name', 'team_up_ready', 'party', 'selected_character')),
+    ('messages', ('messages',)),
+    ('zone_map', ('zone_map', 'zone_themes')),
+    ('zone_bosses', ('zone_bosses',)),
+    ('rooms', ('visited_rooms', 'cleared_rooms', 'rested_in_rooms', 'searched_rooms')),
+    ('shared_inventory', ('shared_inventory',)),
+    ('combat', ('current_enemy', 'combat_state', 'current_team_ups')),
+    ('options', ('current_options', 'current_poi_list', 'section_marks')),
+    ('skills', ('global_tree',)),
+)
+
+
+def session_breakdown(game):
+    """{category: bytes} for one session, plus 'other' and 'total'"""
+    seen = set()
+    breakdown = {}
+    for category, attributes in CATEGORIES:
+        breakdown[category] = sum(deep_sizeof(getattr(game, name), seen)
+                                  for name in attributes if hasattr(game, name))
+    # Whatever is left: the game object itself, scalars, rng, ...
+    breakdown['other'] = deep_sizeof(game, seen)
+    breakdown['total'] = sum(breakdown.values())
+    return breakdown
+
+
+def character_breakdown(game):
+    """{name: bytes} of per-session state for each student"""
+    return {char.name: deep_sizeof(char) for char in game.characters}
+
+
+def shared_breakdown(game):
+    """Bytes held once per process by the character templates this session uses"""
+    templates = [char.template for char in game.characters]
+    seen = set()
+    dialogue = sum(deep_sizeof(t.dialogue, seen) + deep_sizeof(t.aizawa_dialogue, seen) for t in templates)
+    rest = 0
+    for template in templates:
+        for slot in type(template).__slots__:
+            rest += deep_sizeof(getattr(template, slot, None), seen)
+    return {'dialogue': dialogue, 'other_template_data': rest, 'total': dialogue + rest}
+
+
+def aggregate(breakdowns):
+    """Mean, min and max per category over several session breakdowns"""
+    if not breakdowns:
+        return {}
+    summary = {}
+    for category in breakdowns[0]:
+        values = [b[category] for b in breakdowns]
+        summary[category] = {'mean': sum(values) / len(values), 'min': min(values), 'max': max(values)}
+    return summary
+
+
+def traced_session_bytes(game, copies=20):
+    """Average bytes tracemalloc sees allocated per restored copy of game"""
+    from app_full import FullWebGame
+    state = game.to_state()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        sessions = [FullWebGame.from_state(state) for _ in range(copies)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    del sessions
+    return (after - before) / copies
+
+
+def played_session(seed=0, steps=300, policy='greedy'):
+    """A seeded session after steps simulator inputs (fewer if the run ends)"""
+    import random
+    from app_full import FullWebGame, process_input
+    from simulate import POLICIES, StateView
+
+    rng = random.Random(seed * 7919 + 1)
+    player = POLICIES[policy]()
+    game = FullWebGame(f'memory-{seed}', seed=seed)
+    game.start_game()
+    for _ in range(steps):
+        if game.game_state in ('victory', 'game_over'):
+            break
+        process_input(game, player(StateView.from_game(game), rng))
+    return game
+
+
+def print_report(label, game):
+    breakdown = session_breakdown(game)
+    total = breakdown['total']
+    print(f"{label} (zone {game.current_zone}, state '{game.game_state}'):")
+    for category, size in breakdown.items():
+        if category != 'total':
+            print(f"  {category:18} {size:9,} bytes  {size / total * 100:5.1f}%")
+    print(f"  {'total':18} {total:9,} bytes")
+    print(f"  {'tracemalloc':18} {traced_session_bytes(game):9,.0f} bytes per restored copy")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-session memory breakdown')
+    parser.add_argument('--steps', type=int, nargs='+', default=[0, 300, 3000],
+                        help='simulator inputs played before measuring (one report each)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print the breakdowns as JSON')
+    args = parser.parse_args(argv)
+
+    games = [(f'after {steps} inputs', played_session(args.seed, steps)) for steps in args.steps]
+    if args.json:
+        print(json.dumps({label: {'breakdown': session_breakdown(game),
+                                  'traced_bytes': traced_session_bytes(game),
+                                  'characters': character_breakdown(game)}
+                          for label, game in games}, indent=2))
+        return 0
+
+    for label, game in games:
+        print_report(label, game)
+    shared = shared_breakdown(games[0][1])
+    print(f"Shared by all sessions: {shared['total']:,} bytes of templates "
+          f"({shared['dialogue']:,} of them dialogue)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
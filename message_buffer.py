@@ -0,0 +1,125 @@
+"""
+MESSAGE BUFFER
+The lines a turn prints, kept compactly until the response is built. Each
+line is its text plus a small integer type code (an index into MSG_TYPES),
+stored in two parallel lists - no per-line dict. Single-line texts are
+stored as the very string passed in, so literal lines (the intro, menu
+headers, flavour lines) are one shared object in every session; multi-line
+texts are split once and their line strings reused.
+
+to_list() turns the buffer into the [{'text', 'type'}] list the client
+expects, in one pass at response time. For a client holding the message
+catalog (message_catalog.py) it writes catalog references instead.
+"""
+
+from functools import lru_cache
+
+from message_catalog import LINE_IDS, MSG_TYPES, render
+
+
+# Type codes - the position in MSG_TYPES (message_catalog.py) is what a buffer stores
+MSG_NORMAL, MSG_SUCCESS, MSG_WARNING, MSG_HIGHLIGHT, MSG_TITLE, MSG_SUBTITLE, MSG_SEPARATOR = range(len(MSG_TYPES))
+MSG_CODES = {name: code for code, name in enumerate(MSG_TYPES)}
+# add_msg(..., 'separator') draws a CSS border, its text is never shown
+MSG_CODES['separator'] = MSG_SEPARATOR
+
+
+@lru_cache(maxsize=4096)
+def split_lines(text):
+    """The non-blank lines of a multi-line text, shared by every buffer that adds it"""
+    return tuple(line for line in text.split('\n') if line.strip())
+
+
+class MessageBuffer:
+    """One turn's messages as parallel (text, type code) lists
+
+    Lines added from a catalog template also get an entry in templates
+    (line index -> (template id, params)); texts always has the full text.
+    """
+    __slots__ = ('texts', 'codes', 'templates')
+
+    def __init__(self):
+        self.texts = []
+        self.codes = []
+        self.templates = {}
+
+    def add(self, text, msg_type='normal'):
+        """Append text (split into lines) - raises KeyError for an unknown type"""
+        code = MSG_CODES[msg_type]
+        if code == MSG_SEPARATOR:
+            self.texts.append('')
+            self.codes.append(code)
+            return
+        if not text:
+            return
+        if type(text) is not str:
+            text = str(text)
+        if '\n' not in text:
+            # Literal lines are already shared constants - store the same object
+            if text.strip():
+                self.texts.append(text)
+                self.codes.append(code)
+            return
+        lines = split_lines(text)
+        self.texts.extend(lines)
+        self.codes.extend([code] * len(lines))
+
+    def add_template(self, template_id, msg_type='normal', params=None):
+        """Append one catalog template line - param values are sent as strings"""
+        params = {name: str(value) for name, value in (params or {}).items()}
+        self.templates[len(self.texts)] = (template_id, params)
+        self.texts.append(render(template_id, params))
+        self.codes.append(MSG_CODES[msg_type])
+
+    def clear(self):
+        self.texts.clear()
+        self.codes.clear()
+        self.templates.clear()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        """(text, type name) pairs"""
+        for text, code in zip(self.texts, self.codes):
+            yield text, MSG_TYPES[code]
+
+    def to_list(self, compact=False):
+        """[{'text', 'type'}] for responses and saved state
+
+        With compact (the client has the current catalog) catalog lines are
+        sent as their index - [index, type code] unless the type is normal -
+        and template lines as {'t': id, 'p': params, 'y': type code}. 'y' and
+        'type' are left out when the type is normal.
+        """
+        types = MSG_TYPES
+        if not compact:
+            return [{'text': text, 'type': types[code]} for text, code in zip(self.texts, self.codes)]
+
+        messages = []
+        templates = self.templates
+        for index, (text, code) in enumerate(zip(self.texts, self.codes)):
+            template = templates.get(index) if templates else None
+            if template is not None:
+                message = {'t': template[0], 'p': template[1]}
+                if code:
+                    message['y'] = code
+                messages.append(message)
+                continue
+            line = LINE_IDS.get(text)
+            if line is None:
+                messages.append({'text': text, 'type': types[code]} if code else {'text': text})
+            elif code:
+                messages.append([line, code])
+            else:
+                messages.append(line)
+        return messages
+
+    @classmethod
+    def from_list(cls, messages):
+        """Rebuild from to_list() output"""
+        buffer = cls()
+        for message in messages:
+            buffer.texts.append(message['text'])
+            buffer.codes.append(MSG_CODES[message['type']])
+        return buffer
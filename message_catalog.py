@@ -0,0 +1,352 @@
+"""
+MESSAGE CATALOG
+Fixed game text the browser caches once instead of receiving on every turn.
+The catalog has two parts:
+
+    lines       fixed lines the web game prints (add_msg literals, zone and
+                room descriptions), declared below and addressed by index
+    templates   lines with blanks, {name} filled from per-message params
+                (FullWebGame.add_template)
+    types       message types by the codes compact messages use
+
+VERSION is a hash of the content, so any change to the text gives a new
+version. Clients fetch GET /api/catalog once, keep it (localStorage) and send
+its version with their requests; states for a client with the current
+version carry line indexes and template ids instead of the text (see
+MessageBuffer.to_list). Any other client gets plain text as before, as does
+any line that isn't in the catalog.
+
+Lines are only ever appended, so editing or adding game text never moves an
+existing index. To find text worth adding:
+
+Run with: python message_catalog.py    (prints lines missing from LINES)
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+
+from content_registry import ROOM_DESCRIPTIONS, ZONE_DESCRIPTIONS
+
+
+# Message types - compact messages carry the index
+MSG_TYPES = ('normal', 'success', 'warning', 'highlight', 'title', 'subtitle', 'separator_line')
+
+# Lines with blanks - keep each to a single line, params are plain {name}
+TEMPLATES = {
+    'zone.header': "ZONE {zone}/20 - {theme}",
+    'zone.environment': "Environmental Type: {theme}",
+    'boss.status': "Boss Status: {name} - HP: {hp}/{max_hp} ({pct}%)",
+    'poi.investigate': "You investigate point of interest #{n}...",
+}
+
+# Where missing_lines() looks for literal add_msg() lines
+SOURCES = ('app_full.py',)
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def render(template_id, params):
+    """Template text with its blanks filled - the same rule game_full.js uses"""
+    return _PLACEHOLDER.sub(lambda m: params.get(m.group(1), m.group(0)), TEMPLATES[template_id])
+
+
+# Every catalog line, addressed by its position. APPEND ONLY - a line's index
+# is what cached catalogs and compact messages refer to, so never reorder or
+# remove entries. `python message_catalog.py` lists game text worth adding.
+LINES = (
+    '',
+    '   No personal skills purchased yet',
+    '   Total Personal Bonuses:',
+    '(Like Tokyo DisneySea!?)',
+    '- REST - Restore 15 Energy (once per room)',
+    '- SEARCH - Look for Points of Interest',
+    '- SKILLS - View/upgrade skills',
+    '- ⚡ PLUS ULTRA ⚡ - Full HP & Energy recovery (once per zone)',
+    '0. Back',
+    '0. Back to Skill Tree',
+    '0. Back to combat menu',
+    "0. Don't investigate (continue navigation)",
+    '0. Exit Debug Menu',
+    '0. Stop investigating (continue navigation)',
+    '1. Attack - Basic attack',
+    '1. Enter Boss Room',
+    '1. Forest',
+    '1. Global Class Skills (Permanent - benefits ALL students)',
+    '1. Rescue them (no cost)',
+    '1. Return to Title Screen',
+    '1. Take the passage (skip to next zone)',
+    '1. Take the supplies',
+    '2. Flashfire',
+    '2. Go to Specific Floor (1-100)',
+    '2. Ignore (keep moving)',
+    '2. Ignore it (continue normally)',
+    '2. Leave them (move on)',
+    '2. Personal Quirk Skills (Lost if captured)',
+    '2. Quirk - Use quirk ability',
+    '2. Retreat to previous area',
+    '3. Item - Use item from inventory',
+    '3. Unlock All Skills',
+    '3. Urban',
+    '3. View Current Bonuses',
+    '4. Back',
+    '4. Lake',
+    '4. Max All Stat Bonuses',
+    '4. Skills - View/upgrade skills',
+    '5. Mountain',
+    '5. Unlock Shinso',
+    '6. Blizzard',
+    '6. Trigger Game Over Screen',
+    '7. Trigger Victory Screen',
+    '7. Underground',
+    '8. Enter New Zone (Choose Type)',
+    '9. Level All Characters to 10 (Team-Up Testing)',
+    "A MHA fangame by: <span class='author-name'>TsuMePlz</span>",
+    'A harsh mountain environment where elevation changes, loose gravel, and stone outcroppings create a treacherous battlefield requiring both strength and agility.',
+    'A primeval woodland stretches in all directions, where twisted roots and hanging vines create natural obstacles. Shafts of green-filtered light pierce through the dense canopy above.',
+    'ALL FOR ONE',
+    'All For One falls to his knees, defeated at last.',
+    'All For One stands before you, radiating malevolent power.',
+    'All students will benefit from this upgrade!',
+    'An extreme cold environment where sub-zero temperatures, ice formations, and simulated wind chill test your endurance against the harshest winter conditions.',
+    'CAPTURED',
+    'COMBAT OPTIONS:',
+    'CURRENT GLOBAL SKILL BONUSES:',
+    'Can be used once per zone, in or out of combat.',
+    "Can't go that way!",
+    'Choose zone type:',
+    'Claustrophobic tunnels and cave systems wind through compressed earth and stone. The air is stale, support structures creak ominously, and darkness presses in from all sides.',
+    'Concrete and steel dominate this metropolitan landscape where everyday city elements have been transformed into tactical obstacles and hiding spots.',
+    'Contents:',
+    'Continue investigating other points of interest?',
+    'Dense foliage surrounds you as ancient trees form a natural canopy overhead. The air is thick with the scent of moss and earth, and wildlife sounds echo through the undergrowth.',
+    'EXERCISE COMPLETE!',
+    'Enter floor number (1-100):',
+    'Entering zone...',
+    'Extreme heat radiates from every surface as flames dance along the walls in controlled patterns. The air shimmers with thermal distortion, and the temperature is almost unbearable.',
+    'FINAL FLOOR',
+    'Floor must be 1-100!',
+    'Frigid temperatures and ice-covered surfaces dominate this frozen zone. Your breath forms clouds in the air, and frost creeps across every surface with supernatural speed.',
+    'GAME OVER',
+    'GAME OVER - ALL STUDENTS CAPTURED',
+    'GLOBAL CLASS SKILLS (Benefit ALL students)',
+    'HP and Energy restored from the safe travel!',
+    'Hitoshi Shinso emerges from the shadows!',
+    'Invalid action!',
+    'Invalid choice!',
+    'Invalid floor number!',
+    'Invalid input!',
+    'Invalid input! Please enter a number.',
+    'Invalid selection! Please choose a valid number.',
+    'Moving to next zone...',
+    'NAVIGATION OPTIONS:',
+    'NO STUDENTS AVAILABLE',
+    'No items in inventory!',
+    'No more points of interest to investigate.',
+    'No skill points available!',
+    'No students remaining...',
+    'No team-up attacks available!',
+    'Not available!',
+    'Not enough energy for team-up attack!',
+    'Not enough energy!',
+    'OBJECTIVE: Descend through all 20 zones!',
+    'PLUS ULTRA is now available - Full HP & Energy recovery!',
+    'Plus Ultra not available!',
+    'Press Enter to continue...',
+    'Remaining points of interest:',
+    'Rescuing them will earn you major recognition as a hero.',
+    'Restored 20 Energy!',
+    'Restored 30 HP and 20 Energy!',
+    'Retreated to safer area.',
+    'Rough stone and jagged rock formations define this high-altitude simulation. The uneven terrain and rocky obstacles demand careful footing and strategic positioning.',
+    'SELECT QUIRK ABILITY:',
+    'SELECT STUDENT FOR DEPLOYMENT',
+    'SHARED INVENTORY:',
+    'Thank you for playing!',
+    'The area contains a series of connected pools at different depths, like natural tidal pools. Smooth stones and shells litter the shallow areas, while deeper sections are murky and dark.',
+    'The area is a natural cave system with multiple passages branching off in different directions. Water drips constantly from the ceiling, forming small pools on the uneven stone floor.',
+    'The area is set up like a small plaza with a dry fountain at its center. Cafe tables and chairs are scattered about, and shuttered shop windows line the walls.',
+    'The area resembles a city parking structure where vehicles have become explosive hazards. Flames leap from car to car, and concrete pillars glow red from the heat.',
+    'The area resembles a frozen tundra with snow-covered ground and ice pillars rising from the floor. A bitter wind cuts through the space, and everything is coated in a layer of frost.',
+    'The area resembles a narrow mountain pass with towering rock walls on either side. Large boulders are strewn about as if from an ancient avalanche.',
+    'The forest opens into a sun-drenched glade where wildflowers blanket the ground. A ring of ancient standing stones marks the center, their purpose long forgotten.',
+    'The passage leads you safely to the next zone!',
+    'The room appears clear for now.',
+    'The room features a large pool of water in its center, with floating platforms and partially submerged ruins visible beneath the surface. The air is cool and damp.',
+    'The room is a winter wasteland with howling wind effects and artificial snow swirling through the air. Frozen sculptures of ice create obstacles, and the floor is treacherously slick.',
+    'The room is carved from rough stone, with jagged outcroppings creating natural pillars throughout. Loose rocks and gravel cover the uneven floor, making footing treacherous.',
+    'The room opens into a clearing dominated by a massive fallen oak, its hollow trunk large enough to serve as cover. Thick underbrush lines the perimeter, rustling with unseen movement.',
+    'The room opens into a vast underground cavern with a ceiling lost in darkness above. Phosphorescent fungi provide eerie green light, casting strange shadows across ancient rock formations.',
+    'The room resembles a city street corner with storefronts, a bus stop bench, and a non-functional traffic light. Debris and abandoned vehicles provide cover throughout the space.',
+    'The room simulates a burning office building interior - desks and office equipment engulfed in flames, ceiling tiles raining down, emergency sprinklers long since failed.',
+    'The simulation recreates a dense city environment with abandoned streets, damaged buildings, and urban debris. The atmosphere of a disaster zone permeates every corner.',
+    'The zone boss awaits in this room.',
+    'This aquatic environment challenges your ability to navigate partially flooded spaces where water levels vary and platforms shift beneath your feet.',
+    'This room features multiple levels connected by rough stone ledges and natural ramps. Small crevices and caves dot the walls, providing potential hiding spots.',
+    'This room houses what appears to be an underwater viewing area, with one wall of reinforced glass showing a darkened aquarium beyond. Puddles cover the floor from previous leaks.',
+    'This room recreates a subway platform complete with tracks, a stationary train car, and tiled walls covered in faded advertisements and graffiti.',
+    'This shortcut will allow you to skip the rest of this zone.',
+    'This skill is already at maximum level!',
+    'This subterranean zone simulates the dangers of underground rescue operations - from mine collapses to cave systems where every shadow could hide danger.',
+    'This zone simulates a catastrophic fire scenario where intense heat and periodic flame bursts test your ability to withstand extreme temperatures. Every breath feels like inhaling fire.',
+    'Tower Descent Simulation',
+    'Twisted vines hang from the ceiling like natural curtains, creating a maze-like environment. The air is thick with the scent of earth and decay, and mushrooms cluster on every surface.',
+    'Waiting for input...',
+    'Water is the dominant feature here - from shallow pools to deeper channels. The air is heavy with moisture, and the sound of dripping water echoes constantly.',
+    'Which point of interest do you want to investigate?',
+    'Without stolen quirks, he seems almost... ordinary.',
+    "Yaoyorozu's creation knowledge reveals a hidden cache!",
+    'You carefully search the room and notice several points of interest:',
+    'You decide not to investigate further.',
+    'You decide to continue through this zone normally.',
+    'You descend into a cramped tunnel system with rough-hewn walls pressing in from all sides. Support beams creak ominously overhead, and the air is thick with the smell of earth and stone.',
+    'You discover someone unexpected in the facility...',
+    'You enter a cavern-like space where stalactites hang from the ceiling and stalagmites rise from the floor. The walls glitter with embedded crystals that catch any available light.',
+    'You enter a dense grove where ancient trees tower overhead, their gnarled roots creating natural obstacles across the mossy floor. Shafts of dappled sunlight filter through the canopy above.',
+    'You enter a flooded chamber where water reaches knee-height throughout most of the space. A network of raised walkways and platforms provides dry paths across the room.',
+    'You enter a frozen chamber where ice coats every surface and your breath forms clouds in the frigid air. Icicles hang from the ceiling like frozen spears, and snow drifts pile against the walls.',
+    'You enter a room dominated by a massive ice wall that reaches to the ceiling. Frozen waterfalls are suspended mid-cascade, and the temperature is well below freezing.',
+    'You enter the secret passage...',
+    'You enter what appears to be a multi-story parking garage section, with concrete pillars supporting low ceilings. Abandoned cars sit at odd angles, some with doors hanging open.',
+    'You enter what appears to be a shopping district consumed by fire. Store mannequins melt in display windows, and neon signs spark and flicker before dying in the inferno.',
+    'You enter what appears to be an abandoned mine shaft, with rusted rail tracks running along the floor and old mining equipment left to decay. The walls show pick marks from long-ago excavation.',
+    'You move on.',
+    'You search the room thoroughly but find nothing of interest.',
+    'You sense powerful energy ahead...',
+    'You step into a burning apartment complex with flames visible through every window. Fire escapes have warped from the heat, and smoke billows through hallways.',
+    'You step into a burning city street where storefronts blaze on both sides. Flames pour from shattered windows, and the asphalt itself seems to melt under the intense heat.',
+    'You step into a rocky outcropping within the forest, where a small waterfall cascades into a crystal-clear pool. Moss-covered boulders provide elevated positions around the space.',
+    'You step into a room designed like a boat dock, with wooden planks extending over dark water. Mooring posts, coiled ropes, and fishing equipment are scattered about.',
+    'You step into an underground chamber that seems to be part of an ancient ruin - crumbling pillars support a low ceiling, and strange symbols are carved into the weathered stone walls.',
+    'You step into an urban rooftop environment with AC units, water towers, and ventilation systems creating a maze of obstacles. Gaps between sections simulate building edges.',
+    'You step into what appears to be the inside of a glacier - walls of blue ice surround you, and frozen formations jut out at odd angles. Frost creeps across any exposed surface.',
+    'You step into what appears to be the inside of a hollow mountain peak, with a spiraling path leading upward along the curved walls. The center drops away into darkness.',
+    'You take a moment to catch your breath and focus...',
+    "You've already cleared this room.",
+    "You've already rested in this room!",
+    "You've already searched this room!",
+    "You've found a hidden passage that leads directly to the next zone!",
+    '[Aizawa]: "...Shinso. Fine. You can join the exercise."',
+    '[Aizawa]: "All For One awaits on the top floor."',
+    '[Aizawa]: "All For One will have no stolen quirks to use."',
+    '[Aizawa]: "All For One will use their quirks against you."',
+    '[Aizawa]: "Class 1-A... you\'ve proven yourselves."',
+    '[Aizawa]: "He\'s stolen quirks from every student you\'ve lost."',
+    '[Aizawa]: "High casualties, but you finished. Learn from this."',
+    '[Aizawa]: "Impressive. Not a single student captured."',
+    '[Aizawa]: "Listen up, all of you. You\'re about to enter the Tower Descent Simulation, otherwise known as the T.D.S. - an underground training facility that descends 20 zones deep into the earth. The deeper you go, the more challenging it becomes. Each zone presents unique environmental hazards designed to test your quirk adaptability and strategic thinking. Pay close attention to zone types - your quirks will react differently to each environment. Take Asui for example. In aquatic zones like lakes, her frog quirk gives her a significant advantage in both combat ability and maneuverability. In forest environments, her tree frog capabilities allow her to blend in and navigate with ease. However, in extreme cold like blizzard zones, she becomes sluggish and weakened - frogs don\'t do well in freezing temperatures. Similarly, intense heat in fire zones will dry her out and hinder her performance. Every student has strengths and weaknesses like this. Learn them. The simulation uses a capture system - if you fall in combat, you\'re tagged as captured and removed from the exercise. However, there\'s a possibility you might find captured students hidden within the facility during your search. If you\'re thorough in your exploration, you may be able to rescue them and return them to active duty. Each zone ends with a boss encounter that must be defeated to descend further. Boss health persists across attempts - if one student damages it but falls, the next student faces a weakened boss. Use that strategically. Your objective is to descend through all 20 zones and reach the bottom. Work together, cover each other\'s weaknesses, and don\'t embarrass U.A. Now get moving."',
+    '[Aizawa]: "Minimal casualties. Well done."',
+    '[Aizawa]: "Not a single student lost. Exceptional."',
+    '[Aizawa]: "This is it. The final test."',
+    '[Aizawa]: "You completed the objective. Good work."',
+    '[Aizawa]: "You did it. All 20 zones cleared."',
+    '[Aizawa]: "You reached the bottom of the Tower Descent."',
+    '[Mysterious Voice]: "Need a hand?"',
+    '[Shinso]: "Heard Class 1-A was training here. Figured I\'d prove I belong with you guys."',
+    'âŒ That student has been captured and cannot be deployed!',
+    '⚔️  PERSONAL QUIRK BONUSES (Lost if captured):',
+    '⚠️  No personal skill tree available for this character.',
+    '⚠️  Plus Ultra has been used for this zone.',
+    '⚠️  WARNING: BOSS ROOM DETECTED! ⚠️',
+    '⚠️  WARNING: These bonuses are LOST if captured!',
+    '⚡⚡⚡ PLUS ULTRA UNLOCKED! ⚡⚡⚡',
+    '⚡⚡⚡ PLUS ULTRA! ⚡⚡⚡',
+    '✅ All characters given 99 skill points!',
+    '✅ All characters leveled to 10!',
+    '✅ All global skills unlocked!',
+    '✅ Hitoshi Shinso unlocked!',
+    '✅ MISSION COMPLETE',
+    '✅ MISSION SUCCESS!',
+    "✨ CAN'T STOP OUR SPARKLE! All characters gain +5% evasion!",
+    '✨ EXCELLENT PERFORMANCE! ✨',
+    '❗ SPECIAL EVENT!',
+    '🌟 HIGH-VALUE RESCUE OPPORTUNITY! 🌟',
+    '🌟 LEVEL UP! 🌟',
+    '🌟 PERFECT RUN - NO CASUALTIES! 🌟',
+    '🌟 SECRET PASSAGE DISCOVERED!',
+    '🎁 TREASURE DISCOVERED!',
+    '🎁✨ LUCKY BAG DISCOVERED! ✨🎁',
+    '🎉 Hitoshi Shinso is now available for deployment!',
+    '🎉 VICTORY!',
+    '🎖️  STUDENT RESCUED!',
+    '🏆 BOSS DEFEATED! 🏆',
+    '🏆 VICTORY! 🏆',
+    '🐸 RIBBIT RECOVERY ACTIVATED! All characters gain survival protection!',
+    '🐸 RIBBIT RECOVERY! 🐸',
+    '👥 H.U.C. CIVILIAN ACTOR FOUND!',
+    '💎 CONTENTS:',
+    '💎 You found supplies!',
+    '💚 DEFENSIVE INSTINCT ACTIVATED! 2x defense when HP ≤ 25%!',
+    '💧 ACID VEIL ACTIVATED! All characters gain damage reduction!',
+    '📊 GLOBAL CLASS BONUSES (Permanent):',
+    '🔧 DEBUG MENU 🔧',
+    '🤝 TEAM-UP ATTACKS AVAILABLE:',
+    '🤝 Team-Up Attacks now available for testing!',
+    '🥋 DESPERATE STRIKE!',
+)
+
+
+for _template_id, _text in TEMPLATES.items():
+    assert '\n' not in _text, f"template {_template_id} spans several lines"
+
+assert len(set(LINES)) == len(LINES), "duplicate catalog line"
+LINE_IDS = {line: index for index, line in enumerate(LINES)}
+
+_content = json.dumps({'lines': LINES, 'templates': TEMPLATES, 'types': MSG_TYPES},
+                      sort_keys=True, separators=(',', ':'))
+VERSION = hashlib.sha256(_content.encode('utf-8')).hexdigest()[:12]
+# What GET /api/catalog serves, encoded once
+CATALOG_JSON = json.dumps({'version': VERSION, 'lines': LINES, 'templates': TEMPLATES, 'types': MSG_TYPES},
+                          separators=(',', ':')).encode('utf-8')
+del _content, _template_id, _text
+
+
+# ----------------------------------------------------------------------
+# Maintenance - not run on import
+# ----------------------------------------------------------------------
+
+def _literal_text(node):
+    """The text of a string literal (or an f-string without blanks), else None"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr) and all(isinstance(part, ast.Constant) for part in node.values):
+        return ''.join(part.value for part in node.values)
+    return None
+
+
+def _literal_lines(path):
+    """Non-blank lines of every string literal passed straight to add_msg()"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == 'add_msg' and node.args):
+            text = _literal_text(node.args[0])
+            if text is None:
+                continue
+            for line in text.split('\n'):
+                if line.strip():
+                    yield line
+
+
+def missing_lines():
+    """Fixed game text that isn't in LINES yet, in source order - append these"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    found = []
+    for source in SOURCES:
+        found.extend(_literal_lines(os.path.join(here, source)))
+    for texts in ZONE_DESCRIPTIONS.values():
+        found.extend(texts)
+    found.extend(ROOM_DESCRIPTIONS.values())
+    missing = []
+    for line in found:
+        if line not in LINE_IDS and line not in missing:
+            missing.append(line)
+    return missing
+
+
+if __name__ == '__main__':
+    for line in missing_lines():
+        print(f'    {line!r},')
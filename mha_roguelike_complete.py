@@ -1,11 +1,215 @@
+import hashlib
+import math
+import os
 import random
+import threading
 import time
+from types import MappingProxyType
+
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+class SessionRandom:
+    """Counter-based random source for one game session (splitmix64)
+    
+    The whole state is (seed, counter), so it is tiny to snapshot and a run can
+    be replayed exactly from its seed. Not a random.Random subclass - that
+    would still allocate a Mersenne Twister table per session. The helpers
+    below are the ones the engine uses, drawing numbers exactly as
+    random.Random does on top of getrandbits() and random().
+    """
+    __slots__ = ('_seed', '_counter')
+    
+    def __init__(self, seed=None):
+        self.seed(seed)
+    
+    def seed(self, a=None):
+        if a is None:
+            a = int.from_bytes(os.urandom(8), 'little')
+        elif not isinstance(a, int):
+            a = int.from_bytes(hashlib.sha256(str(a).encode('utf-8')).digest()[:8], 'little')
+        self._seed = a & _MASK64
+        self._counter = 0
+    
+    def _next64(self):
+        self._counter += 1
+        z = (self._seed + self._counter * _GOLDEN_GAMMA) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+    
+    def random(self):
+        return (self._next64() >> 11) * (1.0 / 9007199254740992.0)
+    
+    def getrandbits(self, k):
+        if k <= 64:
+            return self._next64() >> (64 - k)
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self._next64() << shift
+        return bits & ((1 << k) - 1)
+    
+    def getstate(self):
+        return (self._seed, self._counter)
+    
+    def setstate(self, state):
+        self._seed, self._counter = state
+    
+    def _randbelow(self, n):
+        """Random int in [0, n) - rejection sampling on n.bit_length() bits"""
+        k = n.bit_length()
+        r = self.getrandbits(k)
+        while r >= n:
+            r = self.getrandbits(k)
+        return r
+    
+    def randint(self, a, b):
+        if b < a:
+            raise ValueError(f"empty range for randint({a}, {b})")
+        return a + self._randbelow(b - a + 1)
+    
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+    
+    def choice(self, seq):
+        if not len(seq):
+            raise IndexError('Cannot choose from an empty sequence')
+        return seq[self._randbelow(len(seq))]
+    
+    def shuffle(self, x):
+        for i in reversed(range(1, len(x))):
+            j = self._randbelow(i + 1)
+            x[i], x[j] = x[j], x[i]
+    
+    def sample(self, population, k):
+        """k unique picks, in the same order random.Random.sample() gives"""
+        n = len(population)
+        if not 0 <= k <= n:
+            raise ValueError("Sample larger than population or is negative")
+        result = [None] * k
+        # random.Random's choice between a pool list and a set of picks
+        setsize = 21
+        if k > 5:
+            setsize += 4 ** math.ceil(math.log(k * 3, 4))
+        if n <= setsize:
+            pool = list(population)
+            for i in range(k):
+                j = self._randbelow(n - i)
+                result[i] = pool[j]
+                pool[j] = pool[n - i - 1]
+        else:
+            selected = set()
+            for i in range(k):
+                j = self._randbelow(n)
+                while j in selected:
+                    j = self._randbelow(n)
+                selected.add(j)
+                result[i] = population[j]
+        return result
+
+
+class CharacterTemplate:
+    """Static per-student data, built once per process and shared by every session"""
+    __slots__ = ('name', 'quirk', 'abilities', 'base_stats', 'dialogue', 'aizawa_dialogue',
+                 'hidden', 'zone_bonuses', 'zone_penalties', 'unique_passive', 'team_up_attacks',
+                 'mastery_levels')
+
+    def __init__(self, name, quirk, abilities, base_stats, dialogue, aizawa_dialogue, hidden=False):
+        # Everything is frozen so one session can't leak changes into another
+        set_field = object.__setattr__
+        set_field(self, 'name', name)
+        set_field(self, 'quirk', quirk)
+        set_field(self, 'abilities', _freeze(abilities))
+        set_field(self, 'base_stats', _freeze(base_stats))
+        set_field(self, 'dialogue', _freeze(dialogue))
+        set_field(self, 'aizawa_dialogue', _freeze(aizawa_dialogue))
+        set_field(self, 'hidden', hidden)
+        set_field(self, 'zone_bonuses', _freeze(base_stats.get('zone_bonuses', {})))
+        set_field(self, 'zone_penalties', _freeze(base_stats.get('zone_penalties', {})))
+        set_field(self, 'unique_passive', _freeze(get_unique_passive(name)))
+        set_field(self, 'team_up_attacks', _freeze(get_team_up_attacks(name)))
+        # Personal skill levels needed to max the whole tree (unlocks Plus Ultra)
+        set_field(self, 'mastery_levels', sum(skill['max'] for skill in get_character_skill_tree(name).values()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CharacterTemplate is read-only")
+
+    def __reduce__(self):
+        # Roster templates pickle as a reference to the shared copy
+        if get_character_template(self.name) is self:
+            return (get_character_template, (self.name,))
+        return (CharacterTemplate, (self.name, self.quirk, _thaw(self.abilities), _thaw(self.base_stats),
+                                    _thaw(self.dialogue), _thaw(self.aizawa_dialogue), self.hidden))
+
+
+def _freeze(value):
+    """Read-only copy of nested dicts/lists"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """Plain dict/list copy of a frozen value"""
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+# Personal-skill effects that are simple on/off switches, packed into Character.skill_flags
+FLAG_LUCKY_BAGS = 1 << 0
+FLAG_ACID_VEIL = 1 << 1
+FLAG_RIBBIT_RECOVERY = 1 << 2
+FLAG_CANT_STOP_SPARKLE = 1 << 3
+FLAG_DEFENSIVE_INSTINCT = 1 << 4
+
+
+def _skill_flag(flag):
+    """Boolean property view of one bit in skill_flags"""
+    def get(self):
+        return bool(self.skill_flags & flag)
+
+    def set(self, value):
+        if value:
+            self.skill_flags |= flag
+        else:
+            self.skill_flags &= ~flag
+    return property(get, set)
+
 
 class Character:
+    # Fixed layout - every field a run can change is declared up front
+    __slots__ = (
+        'template', 'level', 'max_hp', 'hp', 'max_energy', 'energy',
+        'base_attack', 'attack', 'base_defense', 'defense',
+        'exp', 'exp_to_level', 'inventory', 'captured', 'unlocked',
+        'skill_points', 'personal_skills', 'evasion', 'ambush_chance',
+        'item_find_bonus', 'enemy_avoid_chance', 'secret_detection',
+        'plus_ultra_available', 'plus_ultra_used_this_zone',
+        'skill_flags', 'rescue_boost', 'post_combat_heal', 'special_zone_bonus',
+        'levels_to_mastery',
+    )
+
     def __init__(self, name, quirk, abilities, base_stats, dialogue, aizawa_dialogue, hidden=False):
-        self.name = name
-        self.quirk = quirk
-        self.abilities = abilities
+        self._init_from_template(CharacterTemplate(name, quirk, abilities, base_stats,
+                                                   dialogue, aizawa_dialogue, hidden))
+
+    @classmethod
+    def from_template(cls, template):
+        """New run-state for a shared template - no static data is copied"""
+        char = cls.__new__(cls)
+        char._init_from_template(template)
+        return char
+
+    def _init_from_template(self, template):
+        base_stats = template.base_stats
+        self.template = template
         self.level = 1
         self.max_hp = base_stats['hp']
         self.hp = self.max_hp
@@ -19,29 +223,87 @@ class Character:
         self.exp_to_level = 100
         self.inventory = []
         self.captured = False
-        self.dialogue = dialogue
-        self.aizawa_dialogue = aizawa_dialogue
-        self.hidden = hidden
-        self.unlocked = not hidden
-        self.zone_bonuses = base_stats.get('zone_bonuses', {})
-        self.zone_penalties = base_stats.get('zone_penalties', {})
+        self.unlocked = not template.hidden
         self.skill_points = 0
         self.personal_skills = {}
+        self.levels_to_mastery = template.mastery_levels
         self.evasion = 0
         self.ambush_chance = 0
         self.item_find_bonus = 0
         self.enemy_avoid_chance = 0
         self.secret_detection = 0
         
-        # PHASE 2.5: Unique passive abilities
-        self.unique_passive = self.get_unique_passive()
-        
         # PHASE 2.5: Plus Ultra ability
         self.plus_ultra_available = False
         self.plus_ultra_used_this_zone = False
         
-        # TEAM-UP ATTACKS: Available when both partners are Level 10+
-        self.team_up_attacks = self.get_team_up_attacks()
+        # Personal skill effects
+        self.skill_flags = 0
+        self.rescue_boost = 0
+        self.post_combat_heal = 0
+        self.special_zone_bonus = None
+    
+    # Static data lives on the shared template
+    name = property(lambda self: self.template.name)
+    quirk = property(lambda self: self.template.quirk)
+    abilities = property(lambda self: self.template.abilities)
+    dialogue = property(lambda self: self.template.dialogue)
+    aizawa_dialogue = property(lambda self: self.template.aizawa_dialogue)
+    hidden = property(lambda self: self.template.hidden)
+    zone_bonuses = property(lambda self: self.template.zone_bonuses)
+    zone_penalties = property(lambda self: self.template.zone_penalties)
+    # PHASE 2.5: Unique passive abilities
+    unique_passive = property(lambda self: self.template.unique_passive)
+    # TEAM-UP ATTACKS: Available when both partners are Level 10+
+    team_up_attacks = property(lambda self: self.template.team_up_attacks)
+    
+    # Personal skill switches, kept as attributes for readability
+    can_find_lucky_bags = _skill_flag(FLAG_LUCKY_BAGS)
+    has_acid_veil = _skill_flag(FLAG_ACID_VEIL)
+    has_ribbit_recovery = _skill_flag(FLAG_RIBBIT_RECOVERY)
+    has_cant_stop_sparkle = _skill_flag(FLAG_CANT_STOP_SPARKLE)
+    has_defensive_instinct = _skill_flag(FLAG_DEFENSIVE_INSTINCT)
+    
+    # Everything that changes during a run - abilities, dialogue and passives
+    # come from the shared template when a session is restored
+    STATE_FIELDS = (
+        'level', 'max_hp', 'hp', 'max_energy', 'energy',
+        'base_attack', 'attack', 'base_defense', 'defense',
+        'exp', 'exp_to_level', 'inventory', 'captured', 'unlocked',
+        'skill_points', 'personal_skills', 'evasion', 'ambush_chance',
+        'item_find_bonus', 'enemy_avoid_chance', 'secret_detection',
+        'plus_ultra_available', 'plus_ultra_used_this_zone',
+        'skill_flags', 'rescue_boost', 'post_combat_heal', 'special_zone_bonus',
+    )
+    
+    # States saved before skill_flags existed kept one attribute per switch
+    LEGACY_FLAG_FIELDS = {
+        'can_find_lucky_bags': FLAG_LUCKY_BAGS,
+        'has_acid_veil': FLAG_ACID_VEIL,
+        'has_ribbit_recovery': FLAG_RIBBIT_RECOVERY,
+        'has_cant_stop_sparkle': FLAG_CANT_STOP_SPARKLE,
+        'has_defensive_instinct': FLAG_DEFENSIVE_INSTINCT,
+    }
+    
+    def to_state(self):
+        """Mutable character state as plain JSON-friendly data"""
+        state = {'name': self.name}
+        for field in self.STATE_FIELDS:
+            state[field] = getattr(self, field)
+        return state
+    
+    def apply_state(self, state):
+        """Restore mutable state produced by to_state()"""
+        for field in self.STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+        for field, flag in self.LEGACY_FLAG_FIELDS.items():
+            if state.get(field):
+                self.skill_flags |= flag
+        self.inventory = list(self.inventory)
+        self.personal_skills = dict(self.personal_skills)
+        # Derived, so not saved - recount from the restored skills
+        self.levels_to_mastery = self._count_levels_to_mastery()
         
     def get_available_team_ups(self, all_characters):
         """Check which team-up attacks are available (both Level 10+, partner not captured)"""
@@ -59,503 +321,32 @@ class Character:
     
     def get_team_up_attacks(self):
         """Define team-up attacks for this character"""
-        team_ups = {
-            'Ochaco Uraraka': {
-                'Tsuyu Asui': {
-                    'name': 'Fafrotskies',
-                    'damage': 80,
-                    'energy': 35,
-                    'desc': "Asui's tongue swipes at debris floated by Uraraka, sending it hurtling at the enemy"
-                },
-                'Hanta Sero': {
-                    'name': 'Meteor Barrage',
-                    'damage': 75,
-                    'energy': 32,
-                    'desc': "Uraraka releases floated debris strung together by Sero's tape in a devastating barrage"
-                },
-                'Izuku Midoriya': {
-                    'name': 'You Can Do It!',
-                    'damage': 90,
-                    'energy': 38,
-                    'desc': "Uraraka floats the enemy, leaving them defenseless against a powered-up Smash from Midoriya"
-                },
-                'Eijiro Kirishima': {
-                    'name': 'Manly Hammer',
-                    'damage': 85,
-                    'energy': 36,
-                    'desc': "After removing gravity's effects from Kirishima, Uraraka swings his hardened form violently at the enemy"
-                },
-                'Mina Ashido': {
-                    'name': 'Rainy Day',
-                    'damage': 78,
-                    'energy': 34,
-                    'desc': "After having Uraraka float her, Mina splashes down a rain of corrosive acid on the enemy"
-                },
-                'Katsuki Bakugo': {
-                    'name': 'Shotgun Blast',
-                    'damage': 88,
-                    'energy': 37,
-                    'desc': "A pile of floated debris becomes explosive buckshot as Bakugo detonates it from behind"
-                },
-                'Rikido Sato': {
-                    'name': 'Mochi Pounding',
-                    'damage': 82,
-                    'energy': 35,
-                    'desc': "Equipped with weightless mochi hammers, Uraraka and Sato pulverize the enemy"
-                },
-            },
-            'Tsuyu Asui': {
-                'Ochaco Uraraka': {
-                    'name': 'Fafrotskies',
-                    'damage': 80,
-                    'energy': 35,
-                    'desc': "Asui's tongue swipes at debris floated by Uraraka, sending it hurtling at the enemy"
-                },
-                'Katsuki Bakugo': {
-                    'name': 'Froppenheimer',
-                    'damage': 95,
-                    'energy': 40,
-                    'desc': "Bakugo infuses his sweat with Asui's toxic mucus to create devastating sticky explosives"
-                },
-                'Mashirao Ojiro': {
-                    'name': 'Frog Stance',
-                    'damage': 77,
-                    'energy': 33,
-                    'desc': "Slathered in Asui's toxic mucus, Ojiro strikes the enemy's pressure points with precision"
-                },
-                'Minoru Mineta': {
-                    'name': 'Perv Swerve',
-                    'damage': 70,
-                    'energy': 30,
-                    'desc': "Fed up with Mineta's perverted ways, Asui sends him hurtling at the enemy like a cannonball"
-                },
-                'Toru Hagakure': {
-                    'name': 'Covert Frops',
-                    'damage': 83,
-                    'energy': 36,
-                    'desc': "An invisible Hagakure and camouflaged Asui wreak havoc on the unsuspecting enemy"
-                },
-                'Mezo Shoji': {
-                    'name': 'Octo Frog',
-                    'damage': 86,
-                    'energy': 37,
-                    'desc': "Keeping warm on Shoji's back, Asui and Shoji unleash a myriad of heteromorphic attacks (Negates Cold Penalty)"
-                },
-            },
-            'Tenya Iida': {
-                'Shoto Todoroki': {
-                    'name': 'Ice Jet',
-                    'damage': 92,
-                    'energy': 39,
-                    'desc': "Iida propels a fighter jet made of pure ice at blistering speed toward the enemy"
-                },
-                'Izuku Midoriya': {
-                    'name': 'Race to You',
-                    'damage': 87,
-                    'energy': 37,
-                    'desc': "Midoriya and Iida charge at full speed, sandwiching the enemy between two devastating kicks"
-                },
-            },
-            'Momo Yaoyorozu': {
-                'Denki Kaminari': {
-                    'name': 'Electromagnetic Railgun',
-                    'damage': 98,
-                    'energy': 42,
-                    'desc': "Yaoyorozu's created railgun fires with devastating force, powered by Kaminari's electricity"
-                },
-                'Kyoka Jiro': {
-                    'name': 'Death Amp',
-                    'damage': 94,
-                    'energy': 40,
-                    'desc': "Jiro plugs into a supersized amplifier created by Yaoyorozu for catastrophic sonic damage"
-                },
-                'Rikido Sato': {
-                    'name': 'Sweet Tea',
-                    'damage': 79,
-                    'energy': 34,
-                    'desc': "Yaoyorozu and Sato share sweets, replenishing their strength for an all-out combined attack"
-                },
-                'Fumikage Tokoyami': {
-                    'name': 'Stare into the Abyss',
-                    'damage': 91,
-                    'energy': 38,
-                    'desc': "Yaoyorozu creates night-vision goggles for Tokoyami, allowing Dark Shadow to strike with perfect precision"
-                },
-                'Izuku Midoriya': {
-                    'name': 'Peak Midoriya',
-                    'damage': 89,
-                    'energy': 37,
-                    'desc': "Yaoyorozu and Midoriya formulate the perfect attack targeting the enemy's weakness (May contain rambling)"
-                },
-            },
-            'Izuku Midoriya': {
-                'Katsuki Bakugo': {
-                    'name': 'Howitzer Blitz',
-                    'damage': 100,
-                    'energy': 45,
-                    'desc': "Building centrifugal force with Howitzer Impact, Bakugo hurls Midoriya for a massive explosive Smash"
-                },
-                'Ochaco Uraraka': {
-                    'name': 'You Can Do It!',
-                    'damage': 90,
-                    'energy': 38,
-                    'desc': "Uraraka floats the enemy, leaving them defenseless against a powered-up Smash from Midoriya"
-                },
-                'Tenya Iida': {
-                    'name': 'Race to You',
-                    'damage': 87,
-                    'energy': 37,
-                    'desc': "Midoriya and Iida charge at full speed, sandwiching the enemy between two devastating kicks"
-                },
-                'Shoto Todoroki': {
-                    'name': 'Ice Shards',
-                    'damage': 96,
-                    'energy': 41,
-                    'desc': "Todoroki unleashes his Heaven-Piercing Ice Wall, followed by Midoriya's Smash sending ice shards flying"
-                },
-                'Momo Yaoyorozu': {
-                    'name': 'Peak Midoriya',
-                    'damage': 89,
-                    'energy': 37,
-                    'desc': "Yaoyorozu and Midoriya formulate the perfect attack targeting the enemy's weakness (May contain rambling)"
-                },
-            },
-            'Katsuki Bakugo': {
-                'Izuku Midoriya': {
-                    'name': 'Howitzer Blitz',
-                    'damage': 100,
-                    'energy': 45,
-                    'desc': "Building centrifugal force with Howitzer Impact, Bakugo hurls Midoriya for a massive explosive Smash"
-                },
-                'Eijiro Kirishima': {
-                    'name': 'Bombshell',
-                    'damage': 93,
-                    'energy': 39,
-                    'desc': "Bakugo launches a fully hardened Kirishima at the enemy with a devastating explosion"
-                },
-                'Tsuyu Asui': {
-                    'name': 'Froppenheimer',
-                    'damage': 95,
-                    'energy': 40,
-                    'desc': "Bakugo infuses his sweat with Asui's toxic mucus to create devastating sticky explosives"
-                },
-                'Yuga Aoyama': {
-                    'name': 'Sparkler',
-                    'damage': 76,
-                    'energy': 33,
-                    'desc': "In an unlikely team-up, Aoyama and Bakugo dazzle the enemy with a blinding sparkling attack"
-                },
-                'Ochaco Uraraka': {
-                    'name': 'Shotgun Blast',
-                    'damage': 88,
-                    'energy': 37,
-                    'desc': "A pile of floated debris becomes explosive buckshot as Bakugo detonates it from behind"
-                },
-            },
-            'Shoto Todoroki': {
-                'Tenya Iida': {
-                    'name': 'Ice Jet',
-                    'damage': 92,
-                    'energy': 39,
-                    'desc': "Iida propels a fighter jet made of pure ice at blistering speed toward the enemy"
-                },
-                'Izuku Midoriya': {
-                    'name': 'Ice Shards',
-                    'damage': 96,
-                    'energy': 41,
-                    'desc': "Todoroki unleashes his Heaven-Piercing Ice Wall, followed by Midoriya's Smash sending ice shards flying"
-                },
-            },
-            'Eijiro Kirishima': {
-                'Katsuki Bakugo': {
-                    'name': 'Bombshell',
-                    'damage': 93,
-                    'energy': 39,
-                    'desc': "Bakugo launches a fully hardened Kirishima at the enemy with a devastating explosion"
-                },
-                'Ochaco Uraraka': {
-                    'name': 'Manly Hammer',
-                    'damage': 85,
-                    'energy': 36,
-                    'desc': "After removing gravity's effects from Kirishima, Uraraka swings his hardened form violently at the enemy"
-                },
-            },
-            'Denki Kaminari': {
-                'Momo Yaoyorozu': {
-                    'name': 'Electromagnetic Railgun',
-                    'damage': 98,
-                    'energy': 42,
-                    'desc': "Yaoyorozu's created railgun fires with devastating force, powered by Kaminari's electricity"
-                },
-                'Kyoka Jiro': {
-                    'name': 'Shock Wave',
-                    'damage': 90,
-                    'energy': 38,
-                    'desc': "A powerful combination of Jiro's sonic waves and Kaminari's shocking electricity"
-                },
-                'Mina Ashido': {
-                    'name': 'Dumb Luck',
-                    'damage': 85,
-                    'energy': 36,
-                    'desc': "You don't know how it worked. But it did. For massive damage. Pure chaotic energy"
-                },
-            },
-            'Fumikage Tokoyami': {
-                'Momo Yaoyorozu': {
-                    'name': 'Stare into the Abyss',
-                    'damage': 91,
-                    'energy': 38,
-                    'desc': "Yaoyorozu creates night-vision goggles for Tokoyami, allowing Dark Shadow to strike with perfect precision"
-                },
-            },
-            'Kyoka Jiro': {
-                'Momo Yaoyorozu': {
-                    'name': 'Death Amp',
-                    'damage': 94,
-                    'energy': 40,
-                    'desc': "Jiro plugs into a supersized amplifier created by Yaoyorozu for catastrophic sonic damage"
-                },
-                'Denki Kaminari': {
-                    'name': 'Shock Wave',
-                    'damage': 90,
-                    'energy': 38,
-                    'desc': "A powerful combination of Jiro's sonic waves and Kaminari's shocking electricity"
-                },
-            },
-            'Hanta Sero': {
-                'Ochaco Uraraka': {
-                    'name': 'Meteor Barrage',
-                    'damage': 75,
-                    'energy': 32,
-                    'desc': "Uraraka releases floated debris strung together by Sero's tape in a devastating barrage"
-                },
-                'Minoru Mineta': {
-                    'name': 'Sticky Tape',
-                    'damage': 72,
-                    'energy': 31,
-                    'desc': "Sero and Mineta unleash a barrage of tape and sticky balls, immobilizing the opponent for a massive strike"
-                },
-            },
-            'Mashirao Ojiro': {
-                'Toru Hagakure': {
-                    'name': 'Never Saw it Coming',
-                    'damage': 81,
-                    'energy': 35,
-                    'desc': "Hagakure stuns the enemy with her light refraction, leaving them open for an Ojiro finishing strike"
-                },
-                'Tsuyu Asui': {
-                    'name': 'Frog Stance',
-                    'damage': 77,
-                    'energy': 33,
-                    'desc': "Slathered in Asui's toxic mucus, Ojiro strikes the enemy's pressure points with precision"
-                },
-            },
-            'Toru Hagakure': {
-                'Yuga Aoyama': {
-                    'name': 'Navel Refraction',
-                    'damage': 84,
-                    'energy': 36,
-                    'desc': "Aoyama blasts Hagakure with a powerful beam that she refracts back for amplified damage"
-                },
-                'Mashirao Ojiro': {
-                    'name': 'Never Saw it Coming',
-                    'damage': 81,
-                    'energy': 35,
-                    'desc': "Hagakure stuns the enemy with her light refraction, leaving them open for an Ojiro finishing strike"
-                },
-                'Tsuyu Asui': {
-                    'name': 'Covert Frops',
-                    'damage': 83,
-                    'energy': 36,
-                    'desc': "An invisible Hagakure and camouflaged Asui wreak havoc on the unsuspecting enemy"
-                },
-            },
-            'Minoru Mineta': {
-                'Hanta Sero': {
-                    'name': 'Sticky Tape',
-                    'damage': 72,
-                    'energy': 31,
-                    'desc': "Sero and Mineta unleash a barrage of tape and sticky balls, immobilizing the opponent for a massive strike"
-                },
-                'Tsuyu Asui': {
-                    'name': 'Perv Swerve',
-                    'damage': 70,
-                    'energy': 30,
-                    'desc': "Fed up with Mineta's perverted ways, Asui sends him hurtling at the enemy like a cannonball"
-                },
-            },
-            'Rikido Sato': {
-                'Momo Yaoyorozu': {
-                    'name': 'Sweet Tea',
-                    'damage': 79,
-                    'energy': 34,
-                    'desc': "Yaoyorozu and Sato share sweets, replenishing their strength for an all-out combined attack"
-                },
-                'Ochaco Uraraka': {
-                    'name': 'Mochi Pounding',
-                    'damage': 82,
-                    'energy': 35,
-                    'desc': "Equipped with weightless mochi hammers, Uraraka and Sato pulverize the enemy"
-                },
-            },
-            'Yuga Aoyama': {
-                'Toru Hagakure': {
-                    'name': 'Navel Refraction',
-                    'damage': 84,
-                    'energy': 36,
-                    'desc': "Aoyama blasts Hagakure with a powerful beam that she refracts back for amplified damage"
-                },
-                'Katsuki Bakugo': {
-                    'name': 'Sparkler',
-                    'damage': 76,
-                    'energy': 33,
-                    'desc': "In an unlikely team-up, Aoyama and Bakugo dazzle the enemy with a blinding sparkling attack"
-                },
-            },
-            'Mina Ashido': {
-                'Ochaco Uraraka': {
-                    'name': 'Rainy Day',
-                    'damage': 78,
-                    'energy': 34,
-                    'desc': "After having Uraraka float her, Mina splashes down a rain of corrosive acid on the enemy"
-                },
-                'Denki Kaminari': {
-                    'name': 'Dumb Luck',
-                    'damage': 85,
-                    'energy': 36,
-                    'desc': "You don't know how it worked. But it did. For massive damage. Pure chaotic energy"
-                },
-            },
-            'Mezo Shoji': {
-                'Tsuyu Asui': {
-                    'name': 'Octo Frog',
-                    'damage': 86,
-                    'energy': 37,
-                    'desc': "Keeping warm on Shoji's back, Asui and Shoji unleash a myriad of heteromorphic attacks (Negates Cold Penalty)"
-                },
-            },
-        }
-        
-        return team_ups.get(self.name, {})
-        
+        return self.team_up_attacks
+    
     def get_unique_passive(self):
         """Define unique passive ability based on character"""
-        passives = {
-            # RESCUE SPECIALISTS
-            'Tenya Iida': {
-                'type': 'rescue_boost',
-                'value': 2.0,
-                'desc': '🏃 Recipro Search - 2x chance to find captured students'
-            },
-            'Mezo Shoji': {
-                'type': 'civilian_boost',
-                'value': 2.0,
-                'desc': '👥 Dupli-Arms Scout - 2x chance to find civilians'
-            },
-            'Kyoka Jiro': {
-                'type': 'civilian_boost',
-                'value': 1.8,
-                'desc': '👥 Heartbeat Detection - 1.8x chance to find civilians'
-            },
-            
-            # EXPLORATION SPECIALISTS
-            'Toru Hagakure': {
-                'type': 'passage_boost',
-                'value': 3.0,
-                'desc': '🔍 Invisible Scout - 3x chance to find secret passages'
-            },
-            'Minoru Mineta': {
-                'type': 'passage_boost',
-                'value': 2.0,
-                'desc': '🔍 Pop Off Exploration - 2x chance to find passages'
-            },
-            'Fumikage Tokoyami': {
-                'type': 'secret_detection',
-                'value': 25,
-                'desc': '🔍 Dark Shadow Search - +25% POI discovery'
-            },
-            'Hanta Sero': {
-                'type': 'civilian_boost',
-                'value': 1.5,
-                'desc': '🕷️ Tape Rescue - 1.5x chance to find civilians (reaches hard-to-access places)'
-            },
-            'Tsuyu Asui': {
-                'type': 'civilian_boost',
-                'value': 1.3,
-                'desc': '🐸 Frog Sense - 1.3x chance to find civilians'
-            },
-            
-            # ITEM SPECIALISTS
-            'Momo Yaoyorozu': {
-                'type': 'item_boost',
-                'value': 2.5,
-                'desc': '💎 Creation Analysis - 2.5x better item discovery'
-            },
-            'Koji Koda': {
-                'type': 'item_boost',
-                'value': 1.5,
-                'desc': '💎 Animal Friends - 1.5x better item discovery'
-            },
-            'Rikido Sato': {
-                'type': 'recovery_item_boost',
-                'value': 2.0,
-                'desc': '🍬 Sugar Rush Finder - 2x chance to find recovery items'
-            },
-            
-            # COMBAT SPECIALISTS
-            'Katsuki Bakugo': {
-                'type': 'ambush_master',
-                'value': 30,
-                'desc': '💥 Explosive Entry - +30% first strike damage'
-            },
-            'Eijiro Kirishima': {
-                'type': 'damage_reduction',
-                'value': 10,
-                'desc': '🛡️ Hardening Armor - -10% damage taken'
-            },
-            'Shoto Todoroki': {
-                'type': 'versatile',
-                'value': 5,
-                'desc': '❄️🔥 Dual Element - +5% all combat stats'
-            },
-            'Mashirao Ojiro': {
-                'type': 'last_stand',
-                'value': 2.0,
-                'desc': '🥋 Last Stand - 2x damage when HP ≤ 25%'
-            },
-            'Izuku Midoriya': {
-                'type': 'defensive_instinct',
-                'value': 2.0,
-                'desc': '💚 Defensive Instinct - 2x defense when HP ≤ 25%'
-            },
-            'Denki Kaminari': {
-                'type': 'stun_chance',
-                'value': 33,
-                'desc': '⚡ Electric Shock - 33% chance to stun enemy on hit'
-            },
-            
-            # SUPPORT SPECIALIST
-            'Ochaco Uraraka': {
-                'type': 'helping_hand',
-                'value': 1,
-                'desc': '🌟 Helping Hand - All students gain +5% evasion & heal +2 HP per room'
-            },
-        }
-        return passives.get(self.name, None)
+        return self.unique_passive
     
     def check_plus_ultra_unlock(self):
         """Check if all personal skills are maxed"""
-        from mha_roguelike_complete import get_character_skill_tree
+        return self.template.mastery_levels > 0 and self.levels_to_mastery <= 0
+    
+    def upgrade_personal_skill(self, skill_id):
+        """Raise a personal skill by one level (caller checks it isn't maxed)"""
+        level = self.personal_skills.get(skill_id, 0) + 1
+        self.personal_skills[skill_id] = level
+        self.levels_to_mastery -= 1
+        return level
+    
+    def _count_levels_to_mastery(self):
+        """Full recount of levels_to_mastery from personal_skills"""
         skill_tree = get_character_skill_tree(self.name)
-        if not skill_tree:
-            return False
-        
-        for skill_id, skill_data in skill_tree.items():
-            current = self.personal_skills.get(skill_id, 0)
-            if current < skill_data['max']:
-                return False
-        
-        return True
+        remaining = self.template.mastery_levels
+        for skill_id, level in self.personal_skills.items():
+            skill = skill_tree.get(skill_id)
+            if skill:
+                remaining -= min(level, skill['max'])
+        return remaining
     
     def use_plus_ultra(self):
         """PLUS ULTRA - Full recovery (once per zone)"""
@@ -611,20 +402,21 @@ class Character:
     
     def reset_personal_skills(self):
         self.personal_skills = {}
+        self.levels_to_mastery = self.template.mastery_levels
         self.evasion = 0
         self.ambush_chance = 0
         self.item_find_bonus = 0
         self.enemy_avoid_chance = 0
         self.secret_detection = 0
     
-    def get_deployment_dialogue(self):
+    def get_deployment_dialogue(self, rng=random):
         health_percent = (self.hp / self.max_hp) * 100
         if health_percent > 50:
-            return random.choice(self.dialogue['high'])
+            return rng.choice(self.dialogue['high'])
         elif health_percent > 10:
-            return random.choice(self.dialogue['medium'])
+            return rng.choice(self.dialogue['medium'])
         else:
-            return random.choice(self.dialogue['low'])
+            return rng.choice(self.dialogue['low'])
     
     def get_aizawa_response(self):
         health_percent = (self.hp / self.max_hp) * 100
@@ -662,6 +454,9 @@ class Character:
         return None
 
 class Enemy:
+    __slots__ = ('name', 'level', 'type', 'description', 'hp', 'max_hp',
+                 'attack', 'defense', 'exp_reward', 'evasion')
+
     def __init__(self, name, level, enemy_type, description):
         self.name = name
         self.level = level
@@ -673,6 +468,20 @@ class Enemy:
         self.defense = 2 + level
         self.exp_reward = 25 * level
         self.evasion = 0
+    
+    STATE_FIELDS = __slots__
+    
+    def to_state(self):
+        """Enemy state as plain JSON-friendly data"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+    
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild an enemy from to_state() output"""
+        enemy = cls.__new__(cls)
+        for field in cls.STATE_FIELDS:
+            setattr(enemy, field, state[field])
+        return enemy
         
     def take_damage(self, damage):
         actual_damage = max(1, damage - self.defense)
@@ -680,6 +489,9 @@ class Enemy:
         return actual_damage
 
 class BossEnemy:
+    __slots__ = ('name', 'level', 'description', 'zone', 'hp', 'max_hp',
+                 'attack', 'defense', 'exp_reward', 'defeated', 'evasion')
+
     def __init__(self, name, level, description, zone_number):
         self.name = name
         self.level = level
@@ -693,6 +505,20 @@ class BossEnemy:
         self.exp_reward = 150 * level  # Was 100 * level
         self.defeated = False
         self.evasion = 0
+    
+    STATE_FIELDS = __slots__
+    
+    def to_state(self):
+        """Boss state as plain JSON-friendly data - HP persists between attempts"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+    
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a boss from to_state() output"""
+        boss = cls.__new__(cls)
+        for field in cls.STATE_FIELDS:
+            setattr(boss, field, state[field])
+        return boss
         
     def take_damage(self, damage):
         actual_damage = max(1, damage - self.defense)
@@ -722,6 +548,23 @@ class GlobalSkillTree:
         }
         self.current_character_bonus = {}
     
+    def to_state(self):
+        """Skill levels and active specialization as plain data"""
+        return {
+            'levels': {name: skill['level'] for name, skill in self.skills.items()},
+            'character_bonus': dict(self.current_character_bonus),
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a skill tree from to_state() output"""
+        tree = cls()
+        for name, level in state['levels'].items():
+            if name in tree.skills:
+                tree.skills[name]['level'] = level
+        tree.current_character_bonus = dict(state.get('character_bonus', {}))
+        return tree
+    
     def set_character_bonus(self, character_name):
         # PHASE 2.5: Enhanced specializations for character diversity
         bonuses = {
@@ -831,10 +674,10 @@ class GlobalSkillTree:
             return f"+{actual_bonus} (⚠️ Diminished)"
 
 
-def create_class_1a():
-    """Creates all 21 Class 1-A characters with updated dialogue and Aizawa responses
+def build_class_1a_templates():
+    """Creates all 21 Class 1-A templates with updated dialogue and Aizawa responses
     Character order: Alphabetical by last name (Japanese style)"""
-    characters = []
+    templates = []
     
     # Format: (name, quirk, {abilities}, stats, dialogue, aizawa_dialogue, hidden)
     # Abilities format: "name": (damage, energy_cost, ability_type, description)
@@ -1161,9 +1004,526 @@ def create_class_1a():
     ]
     
     for data in class_data:
-        characters.append(Character(data[0], data[1], data[2], data[3], data[4], data[5], data[6]))
+        templates.append(CharacterTemplate(data[0], data[1], data[2], data[3], data[4], data[5], data[6]))
+    
+    return tuple(templates)
+
+
+# Shared by every session in the process - built on first use
+_class_1a_templates = None
+_templates_by_name = {}
+_templates_lock = threading.Lock()
+
+
+def get_class_1a_templates():
+    """The shared Class 1-A templates, in roster order"""
+    global _class_1a_templates
+    if _class_1a_templates is None:
+        with _templates_lock:
+            if _class_1a_templates is None:
+                templates = build_class_1a_templates()
+                _templates_by_name.update((t.name, t) for t in templates)
+                _class_1a_templates = templates
+    return _class_1a_templates
+
+
+def get_character_template(name):
+    """Shared template for one student (None if unknown)"""
+    get_class_1a_templates()
+    return _templates_by_name.get(name)
+
+
+def create_class_1a():
+    """Fresh run state for all 21 Class 1-A characters over the shared templates"""
+    return [Character.from_template(template) for template in get_class_1a_templates()]
+
+def get_team_up_attacks(character_name):
+    """Team-up attacks for a character, keyed by partner name"""
+    team_ups = {
+        'Ochaco Uraraka': {
+            'Tsuyu Asui': {
+                'name': 'Fafrotskies',
+                'damage': 80,
+                'energy': 35,
+                'desc': "Asui's tongue swipes at debris floated by Uraraka, sending it hurtling at the enemy"
+            },
+            'Hanta Sero': {
+                'name': 'Meteor Barrage',
+                'damage': 75,
+                'energy': 32,
+                'desc': "Uraraka releases floated debris strung together by Sero's tape in a devastating barrage"
+            },
+            'Izuku Midoriya': {
+                'name': 'You Can Do It!',
+                'damage': 90,
+                'energy': 38,
+                'desc': "Uraraka floats the enemy, leaving them defenseless against a powered-up Smash from Midoriya"
+            },
+            'Eijiro Kirishima': {
+                'name': 'Manly Hammer',
+                'damage': 85,
+                'energy': 36,
+                'desc': "After removing gravity's effects from Kirishima, Uraraka swings his hardened form violently at the enemy"
+            },
+            'Mina Ashido': {
+                'name': 'Rainy Day',
+                'damage': 78,
+                'energy': 34,
+                'desc': "After having Uraraka float her, Mina splashes down a rain of corrosive acid on the enemy"
+            },
+            'Katsuki Bakugo': {
+                'name': 'Shotgun Blast',
+                'damage': 88,
+                'energy': 37,
+                'desc': "A pile of floated debris becomes explosive buckshot as Bakugo detonates it from behind"
+            },
+            'Rikido Sato': {
+                'name': 'Mochi Pounding',
+                'damage': 82,
+                'energy': 35,
+                'desc': "Equipped with weightless mochi hammers, Uraraka and Sato pulverize the enemy"
+            },
+        },
+        'Tsuyu Asui': {
+            'Ochaco Uraraka': {
+                'name': 'Fafrotskies',
+                'damage': 80,
+                'energy': 35,
+                'desc': "Asui's tongue swipes at debris floated by Uraraka, sending it hurtling at the enemy"
+            },
+            'Katsuki Bakugo': {
+                'name': 'Froppenheimer',
+                'damage': 95,
+                'energy': 40,
+                'desc': "Bakugo infuses his sweat with Asui's toxic mucus to create devastating sticky explosives"
+            },
+            'Mashirao Ojiro': {
+                'name': 'Frog Stance',
+                'damage': 77,
+                'energy': 33,
+                'desc': "Slathered in Asui's toxic mucus, Ojiro strikes the enemy's pressure points with precision"
+            },
+            'Minoru Mineta': {
+                'name': 'Perv Swerve',
+                'damage': 70,
+                'energy': 30,
+                'desc': "Fed up with Mineta's perverted ways, Asui sends him hurtling at the enemy like a cannonball"
+            },
+            'Toru Hagakure': {
+                'name': 'Covert Frops',
+                'damage': 83,
+                'energy': 36,
+                'desc': "An invisible Hagakure and camouflaged Asui wreak havoc on the unsuspecting enemy"
+            },
+            'Mezo Shoji': {
+                'name': 'Octo Frog',
+                'damage': 86,
+                'energy': 37,
+                'desc': "Keeping warm on Shoji's back, Asui and Shoji unleash a myriad of heteromorphic attacks (Negates Cold Penalty)"
+            },
+        },
+        'Tenya Iida': {
+            'Shoto Todoroki': {
+                'name': 'Ice Jet',
+                'damage': 92,
+                'energy': 39,
+                'desc': "Iida propels a fighter jet made of pure ice at blistering speed toward the enemy"
+            },
+            'Izuku Midoriya': {
+                'name': 'Race to You',
+                'damage': 87,
+                'energy': 37,
+                'desc': "Midoriya and Iida charge at full speed, sandwiching the enemy between two devastating kicks"
+            },
+        },
+        'Momo Yaoyorozu': {
+            'Denki Kaminari': {
+                'name': 'Electromagnetic Railgun',
+                'damage': 98,
+                'energy': 42,
+                'desc': "Yaoyorozu's created railgun fires with devastating force, powered by Kaminari's electricity"
+            },
+            'Kyoka Jiro': {
+                'name': 'Death Amp',
+                'damage': 94,
+                'energy': 40,
+                'desc': "Jiro plugs into a supersized amplifier created by Yaoyorozu for catastrophic sonic damage"
+            },
+            'Rikido Sato': {
+                'name': 'Sweet Tea',
+                'damage': 79,
+                'energy': 34,
+                'desc': "Yaoyorozu and Sato share sweets, replenishing their strength for an all-out combined attack"
+            },
+            'Fumikage Tokoyami': {
+                'name': 'Stare into the Abyss',
+                'damage': 91,
+                'energy': 38,
+                'desc': "Yaoyorozu creates night-vision goggles for Tokoyami, allowing Dark Shadow to strike with perfect precision"
+            },
+            'Izuku Midoriya': {
+                'name': 'Peak Midoriya',
+                'damage': 89,
+                'energy': 37,
+                'desc': "Yaoyorozu and Midoriya formulate the perfect attack targeting the enemy's weakness (May contain rambling)"
+            },
+        },
+        'Izuku Midoriya': {
+            'Katsuki Bakugo': {
+                'name': 'Howitzer Blitz',
+                'damage': 100,
+                'energy': 45,
+                'desc': "Building centrifugal force with Howitzer Impact, Bakugo hurls Midoriya for a massive explosive Smash"
+            },
+            'Ochaco Uraraka': {
+                'name': 'You Can Do It!',
+                'damage': 90,
+                'energy': 38,
+                'desc': "Uraraka floats the enemy, leaving them defenseless against a powered-up Smash from Midoriya"
+            },
+            'Tenya Iida': {
+                'name': 'Race to You',
+                'damage': 87,
+                'energy': 37,
+                'desc': "Midoriya and Iida charge at full speed, sandwiching the enemy between two devastating kicks"
+            },
+            'Shoto Todoroki': {
+                'name': 'Ice Shards',
+                'damage': 96,
+                'energy': 41,
+                'desc': "Todoroki unleashes his Heaven-Piercing Ice Wall, followed by Midoriya's Smash sending ice shards flying"
+            },
+            'Momo Yaoyorozu': {
+                'name': 'Peak Midoriya',
+                'damage': 89,
+                'energy': 37,
+                'desc': "Yaoyorozu and Midoriya formulate the perfect attack targeting the enemy's weakness (May contain rambling)"
+            },
+        },
+        'Katsuki Bakugo': {
+            'Izuku Midoriya': {
+                'name': 'Howitzer Blitz',
+                'damage': 100,
+                'energy': 45,
+                'desc': "Building centrifugal force with Howitzer Impact, Bakugo hurls Midoriya for a massive explosive Smash"
+            },
+            'Eijiro Kirishima': {
+                'name': 'Bombshell',
+                'damage': 93,
+                'energy': 39,
+                'desc': "Bakugo launches a fully hardened Kirishima at the enemy with a devastating explosion"
+            },
+            'Tsuyu Asui': {
+                'name': 'Froppenheimer',
+                'damage': 95,
+                'energy': 40,
+                'desc': "Bakugo infuses his sweat with Asui's toxic mucus to create devastating sticky explosives"
+            },
+            'Yuga Aoyama': {
+                'name': 'Sparkler',
+                'damage': 76,
+                'energy': 33,
+                'desc': "In an unlikely team-up, Aoyama and Bakugo dazzle the enemy with a blinding sparkling attack"
+            },
+            'Ochaco Uraraka': {
+                'name': 'Shotgun Blast',
+                'damage': 88,
+                'energy': 37,
+                'desc': "A pile of floated debris becomes explosive buckshot as Bakugo detonates it from behind"
+            },
+        },
+        'Shoto Todoroki': {
+            'Tenya Iida': {
+                'name': 'Ice Jet',
+                'damage': 92,
+                'energy': 39,
+                'desc': "Iida propels a fighter jet made of pure ice at blistering speed toward the enemy"
+            },
+            'Izuku Midoriya': {
+                'name': 'Ice Shards',
+                'damage': 96,
+                'energy': 41,
+                'desc': "Todoroki unleashes his Heaven-Piercing Ice Wall, followed by Midoriya's Smash sending ice shards flying"
+            },
+        },
+        'Eijiro Kirishima': {
+            'Katsuki Bakugo': {
+                'name': 'Bombshell',
+                'damage': 93,
+                'energy': 39,
+                'desc': "Bakugo launches a fully hardened Kirishima at the enemy with a devastating explosion"
+            },
+            'Ochaco Uraraka': {
+                'name': 'Manly Hammer',
+                'damage': 85,
+                'energy': 36,
+                'desc': "After removing gravity's effects from Kirishima, Uraraka swings his hardened form violently at the enemy"
+            },
+        },
+        'Denki Kaminari': {
+            'Momo Yaoyorozu': {
+                'name': 'Electromagnetic Railgun',
+                'damage': 98,
+                'energy': 42,
+                'desc': "Yaoyorozu's created railgun fires with devastating force, powered by Kaminari's electricity"
+            },
+            'Kyoka Jiro': {
+                'name': 'Shock Wave',
+                'damage': 90,
+                'energy': 38,
+                'desc': "A powerful combination of Jiro's sonic waves and Kaminari's shocking electricity"
+            },
+            'Mina Ashido': {
+                'name': 'Dumb Luck',
+                'damage': 85,
+                'energy': 36,
+                'desc': "You don't know how it worked. But it did. For massive damage. Pure chaotic energy"
+            },
+        },
+        'Fumikage Tokoyami': {
+            'Momo Yaoyorozu': {
+                'name': 'Stare into the Abyss',
+                'damage': 91,
+                'energy': 38,
+                'desc': "Yaoyorozu creates night-vision goggles for Tokoyami, allowing Dark Shadow to strike with perfect precision"
+            },
+        },
+        'Kyoka Jiro': {
+            'Momo Yaoyorozu': {
+                'name': 'Death Amp',
+                'damage': 94,
+                'energy': 40,
+                'desc': "Jiro plugs into a supersized amplifier created by Yaoyorozu for catastrophic sonic damage"
+            },
+            'Denki Kaminari': {
+                'name': 'Shock Wave',
+                'damage': 90,
+                'energy': 38,
+                'desc': "A powerful combination of Jiro's sonic waves and Kaminari's shocking electricity"
+            },
+        },
+        'Hanta Sero': {
+            'Ochaco Uraraka': {
+                'name': 'Meteor Barrage',
+                'damage': 75,
+                'energy': 32,
+                'desc': "Uraraka releases floated debris strung together by Sero's tape in a devastating barrage"
+            },
+            'Minoru Mineta': {
+                'name': 'Sticky Tape',
+                'damage': 72,
+                'energy': 31,
+                'desc': "Sero and Mineta unleash a barrage of tape and sticky balls, immobilizing the opponent for a massive strike"
+            },
+        },
+        'Mashirao Ojiro': {
+            'Toru Hagakure': {
+                'name': 'Never Saw it Coming',
+                'damage': 81,
+                'energy': 35,
+                'desc': "Hagakure stuns the enemy with her light refraction, leaving them open for an Ojiro finishing strike"
+            },
+            'Tsuyu Asui': {
+                'name': 'Frog Stance',
+                'damage': 77,
+                'energy': 33,
+                'desc': "Slathered in Asui's toxic mucus, Ojiro strikes the enemy's pressure points with precision"
+            },
+        },
+        'Toru Hagakure': {
+            'Yuga Aoyama': {
+                'name': 'Navel Refraction',
+                'damage': 84,
+                'energy': 36,
+                'desc': "Aoyama blasts Hagakure with a powerful beam that she refracts back for amplified damage"
+            },
+            'Mashirao Ojiro': {
+                'name': 'Never Saw it Coming',
+                'damage': 81,
+                'energy': 35,
+                'desc': "Hagakure stuns the enemy with her light refraction, leaving them open for an Ojiro finishing strike"
+            },
+            'Tsuyu Asui': {
+                'name': 'Covert Frops',
+                'damage': 83,
+                'energy': 36,
+                'desc': "An invisible Hagakure and camouflaged Asui wreak havoc on the unsuspecting enemy"
+            },
+        },
+        'Minoru Mineta': {
+            'Hanta Sero': {
+                'name': 'Sticky Tape',
+                'damage': 72,
+                'energy': 31,
+                'desc': "Sero and Mineta unleash a barrage of tape and sticky balls, immobilizing the opponent for a massive strike"
+            },
+            'Tsuyu Asui': {
+                'name': 'Perv Swerve',
+                'damage': 70,
+                'energy': 30,
+                'desc': "Fed up with Mineta's perverted ways, Asui sends him hurtling at the enemy like a cannonball"
+            },
+        },
+        'Rikido Sato': {
+            'Momo Yaoyorozu': {
+                'name': 'Sweet Tea',
+                'damage': 79,
+                'energy': 34,
+                'desc': "Yaoyorozu and Sato share sweets, replenishing their strength for an all-out combined attack"
+            },
+            'Ochaco Uraraka': {
+                'name': 'Mochi Pounding',
+                'damage': 82,
+                'energy': 35,
+                'desc': "Equipped with weightless mochi hammers, Uraraka and Sato pulverize the enemy"
+            },
+        },
+        'Yuga Aoyama': {
+            'Toru Hagakure': {
+                'name': 'Navel Refraction',
+                'damage': 84,
+                'energy': 36,
+                'desc': "Aoyama blasts Hagakure with a powerful beam that she refracts back for amplified damage"
+            },
+            'Katsuki Bakugo': {
+                'name': 'Sparkler',
+                'damage': 76,
+                'energy': 33,
+                'desc': "In an unlikely team-up, Aoyama and Bakugo dazzle the enemy with a blinding sparkling attack"
+            },
+        },
+        'Mina Ashido': {
+            'Ochaco Uraraka': {
+                'name': 'Rainy Day',
+                'damage': 78,
+                'energy': 34,
+                'desc': "After having Uraraka float her, Mina splashes down a rain of corrosive acid on the enemy"
+            },
+            'Denki Kaminari': {
+                'name': 'Dumb Luck',
+                'damage': 85,
+                'energy': 36,
+                'desc': "You don't know how it worked. But it did. For massive damage. Pure chaotic energy"
+            },
+        },
+        'Mezo Shoji': {
+            'Tsuyu Asui': {
+                'name': 'Octo Frog',
+                'damage': 86,
+                'energy': 37,
+                'desc': "Keeping warm on Shoji's back, Asui and Shoji unleash a myriad of heteromorphic attacks (Negates Cold Penalty)"
+            },
+        },
+    }
     
-    return characters
+    return team_ups.get(character_name, {})
+
+
+def get_unique_passive(character_name):
+    """Unique passive ability for a character (None if they have none)"""
+    passives = {
+        # RESCUE SPECIALISTS
+        'Tenya Iida': {
+            'type': 'rescue_boost',
+            'value': 2.0,
+            'desc': '🏃 Recipro Search - 2x chance to find captured students'
+        },
+        'Mezo Shoji': {
+            'type': 'civilian_boost',
+            'value': 2.0,
+            'desc': '👥 Dupli-Arms Scout - 2x chance to find civilians'
+        },
+        'Kyoka Jiro': {
+            'type': 'civilian_boost',
+            'value': 1.8,
+            'desc': '👥 Heartbeat Detection - 1.8x chance to find civilians'
+        },
+        
+        # EXPLORATION SPECIALISTS
+        'Toru Hagakure': {
+            'type': 'passage_boost',
+            'value': 3.0,
+            'desc': '🔍 Invisible Scout - 3x chance to find secret passages'
+        },
+        'Minoru Mineta': {
+            'type': 'passage_boost',
+            'value': 2.0,
+            'desc': '🔍 Pop Off Exploration - 2x chance to find passages'
+        },
+        'Fumikage Tokoyami': {
+            'type': 'secret_detection',
+            'value': 25,
+            'desc': '🔍 Dark Shadow Search - +25% POI discovery'
+        },
+        'Hanta Sero': {
+            'type': 'civilian_boost',
+            'value': 1.5,
+            'desc': '🕷️ Tape Rescue - 1.5x chance to find civilians (reaches hard-to-access places)'
+        },
+        'Tsuyu Asui': {
+            'type': 'civilian_boost',
+            'value': 1.3,
+            'desc': '🐸 Frog Sense - 1.3x chance to find civilians'
+        },
+        
+        # ITEM SPECIALISTS
+        'Momo Yaoyorozu': {
+            'type': 'item_boost',
+            'value': 2.5,
+            'desc': '💎 Creation Analysis - 2.5x better item discovery'
+        },
+        'Koji Koda': {
+            'type': 'item_boost',
+            'value': 1.5,
+            'desc': '💎 Animal Friends - 1.5x better item discovery'
+        },
+        'Rikido Sato': {
+            'type': 'recovery_item_boost',
+            'value': 2.0,
+            'desc': '🍬 Sugar Rush Finder - 2x chance to find recovery items'
+        },
+        
+        # COMBAT SPECIALISTS
+        'Katsuki Bakugo': {
+            'type': 'ambush_master',
+            'value': 30,
+            'desc': '💥 Explosive Entry - +30% first strike damage'
+        },
+        'Eijiro Kirishima': {
+            'type': 'damage_reduction',
+            'value': 10,
+            'desc': '🛡️ Hardening Armor - -10% damage taken'
+        },
+        'Shoto Todoroki': {
+            'type': 'versatile',
+            'value': 5,
+            'desc': '❄️🔥 Dual Element - +5% all combat stats'
+        },
+        'Mashirao Ojiro': {
+            'type': 'last_stand',
+            'value': 2.0,
+            'desc': '🥋 Last Stand - 2x damage when HP ≤ 25%'
+        },
+        'Izuku Midoriya': {
+            'type': 'defensive_instinct',
+            'value': 2.0,
+            'desc': '💚 Defensive Instinct - 2x defense when HP ≤ 25%'
+        },
+        'Denki Kaminari': {
+            'type': 'stun_chance',
+            'value': 33,
+            'desc': '⚡ Electric Shock - 33% chance to stun enemy on hit'
+        },
+        
+        # SUPPORT SPECIALIST
+        'Ochaco Uraraka': {
+            'type': 'helping_hand',
+            'value': 1,
+            'desc': '🌟 Helping Hand - All students gain +5% evasion & heal +2 HP per room'
+        },
+    }
+    return passives.get(character_name, None)
+
 
 def get_character_specialty(character_name):
     """Returns display specialty for character select screen - UPDATED"""
@@ -1207,13 +1567,13 @@ def get_zone_themes():
         'facility', 'flooded', 'mountain', 'desert', 'ruins', 'underground'
     ]
 
-def get_zone_theme(zone_number, previous_theme):
+def get_zone_theme(zone_number, previous_theme, rng=random):
     """Select a theme for the zone, ensuring no consecutive repeats"""
     themes = get_zone_themes()
     available = [t for t in themes if t != previous_theme]
-    return random.choice(available)
+    return rng.choice(available)
 
-def get_zone_description(theme, zone_number):
+def get_zone_description(theme, zone_number, rng=random):
     """Get detailed zone description based on theme - 2 variants per theme"""
     descriptions = {
         'forest': [
@@ -1266,9 +1626,9 @@ def get_zone_description(theme, zone_number):
         ]
     }
     
-    return random.choice(descriptions.get(theme, [f"You enter Zone {zone_number}."]))
+    return rng.choice(descriptions.get(theme, [f"You enter Zone {zone_number}."]))
 
-def get_room_description(theme, floor):
+def get_room_description(theme, floor, rng=random):
     """Get detailed room description for exploration - 5 variants per theme"""
     rooms = {
         'forest': [
@@ -1357,9 +1717,9 @@ def get_room_description(theme, floor):
         ]
     }
     
-    return random.choice(rooms.get(theme, ["You find yourself in a nondescript area."]))
+    return rng.choice(rooms.get(theme, ["You find yourself in a nondescript area."]))
 
-def get_points_of_interest(theme):
+def get_points_of_interest(theme, rng=random):
     """Get points of interest for investigation - civilians are hidden in logical places"""
     pois = {
         'forest': [
@@ -1437,10 +1797,10 @@ def get_points_of_interest(theme):
     }
     
     available = pois.get(theme, [("something interesting", ["Health Potion"])])
-    num_pois = random.randint(1, 3)
-    return random.sample(available, min(num_pois, len(available)))
+    num_pois = rng.randint(1, 3)
+    return rng.sample(available, min(num_pois, len(available)))
 
-def investigate_poi(character, poi_desc, outcomes, theme):
+def investigate_poi(character, poi_desc, outcomes, theme, rng=random):
     """Handle point of interest investigation - includes civilian rescues"""
     print(f"\nYou investigate {poi_desc}...")
     time.sleep(0.3)
@@ -1448,13 +1808,13 @@ def investigate_poi(character, poi_desc, outcomes, theme):
     secret_chance = 20 + character.secret_detection
     item_chance = 60 + character.item_find_bonus
     
-    outcome = random.choice(outcomes)
+    outcome = rng.choice(outcomes)
     
     if outcome == "civilian":
         # CIVILIAN RESCUE - Large EXP reward
         civilian_names = ["a scientist", "a worker", "a maintenance tech", "a researcher", "a security guard", "a janitor"]
-        civilian = random.choice(civilian_names)
-        exp_reward = random.randint(150, 250)
+        civilian = rng.choice(civilian_names)
+        exp_reward = rng.randint(150, 250)
         
         print(f"\nYou found {civilian} trapped here!")
         print(f"You quickly help them to safety.")
@@ -1463,7 +1823,7 @@ def investigate_poi(character, poi_desc, outcomes, theme):
         print(f"Gained {exp_reward} EXP for the rescue!")
         
     elif outcome == "secret_path":
-        if random.random() * 100 < secret_chance:
+        if rng.random() * 100 < secret_chance:
             print(f"\nYou discovered a secret path! Hidden cache found!")
             character.inventory.append("Health Potion")
             character.inventory.append("Energy Drink")
@@ -1476,7 +1836,7 @@ def investigate_poi(character, poi_desc, outcomes, theme):
         return "ambush"
         
     elif outcome in ["Health Potion", "Energy Drink"]:
-        if random.random() * 100 < item_chance:
+        if rng.random() * 100 < item_chance:
             character.inventory.append(outcome)
             print(f"\nYou found: {outcome}!")
         else:
@@ -1486,7 +1846,7 @@ def investigate_poi(character, poi_desc, outcomes, theme):
     
     return None
 
-def create_boss(zone_number):
+def create_boss(zone_number, rng=random):
     """Create boss for the zone - REBALANCED with generic early bosses"""
     if zone_number <= 5:
         bosses = [
@@ -1511,11 +1871,11 @@ def create_boss(zone_number):
             ("Gigantomachia", "A massive giant of living stone."),
         ]
     
-    boss_data = random.choice(bosses)
+    boss_data = rng.choice(bosses)
     level = zone_number + 2
     return BossEnemy(boss_data[0], level, boss_data[1], zone_number)
 
-def create_enemy(zone, floor):
+def create_enemy(zone, floor, rng=random):
     """Create regular enemy"""
     enemy_types = [
         ("Villain Thug", "A low-level criminal."),
@@ -1523,7 +1883,7 @@ def create_enemy(zone, floor):
         ("Nomu", "A bio-engineered creature."),
     ]
     
-    enemy_type = random.choice(enemy_types)
+    enemy_type = rng.choice(enemy_types)
     level = zone + (floor // 2)
     return Enemy(enemy_type[0], level, enemy_type[1], enemy_type[1])
 
@@ -1532,13 +1892,13 @@ def apply_global_bonuses(character, global_tree):
     character.attack = character.base_attack + global_tree.get_attack_bonus()
     character.defense = character.base_defense + global_tree.get_defense_bonus()
 
-def check_rescue_event(characters, zone_start=False):
+def check_rescue_event(characters, zone_start=False, rng=random):
     """Check for rescue events - COMPLETE SYSTEM"""
     captured = [c for c in characters if c.captured]
     
     # Shinso unlock event - only if no captures
     if not any(c.captured for c in characters):
-        if zone_start and random.random() < 0.05:  # 5% chance at zone start
+        if zone_start and rng.random() < 0.05:  # 5% chance at zone start
             shinso = next((c for c in characters if c.name == "Hitoshi Shinso"), None)
             if shinso and not shinso.unlocked:
                 print("\n" + "="*70)
@@ -1559,12 +1919,12 @@ def check_rescue_event(characters, zone_start=False):
     
     chance = 0.20 if zone_start else 0.35
     
-    if random.random() < chance:
+    if rng.random() < chance:
         print("\n" + "="*70)
         print("RESCUE EVENT!")
         print("="*70)
         
-        if random.random() < 0.60:  # 60% choose rescue
+        if rng.random() < 0.60:  # 60% choose rescue
             print("\n[Aizawa]: \"We've located some of your captured classmates.\"")
             print("[Aizawa]: \"Choose who to rescue.\"")
             print()
@@ -1586,7 +1946,7 @@ def check_rescue_event(characters, zone_start=False):
             except:
                 pass
         else:  # 40% auto rescue
-            rescued = random.choice(captured)
+            rescued = rng.choice(captured)
             rescued.captured = False
             rescued.hp = rescued.max_hp // 2
             rescued.energy = rescued.max_energy // 2
@@ -1637,7 +1997,7 @@ def select_character(available_characters, global_tree):
         except ValueError:
             print("Please enter a number.")
 
-def combat(character, enemy, global_tree, is_boss=False, ambush=False):
+def combat(character, enemy, global_tree, is_boss=False, ambush=False, rng=random):
     """Combat system with REWORKED quirk abilities (stun, buffs, debuffs)"""
     print(f"\n{'='*70}")
     print(f"COMBAT!")
@@ -1652,7 +2012,7 @@ def combat(character, enemy, global_tree, is_boss=False, ambush=False):
     # Ambush gives first free attack
     if ambush:
         print("\nYou strike first!")
-        damage = character.attack + random.randint(-3, 5)
+        damage = character.attack + rng.randint(-3, 5)
         actual = enemy.take_damage(damage)
         print(f"Dealt {actual} damage!")
     
@@ -1683,7 +2043,7 @@ def combat(character, enemy, global_tree, is_boss=False, ambush=False):
         choice = input("Action: ")
         
         if choice == "1":
-            damage = character.attack + random.randint(-3, 5)
+            damage = character.attack + rng.randint(-3, 5)
             actual = enemy.take_damage(damage)
             print(f"\nDealt {actual} damage!")
             
@@ -1804,10 +2164,10 @@ def combat(character, enemy, global_tree, is_boss=False, ambush=False):
             else:
                 # Check evasion
                 total_evasion = character.evasion + global_tree.get_evasion_bonus()
-                if random.random() * 100 < total_evasion:
+                if rng.random() * 100 < total_evasion:
                     print(f"\n{character.name} evaded the attack!")
                 else:
-                    damage = enemy.attack + random.randint(-2, 4)
+                    damage = enemy.attack + rng.randint(-2, 4)
                     actual = character.take_damage(damage)
                     print(f"\nTook {actual} damage from {enemy.name}!")
         
@@ -1824,8 +2184,8 @@ def combat(character, enemy, global_tree, is_boss=False, ambush=False):
         character.gain_exp(enemy.exp_reward)
         
         # Random item drop
-        if random.random() < 0.3:
-            item = random.choice(["Health Potion", "Energy Drink"])
+        if rng.random() < 0.3:
+            item = rng.choice(["Health Potion", "Energy Drink"])
             character.inventory.append(item)
             print(f"Found: {item}")
         
@@ -1834,7 +2194,7 @@ def combat(character, enemy, global_tree, is_boss=False, ambush=False):
         print(f"\nDefeated...")
         return False
 
-def generate_zone_map():
+def generate_zone_map(rng=random):
     """Generate a 5-room map with cardinal directions
     Returns: dict with room connections and boss room location"""
     
@@ -1902,7 +2262,27 @@ def generate_zone_map():
         },
     ]
     
-    return random.choice(layouts)
+    return rng.choice(layouts)
+
+def zone_map_to_state(zone_map):
+    """Convert a zone map to JSON-friendly data (room ids become list entries)"""
+    if zone_map is None:
+        return None
+    return {
+        'start': zone_map['start'],
+        'boss_room': zone_map['boss_room'],
+        'rooms': [[room_id, room] for room_id, room in zone_map['rooms'].items()],
+    }
+
+def zone_map_from_state(state):
+    """Inverse of zone_map_to_state()"""
+    if state is None:
+        return None
+    return {
+        'start': state['start'],
+        'boss_room': state['boss_room'],
+        'rooms': {room_id: dict(room) for room_id, room in state['rooms']},
+    }
 
 def display_map(zone_map, current_room, visited_rooms):
     """Display a simple ASCII map showing visited rooms and current position"""
@@ -1931,31 +2311,31 @@ def display_map(zone_map, current_room, visited_rooms):
     
     print("-----------\n")
 
-def explore_floor(character, theme, floor, zone, global_tree):
+def explore_floor(character, theme, floor, zone, global_tree, rng=random):
     """Main exploration loop for a floor"""
     print(f"\n{'='*70}")
     print(f"FLOOR {floor} - Zone {zone}")
     print(f"{'='*70}")
     
     # Room description
-    print(f"\n{get_room_description(theme, floor)}")
+    print(f"\n{get_room_description(theme, floor, rng=rng)}")
     
     # Check for enemy avoidance
-    if random.random() * 100 < character.enemy_avoid_chance:
+    if rng.random() * 100 < character.enemy_avoid_chance:
         print("\nYour keen instincts help you avoid an enemy encounter!")
         return True
     
     # Check for ambush
-    has_enemy = random.random() < 0.6  # 60% chance of enemy
-    if has_enemy and random.random() * 100 < character.ambush_chance:
+    has_enemy = rng.random() < 0.6  # 60% chance of enemy
+    if has_enemy and rng.random() * 100 < character.ambush_chance:
         print("\nYou spot an enemy before they see you!")
-        enemy = create_enemy(zone, floor)
-        if not combat(character, enemy, global_tree, ambush=True):
+        enemy = create_enemy(zone, floor, rng=rng)
+        if not combat(character, enemy, global_tree, ambush=True, rng=rng):
             return False
         has_enemy = False
     
     # Points of interest
-    pois = get_points_of_interest(theme)
+    pois = get_points_of_interest(theme, rng=rng)
     
     if pois:
         print("\nYou notice:")
@@ -1972,14 +2352,14 @@ def explore_floor(character, theme, floor, zone, global_tree):
             choice_num = int(choice)
             if 1 <= choice_num <= len(pois):
                 poi_desc, outcomes = pois[choice_num - 1]
-                result = investigate_poi(character, poi_desc, outcomes, theme)
+                result = investigate_poi(character, poi_desc, outcomes, theme, rng=rng)
                 if result == "ambush":
-                    enemy = create_enemy(zone, floor)
-                    if not combat(character, enemy, global_tree):
+                    enemy = create_enemy(zone, floor, rng=rng)
+                    if not combat(character, enemy, global_tree, rng=rng):
                         return False
             elif choice_num == len(pois) + 2 and has_enemy:
-                enemy = create_enemy(zone, floor)
-                if not combat(character, enemy, global_tree):
+                enemy = create_enemy(zone, floor, rng=rng)
+                if not combat(character, enemy, global_tree, rng=rng):
                     return False
                 has_enemy = False
         except ValueError:
@@ -1988,13 +2368,13 @@ def explore_floor(character, theme, floor, zone, global_tree):
     # Regular enemy encounter if not handled
     if has_enemy:
         print("\nAn enemy appears!")
-        enemy = create_enemy(zone, floor)
-        if not combat(character, enemy, global_tree):
+        enemy = create_enemy(zone, floor, rng=rng)
+        if not combat(character, enemy, global_tree, rng=rng):
             return False
     
     return True
 
-def navigate_zone(character, zone_map, theme, zone_number, global_tree):
+def navigate_zone(character, zone_map, theme, zone_number, global_tree, rng=random):
     """Navigate through zone using cardinal directions - 5 rooms total"""
     current_room = zone_map['start']
     visited_rooms = {current_room}
@@ -2015,7 +2395,7 @@ def navigate_zone(character, zone_map, theme, zone_number, global_tree):
         display_map(zone_map, current_room, visited_rooms)
         
         # Room description
-        print(f"\n{get_room_description(theme, current_room)}")
+        print(f"\n{get_room_description(theme, current_room, rng=rng)}")
         
         # Check if this is the boss room
         if current_room == boss_room:
@@ -2035,7 +2415,7 @@ def navigate_zone(character, zone_map, theme, zone_number, global_tree):
         
         # Regular room - only explore if NOT yet visited
         if current_room not in visited_rooms or len(visited_rooms) == 1:  # Always explore first room
-            if not explore_floor(character, theme, current_room, zone_number, global_tree):
+            if not explore_floor(character, theme, current_room, zone_number, global_tree, rng=rng):
                 return "defeated"
             visited_rooms.add(current_room)
         else:
@@ -2104,10 +2484,10 @@ def navigate_zone(character, zone_map, theme, zone_number, global_tree):
             print("Invalid choice.")
             time.sleep(0.5)
 
-def get_character_skill_tree(character_name):
-    """Returns character-specific skill tree (simplified version)"""
+def build_character_skill_trees():
+    """Character-specific skill trees by name (simplified version)"""
     # PHASE 2: Personal skills strengthened by 1.5x (combat) to justify risk of losing them
-    skill_trees = {
+    return {
         "Izuku Midoriya": {
             'full_cowling_mastery': {'level': 0, 'max': 3, 'type': 'combat', 
                                      'desc': 'Increases attack by 9 per level', 
@@ -2295,7 +2675,14 @@ def get_character_skill_tree(character_name):
                                      'bonus': {'evasion': 12}},  # Was 8
         },
     }
-    return skill_trees.get(character_name, {})
+
+# Built once at import - skill trees never change and every skill menu looks one up
+CHARACTER_SKILL_TREES = _freeze(build_character_skill_trees())
+_NO_SKILL_TREE = MappingProxyType({})
+
+def get_character_skill_tree(character_name):
+    """Returns character-specific skill tree (shared and read-only)"""
+    return CHARACTER_SKILL_TREES.get(character_name, _NO_SKILL_TREE)
 
 def skill_tree_menu(character, global_tree):
     """Interactive skill tree menu"""
@@ -2384,7 +2771,7 @@ def personal_skill_menu(character):
             current_level = character.personal_skills.get(skill_id, 0)
             
             if current_level < skill_data['max']:
-                character.personal_skills[skill_id] = current_level + 1
+                character.upgrade_personal_skill(skill_id)
                 character.skill_points -= 1
                 
                 # Apply bonuses
@@ -0,0 +1,174 @@
+"""
+SESSION BACKENDS
+Where serialized game sessions live between requests.
+The in-memory SessionStore is a cache in front of one of these, so a session
+that is missing locally (restart, different worker) can be loaded on demand.
+"""
+
+import sqlite3
+import threading
+import time
+
+
+class VersionConflict(Exception):
+    """Another worker saved the session since this copy was loaded"""
+
+
+class SessionBackend:
+    """Interface every session backend implements"""
+
+    def load(self, session_id):
+        """Return (data, version) or None if the session is unknown"""
+        raise NotImplementedError
+
+    def version(self, session_id):
+        """Return the stored version number or None - must be cheap"""
+        raise NotImplementedError
+
+    def save(self, session_id, data, expected=None):
+        """Store serialized data and return the new version number
+
+        Compare-and-swap: expected is the version the data was based on (None
+        for a new session). Raises VersionConflict if the stored version is
+        anything else, so concurrent workers can't silently drop a turn.
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        """Forget a session"""
+        raise NotImplementedError
+
+    def purge(self, max_age):
+        """Drop sessions not saved for max_age seconds, return how many"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(SessionBackend):
+    """Process-local backend - mainly for tests and single-worker setups"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            record = self._data.get(session_id)
+        if record is None:
+            return None
+        return record[0], record[1]
+
+    def version(self, session_id):
+        record = self._data.get(session_id)
+        return record[1] if record else None
+
+    def save(self, session_id, data, expected=None):
+        with self._lock:
+            old = self._data.get(session_id)
+            current = old[1] if old else None
+            if current != expected:
+                raise VersionConflict(session_id)
+            version = current + 1 if old else 1
+            self._data[session_id] = (data, version, time.time())
+        return version
+
+    def delete(self, session_id):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def purge(self, max_age):
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = [sid for sid, record in self._data.items() if record[2] < cutoff]
+            for session_id in stale:
+                del self._data[session_id]
+        return len(stale)
+
+
+class SQLiteBackend(SessionBackend):
+    """SQLite file shared by every worker process on the box"""
+
+    def __init__(self, path='sessions.db'):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            ' session_id TEXT PRIMARY KEY,'
+            ' data BLOB NOT NULL,'
+            ' version INTEGER NOT NULL,'
+            ' updated REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)')
+        conn.commit()
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._connect().execute(
+            'SELECT data, version FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+    def version(self, session_id):
+        row = self._connect().execute(
+            'SELECT version FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, session_id, data, expected=None):
+        if expected is None:
+            row = self._connect().execute(
+                'INSERT INTO sessions (session_id, data, version, updated) VALUES (?, ?, 1, ?) '
+                'ON CONFLICT (session_id) DO NOTHING RETURNING version',
+                (session_id, sqlite3.Binary(data), time.time())
+            ).fetchone()
+        else:
+            row = self._connect().execute(
+                'UPDATE sessions SET data = ?, version = version + 1, updated = ? '
+                'WHERE session_id = ? AND version = ? RETURNING version',
+                (sqlite3.Binary(data), time.time(), session_id, expected)
+            ).fetchone()
+        if row is None:
+            raise VersionConflict(session_id)
+        return row[0]
+
+    def delete(self, session_id):
+        self._connect().execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def purge(self, max_age):
+        cursor = self._connect().execute(
+            'DELETE FROM sessions WHERE updated < ?', (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def make_backend(spec):
+    """Build a backend from a config string: 'none', 'memory', 'sqlite' or 'sqlite:<path>'"""
+    if not spec or spec == 'none':
+        return None
+    if spec == 'memory':
+        return MemoryBackend()
+    if spec == 'sqlite':
+        return SQLiteBackend()
+    if spec.startswith('sqlite:'):
+        return SQLiteBackend(spec[len('sqlite:'):])
+    raise ValueError(f"Unknown session backend: {spec}")
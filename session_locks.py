@@ -0,0 +1,88 @@
+"""
+SESSION LOCKS
+One mutex per session, so two requests for the same game never run its
+handlers at the same time while different sessions proceed in parallel.
+Locks are created on first use and dropped as soon as nobody holds or waits
+for them, so idle sessions cost nothing here.
+
+    locks = SessionLocks()               # threaded servers (Flask)
+    with locks.hold(session_id):
+        ...
+
+    locks = AsyncSessionLocks()          # asyncio servers (asgi_app.py)
+    async with locks.hold(session_id):
+        ...
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+
+class _Slot:
+    """A lock plus how many requests hold or wait for it"""
+    __slots__ = ('lock', 'users')
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.users = 0
+
+
+class SessionLocks:
+    """Per-session threading locks"""
+
+    def __init__(self):
+        self._slots = {}
+        self._guard = threading.Lock()
+
+    def _enter(self, session_id):
+        with self._guard:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                slot = self._slots[session_id] = _Slot(threading.Lock())
+            slot.users += 1
+        return slot
+
+    def _leave(self, session_id, slot):
+        with self._guard:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._slots[session_id]
+
+    @contextmanager
+    def hold(self, session_id):
+        """Block until this session is free, then hold it for the with-block"""
+        slot = self._enter(session_id)
+        try:
+            with slot.lock:
+                yield
+        finally:
+            self._leave(session_id, slot)
+
+    def __len__(self):
+        return len(self._slots)
+
+
+class AsyncSessionLocks:
+    """Per-session asyncio locks - use from a single event loop only"""
+
+    def __init__(self):
+        self._slots = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id):
+        """Wait (without blocking the loop) until this session is free"""
+        slot = self._slots.get(session_id)
+        if slot is None:
+            slot = self._slots[session_id] = _Slot(asyncio.Lock())
+        slot.users += 1
+        try:
+            async with slot.lock:
+                yield
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._slots[session_id]
+
+    def __len__(self):
+        return len(self._slots)
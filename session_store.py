@@ -0,0 +1,352 @@
+"""
+SESSION STORE
+Bounded replacement for the old module-level games dict.
+Sessions expire after an idle TTL and are evicted least-recently-used first
+whenever the estimated memory of all sessions goes over a byte budget.
+With a backend attached (see session_backend.py) the store becomes a cache:
+evicted or unknown sessions are loaded back from the backend on demand.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+from game_logging import get_logger
+from session_backend import VersionConflict
+
+
+# Types that never own per-session memory worth counting
+_SKIP_TYPES = (type, type(sys), type(len), type(lambda: None))
+
+log = get_logger('session_store')
+
+
+def register_shared_type(cls):
+    """Don't count instances of cls - they are shared by every session"""
+    global _SKIP_TYPES
+    if cls not in _SKIP_TYPES:
+        _SKIP_TYPES = _SKIP_TYPES + (cls,)
+
+
+def deep_sizeof(obj, seen=None):
+    """Estimate the memory held by obj and everything it references"""
+    if seen is None:
+        seen = set()
+
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        obj_id = id(current)
+        if obj_id in seen or isinstance(current, _SKIP_TYPES):
+            continue
+        seen.add(obj_id)
+        total += sys.getsizeof(current)
+
+        if isinstance(current, (dict, MappingProxyType)):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif isinstance(current, (str, bytes, int, float, bool)) or current is None:
+            continue
+        else:
+            if hasattr(current, '__dict__'):
+                stack.append(current.__dict__)
+            for klass in type(current).__mro__:
+                for slot in getattr(klass, '__slots__', ()):
+                    if hasattr(current, slot):
+                        stack.append(getattr(current, slot))
+
+    return total
+
+
+class _Entry:
+    """One stored session plus its bookkeeping"""
+    __slots__ = ('game', 'last_access', 'size', 'dirty', 'version')
+
+    def __init__(self, game, now, size, version=None):
+        self.game = game
+        self.last_access = now
+        self.size = size
+        self.dirty = False
+        self.version = version
+
+
+class SessionStore:
+    """Dict-like session container with idle TTL, LRU eviction and a memory budget"""
+
+    def __init__(self, idle_ttl=1800, max_bytes=128 * 1024 * 1024, janitor_interval=60,
+                 sizer=deep_sizeof, clock=time.monotonic,
+                 backend=None, dumps=None, loads=None, backend_ttl=7 * 24 * 3600):
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.janitor_interval = janitor_interval
+        self.sizer = sizer
+        self.clock = clock
+
+        # Optional persistent backend plus the codec used to talk to it
+        self.backend = backend
+        self.dumps = dumps
+        self.loads = loads
+        self.backend_ttl = backend_ttl
+
+        # Ordered oldest access -> newest access, so LRU eviction pops from the front
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        self._total_bytes = 0
+        self._janitor = None
+        self._stop_event = threading.Event()
+
+        self.stats = {
+            'created': 0,
+            'evicted_idle': 0,
+            'evicted_budget': 0,
+            'removed': 0,
+            'janitor_runs': 0,
+            'janitor_errors': 0,
+            'loaded': 0,
+            'saved': 0,
+            'conflicts': 0,
+            'purged': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Dict-style access (drop-in for the old games dict)
+    # ------------------------------------------------------------------
+
+    def __setitem__(self, session_id, game):
+        self.put(session_id, game)
+
+    def __getitem__(self, session_id):
+        game = self.get(session_id)
+        if game is None:
+            raise KeyError(session_id)
+        return game
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def __delitem__(self, session_id):
+        if self.pop(session_id) is None:
+            raise KeyError(session_id)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def put(self, session_id, game, version=None):
+        """Store a session and enforce the memory budget"""
+        size = self.sizer(game) if self.sizer else 0
+        with self._lock:
+            old = self._sessions.pop(session_id, None)
+            if old is not None:
+                self._total_bytes -= old.size
+                if version is None:
+                    # Same session replaced locally - still based on what was loaded
+                    version = old.version
+            elif version is None:
+                self.stats['created'] += 1
+            self._sessions[session_id] = _Entry(game, self.clock(), size, version)
+            self._total_bytes += size
+            self.enforce_budget(keep=session_id)
+
+    def get(self, session_id, default=None):
+        """Return a session and mark it as most recently used"""
+        # With a backend, another worker may have moved this session on - check
+        # the (cheap) stored version before trusting the local copy
+        remote_version = None
+        if self.backend is not None:
+            remote_version = self.backend.version(session_id)
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and (remote_version is None or remote_version == entry.version):
+                entry.last_access = self.clock()
+                entry.dirty = True
+                self._sessions.move_to_end(session_id)
+                return entry.game
+
+        if remote_version is None:
+            return default
+        game = self._load(session_id)
+        return default if game is None else game
+
+    def peek(self, session_id, default=None):
+        """In-memory session without marking it used or consulting the backend"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        return default if entry is None else entry.game
+
+    def sample(self, limit=None):
+        """Up to limit in-memory (session_id, game) pairs, most recently used first"""
+        with self._lock:
+            pairs = [(sid, entry.game) for sid, entry in reversed(self._sessions.items())]
+        return pairs if limit is None else pairs[:limit]
+
+    def _load(self, session_id):
+        """Pull a session from the backend into memory"""
+        record = self.backend.load(session_id)
+        if record is None:
+            return None
+        data, version = record
+        game = self.loads(data)
+        self.put(session_id, game, version=version)
+        self.stats['loaded'] += 1
+        return game
+
+    def save(self, session_id):
+        """Write a session through to the backend (no-op without one)
+
+        Raises VersionConflict if another worker saved it first; the stale
+        local copy is dropped, so the next get() loads theirs.
+        """
+        if self.backend is None:
+            return
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        if entry is None:
+            return
+        try:
+            version = self.backend.save(session_id, self.dumps(entry.game), entry.version)
+        except VersionConflict:
+            with self._lock:
+                if self._sessions.get(session_id) is entry:
+                    self._sessions.pop(session_id)
+                    self._total_bytes -= entry.size
+                self.stats['conflicts'] += 1
+            raise
+        entry.version = version
+        self.stats['saved'] += 1
+
+    def delete(self, session_id):
+        """Remove a session locally and from the backend"""
+        self.pop(session_id)
+        if self.backend is not None:
+            self.backend.delete(session_id)
+
+    def pop(self, session_id, default=None):
+        """Remove a session without counting it as an eviction"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                return default
+            self._total_bytes -= entry.size
+            self.stats['removed'] += 1
+            return entry.game
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def evict_idle(self, now=None):
+        """Drop every session idle for longer than the TTL"""
+        if not self.idle_ttl:
+            return 0
+        now = self.clock() if now is None else now
+        cutoff = now - self.idle_ttl
+        evicted = 0
+        with self._lock:
+            # Oldest access is always at the front
+            while self._sessions:
+                session_id, entry = next(iter(self._sessions.items()))
+                if entry.last_access > cutoff:
+                    break
+                self._evict(session_id, 'evicted_idle')
+                evicted += 1
+        return evicted
+
+    def enforce_budget(self, keep=None):
+        """Evict least recently used sessions until under the byte budget"""
+        if not self.max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            while self._total_bytes > self.max_bytes and self._sessions:
+                session_id = next(iter(self._sessions))
+                if session_id == keep:
+                    # Never evict the session we are storing right now
+                    if len(self._sessions) == 1:
+                        break
+                    self._sessions.move_to_end(session_id)
+                    continue
+                self._evict(session_id, 'evicted_budget')
+                evicted += 1
+        return evicted
+
+    def _evict(self, session_id, reason):
+        entry = self._sessions.pop(session_id)
+        self._total_bytes -= entry.size
+        self.stats[reason] += 1
+
+    def refresh_sizes(self):
+        """Re-measure sessions that were used since the last sweep"""
+        if not self.sizer:
+            return
+        with self._lock:
+            dirty = [(sid, entry) for sid, entry in self._sessions.items() if entry.dirty]
+
+        # Measure outside the lock so requests are not blocked by the walk
+        for session_id, entry in dirty:
+            size = self.sizer(entry.game)
+            with self._lock:
+                if self._sessions.get(session_id) is entry:
+                    self._total_bytes += size - entry.size
+                    entry.size = size
+                    entry.dirty = False
+
+    def sweep(self):
+        """One janitor pass: expire idle sessions, re-measure, enforce budget"""
+        self.evict_idle()
+        self.refresh_sizes()
+        self.enforce_budget()
+        if self.backend is not None and self.backend_ttl:
+            self.stats['purged'] += self.backend.purge(self.backend_ttl)
+        self.stats['janitor_runs'] += 1
+
+    # ------------------------------------------------------------------
+    # Background janitor
+    # ------------------------------------------------------------------
+
+    def start_janitor(self):
+        """Start the background cleanup thread (safe to call twice)"""
+        if self._janitor is not None and self._janitor.is_alive():
+            return
+        self._stop_event.clear()
+        self._janitor = threading.Thread(target=self._janitor_loop, name='session-janitor', daemon=True)
+        self._janitor.start()
+
+    def stop_janitor(self):
+        """Stop the background cleanup thread"""
+        self._stop_event.set()
+        if self._janitor is not None:
+            self._janitor.join(timeout=5)
+            self._janitor = None
+
+    def _janitor_loop(self):
+        while not self._stop_event.wait(self.janitor_interval):
+            try:
+                self.sweep()
+            except Exception:
+                # The janitor must never die - try again next interval. One record
+                # per interval at most, so a persistent failure can't flood the log
+                self.stats['janitor_errors'] += 1
+                log.exception("Session janitor sweep failed",
+                              extra={'janitor_errors': self.stats['janitor_errors']})
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_stats(self):
+        """Counters plus current occupancy"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['sessions'] = len(self._sessions)
+            stats['bytes'] = self._total_bytes
+            stats['max_bytes'] = self.max_bytes
+            stats['idle_ttl'] = self.idle_ttl
+            stats['backend'] = type(self.backend).__name__ if self.backend else None
+            return stats
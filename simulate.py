@@ -0,0 +1,378 @@
+"""
+HEADLESS SIMULATOR
+Plays complete runs of FullWebGame at full speed, without Flask or HTTP.
+Inputs go through process_input(), i.e. the same handlers the web game uses,
+and are chosen by scripted policies. Runs are spread over a process pool.
+
+Run with: python simulate.py --runs 2000 --workers 8 --policy greedy
+Good for balancing difficulty, and as the heaviest realistic engine workload
+for profiling (python -m cProfile simulate.py --workers 1 ...).
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from app_full import FullWebGame, process_input
+
+
+# ----------------------------------------------------------------------
+# What a policy can see
+# ----------------------------------------------------------------------
+
+class StateView:
+    """Read-only picture of a session for policies
+
+    Built either from a live game (simulator) or from the state dict the API
+    returns (load tester), so one policy works for both. Fields only a live
+    game can provide (unexplored rooms, boss room) are None otherwise.
+    """
+    __slots__ = ('pending_input', 'game_state', 'options', 'zone', 'in_combat',
+                 'hp', 'max_hp', 'energy', 'max_energy', 'skill_points', 'abilities',
+                 'items', 'new_room_keys', 'boss_key')
+
+    @classmethod
+    def from_game(cls, game):
+        view = cls()
+        view.pending_input = game.pending_input
+        view.game_state = game.game_state
+        view.options = game.current_options
+        view.zone = game.current_zone
+        view.in_combat = game.in_combat
+        view.items = list(game.shared_inventory)
+
+        char = game.selected_character
+        view._set_character(char and {
+            'hp': char.hp, 'max_hp': char.max_hp,
+            'energy': char.energy, 'max_energy': char.max_energy,
+            'skill_points': char.skill_points,
+            'abilities': {name: {'damage': data[0], 'cost': data[1]} for name, data in char.abilities.items()},
+        })
+
+        view.new_room_keys = []
+        view.boss_key = None
+        if view.pending_input == 'direction' and game.zone_map:
+            for option in view.options:
+                room = option.get('room')
+                if room is None:
+                    continue
+                if room == game.zone_map['boss_room']:
+                    view.boss_key = option['key']
+                elif room not in game.visited_rooms:
+                    view.new_room_keys.append(option['key'])
+        return view
+
+    @classmethod
+    def from_state(cls, state):
+        """From get_state_dict() output (after merging deltas)"""
+        view = cls()
+        view.pending_input = state.get('pending_input')
+        view.game_state = state.get('game_state')
+        view.options = state.get('options') or []
+        view.zone = state.get('zone')
+        view.in_combat = state.get('in_combat', False)
+        char = state.get('character')
+        view.items = list(char.get('shared_inventory', ())) if char else None
+        view.new_room_keys = None
+        view.boss_key = None
+        view._set_character(state.get('character'))
+        return view
+
+    def _set_character(self, char):
+        if char:
+            self.hp = char['hp']
+            self.max_hp = char['max_hp']
+            self.energy = char['energy']
+            self.max_energy = char['max_energy']
+            self.skill_points = char['skill_points']
+            # Quirk menu keys follow the abilities' order
+            self.abilities = [(str(i), data['damage'], data['cost'])
+                              for i, data in enumerate(char['abilities'].values(), 1)]
+        else:
+            self.hp = self.max_hp = self.energy = self.max_energy = 0
+            self.skill_points = 0
+            self.abilities = []
+
+    @property
+    def keys(self):
+        return [option['key'] for option in self.options]
+
+    @property
+    def hp_ratio(self):
+        return self.hp / self.max_hp if self.max_hp else 1.0
+
+    def option_key(self, text):
+        """Key of the option with this text, or None"""
+        for option in self.options:
+            if option.get('text') == text:
+                return option['key']
+        return None
+
+
+# ----------------------------------------------------------------------
+# Policies - policy(view, rng) -> input string, one instance per run
+# ----------------------------------------------------------------------
+
+class RandomPolicy:
+    """Presses a random offered option - good for fuzzing, bad at winning"""
+
+    def __call__(self, view, rng):
+        keys = view.keys
+        return rng.choice(keys) if keys else 'continue'
+
+
+class GreedyPolicy:
+    """Scripted player: explores, spends points, fights with its best affordable move"""
+
+    # Same state + same answer this many times in a row means we're stuck
+    STUCK_LIMIT = 4
+
+    def __init__(self):
+        self._last = None
+        self._repeats = 0
+        self._upgrade = 0
+        self._retreated_zone = None
+
+    def __call__(self, view, rng):
+        handler = getattr(self, 'on_' + str(view.pending_input), None)
+        choice = handler(view, rng) if handler else None
+        if choice is None:
+            choice = self.default(view, rng)
+
+        key = (view.pending_input, view.game_state, choice)
+        self._repeats = self._repeats + 1 if key == self._last else 0
+        self._last = key
+        if self._repeats >= self.STUCK_LIMIT:
+            choice = self.default(view, rng)
+        return choice
+
+    def default(self, view, rng):
+        keys = view.keys
+        if not keys or 'continue' in keys:
+            return 'continue'
+        return rng.choice(keys)
+
+    def on_continue(self, view, rng):
+        return 'continue'
+
+    def on_character_number(self, view, rng):
+        keys = view.keys
+        return rng.choice(keys) if keys else None
+
+    def on_direction(self, view, rng):
+        keys = view.keys
+        if view.skill_points > 0:
+            return 'skills'
+        if 'plus_ultra' in keys and view.hp_ratio < 0.35:
+            return 'plus_ultra'
+        if 'rest' in keys and view.energy < view.max_energy * 0.5:
+            return 'rest'
+        if 'search' in keys:
+            return 'search'
+        if view.new_room_keys:
+            return rng.choice(view.new_room_keys)
+        # Nothing left to explore - HP won't come back, so take on the boss
+        if view.boss_key:
+            return view.boss_key
+        directions = [k for k in keys if k in ('n', 's', 'e', 'w')]
+        return rng.choice(directions) if directions else None
+
+    def on_combat_action(self, view, rng):
+        if view.hp_ratio < 0.3:
+            plus_ultra = view.option_key('Plus Ultra')
+            if plus_ultra:
+                return plus_ultra
+            # Unknown items: don't bounce in and out of the item menu
+            if view.items and 'Health Potion' in view.items:
+                return '3'
+        team_up = view.option_key('Team-Up')
+        if team_up:
+            return team_up
+        if self._best_ability(view):
+            return '2'
+        return '1'
+
+    def on_quirk_choice(self, view, rng):
+        return self._best_ability(view) or '0'
+
+    def on_item_choice(self, view, rng):
+        wanted = 'Health Potion' if view.hp_ratio < 0.5 else 'Energy Drink'
+        return view.option_key(wanted) or view.option_key('Health Potion') or '0'
+
+    def on_team_up_choice(self, view, rng):
+        return '1'
+
+    def on_poi_investigate(self, view, rng):
+        return '1' if '1' in view.keys else '0'
+
+    def on_poi_choice(self, view, rng):
+        return '1'
+
+    def on_passage_choice(self, view, rng):
+        return '1'
+
+    def on_boss_decision(self, view, rng):
+        # Back off once per zone to explore first when hurt, then commit
+        if view.hp_ratio >= 0.5 or self._retreated_zone == view.zone:
+            return '1'
+        self._retreated_zone = view.zone
+        return '2'
+
+    def on_skill_tree_choice(self, view, rng):
+        return '1' if view.skill_points > 0 else '4'
+
+    def on_global_skill_choice(self, view, rng):
+        if view.skill_points <= 0:
+            return '0'
+        # Spread points: strength, defense, hp, strength, hp, ...
+        order = ('1', '3', '2', '1', '3', '4', '5')
+        self._upgrade += 1
+        return order[self._upgrade % len(order)]
+
+    def on_personal_skill_choice(self, view, rng):
+        return '0'
+
+    def _best_ability(self, view):
+        """Menu key of the hardest-hitting quirk we can afford"""
+        best = None
+        for key, damage, cost in view.abilities:
+            if damage > 0 and cost <= view.energy and (best is None or damage > best[1]):
+                best = (key, damage)
+        return best[0] if best else None
+
+
+POLICIES = {
+    'greedy': GreedyPolicy,
+    'random': RandomPolicy,
+}
+
+
+# ----------------------------------------------------------------------
+# Running
+# ----------------------------------------------------------------------
+
+def play_run(seed, policy='greedy', max_steps=20000):
+    """Play one run to victory, defeat or max_steps and return its summary"""
+    rng = random.Random(seed * 7919 + 1)
+    player = POLICIES[policy]()
+
+    start = time.perf_counter()
+    game = FullWebGame(f'sim-{seed}', seed=seed)
+    game.start_game()
+
+    steps = captures = errors = 0
+    deepest = 1
+    captured = 0
+    while steps < max_steps and game.game_state not in ('victory', 'game_over'):
+        process_input(game, player(StateView.from_game(game), rng))
+        steps += 1
+
+        now_captured = sum(1 for c in game.characters if c.captured)
+        if now_captured > captured:
+            captures += now_captured - captured
+        captured = now_captured
+        if game.current_zone > deepest:
+            deepest = game.current_zone
+        for text in game.messages.texts:
+            if text.startswith('Error:'):
+                errors += 1
+
+    if game.game_state == 'victory':
+        result = 'win'
+    elif game.game_state == 'game_over':
+        result = 'loss'
+    else:
+        result = 'timeout'
+    return {
+        'seed': seed,
+        'result': result,
+        'zone': deepest,
+        'steps': steps,
+        'captures': captures,
+        'errors': errors,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _play_many(args):
+    seeds, policy, max_steps = args
+    return [play_run(seed, policy, max_steps) for seed in seeds]
+
+
+def run_batch(runs, workers=None, policy='greedy', seed=0, max_steps=20000):
+    """Play runs across a process pool, returning every run summary"""
+    seeds = list(range(seed, seed + runs))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return _play_many((seeds, policy, max_steps))
+
+    # Hand out chunks so each worker imports the game once and stays busy
+    chunk = max(1, min(50, runs // (workers * 4) or 1))
+    jobs = [(seeds[i:i + chunk], policy, max_steps) for i in range(0, runs, chunk)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in pool.map(_play_many, jobs):
+            results.extend(batch)
+    return results
+
+
+def summarize(results, elapsed):
+    """Aggregate run summaries into the balance report"""
+    runs = len(results)
+    outcomes = Counter(r['result'] for r in results)
+    zones = Counter(r['zone'] for r in results)
+    return {
+        'runs': runs,
+        'win_rate': outcomes['win'] / runs if runs else 0.0,
+        'outcomes': dict(outcomes),
+        'avg_zone': sum(r['zone'] for r in results) / runs if runs else 0.0,
+        'zones_reached': {zone: zones[zone] for zone in sorted(zones)},
+        'avg_captures': sum(r['captures'] for r in results) / runs if runs else 0.0,
+        'avg_steps': sum(r['steps'] for r in results) / runs if runs else 0.0,
+        'errors': sum(r['errors'] for r in results),
+        'seconds': elapsed,
+        'runs_per_sec': runs / elapsed if elapsed else 0.0,
+        'steps_per_sec': sum(r['steps'] for r in results) / elapsed if elapsed else 0.0,
+    }
+
+
+def print_report(report):
+    print(f"Runs:          {report['runs']}")
+    print(f"Win rate:      {report['win_rate'] * 100:.1f}%  {report['outcomes']}")
+    print(f"Avg zone:      {report['avg_zone']:.2f}")
+    print(f"Avg captures:  {report['avg_captures']:.2f}")
+    print(f"Avg steps:     {report['avg_steps']:.0f}")
+    print(f"Errors:        {report['errors']}")
+    print(f"Speed:         {report['runs_per_sec']:.1f} runs/sec, {report['steps_per_sec']:.0f} inputs/sec")
+    print("Zones reached:")
+    for zone, count in report['zones_reached'].items():
+        print(f"  {zone:2}: {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play headless Tower Descent runs')
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: CPU count)')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--seed', type=int, default=0, help='first run seed')
+    parser.add_argument('--max-steps', type=int, default=20000, help='inputs before a run times out')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_batch(args.runs, args.workers, args.policy, args.seed, args.max_steps)
+    report = summarize(results, time.perf_counter() - start)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
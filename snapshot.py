@@ -0,0 +1,580 @@
+"""
+SNAPSHOT CODEC
+Compact, versioned binary layout for FullWebGame state.
+Works on the plain data from FullWebGame.to_state() so only mutable state is
+written - dialogue, abilities and skill tree metadata are rebuilt on load.
+
+Layout (all integers are zigzag varints):
+    header      b'TDS' | format version (1 byte) | string table crc32 (4 bytes)
+    session     session id, zone/floor/room, selected character, theme + flow strings,
+                RNG seed + counter (v3)
+    zone        20 zone themes, zone map, room sets as bitmasks
+    characters  one positional record per student
+    global      global skill levels + active specialization
+    bosses      zone bosses (HP persists between attempts)
+    combat      current enemy, combat_state, shared inventory
+    extras      options, POI list, item/team-up menus (tagged values)
+
+Strings that come from the game itself (names, themes, states, items...) are
+written as an index into a shared string table. The table is fingerprinted in
+the header so a snapshot from a different content version is rejected instead
+of being decoded into the wrong names.
+"""
+
+import struct
+import zlib
+
+from mha_roguelike_complete import create_class_1a, get_character_skill_tree
+
+
+FORMAT_VERSION = 3
+# Older layouts decode_state() still understands
+_READABLE_VERSIONS = (1, 2, 3)
+MAGIC = b'TDS'
+
+
+class SnapshotError(ValueError):
+    """Raised for snapshots this build can't decode"""
+
+
+# ----------------------------------------------------------------------
+# String table
+# ----------------------------------------------------------------------
+
+_STATIC_STRINGS = (
+    # zone themes and special screens
+    'forest', 'flashfire', 'urban', 'lake', 'mountain', 'blizzard', 'underground',
+    'intro', 'final_boss', 'char_select',
+    # game states
+    'ready', 'navigation', 'combat', 'quirk_select', 'item_select', 'team_up_select',
+    'poi_search', 'poi_encounter', 'skill_tree_main', 'global_skills', 'personal_skills',
+    'view_bonuses', 'boss_warning', 'debug', 'game_over', 'victory',
+    # pending inputs
+    'continue', 'debug_menu', 'debug_zone_type', 'debug_floor', 'character_number',
+    'direction', 'combat_action', 'quirk_choice', 'item_choice', 'team_up_choice',
+    'passage_choice', 'poi_investigate', 'poi_choice', 'skill_tree_choice',
+    'global_skill_choice', 'personal_skill_choice', 'boss_decision',
+    # items and rewards
+    'Health Potion', 'Energy Drink', 'exp', 'item', 'items',
+    # POI content
+    'type', 'nothing', 'enemy', 'rescue', 'shinso_unlock', 'civilian', 'passage', 'lucky_bag',
+    # combat_state keys
+    'player_defense_buff', 'player_defense_buff_turns', 'enemy_stunned',
+    'enemy_defense_debuff', 'enemy_attack_debuff',
+    # option dicts
+    'key', 'text', 'index', 'direction', 'room', 'rewards',
+    'north', 'south', 'east', 'west', 'n', 's', 'e', 'w',
+    'search', 'rest', 'skills', 'plus_ultra',
+    'Attack', 'Quirk', 'Item', 'Skills', 'Plus Ultra', 'Team-Up', 'Back', 'Rest',
+    'Search for POI', 'Enter Boss Room', 'Retreat', 'Continue',
+    'Go north', 'Go south', 'Go east', 'Go west',
+    '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
+    # zone map room descriptions
+    'desc', 'entrance', 'corridor', 'chamber', 'boss room', 'junction', 'east wing',
+    'west wing', 'north chamber', 'central hub', 'west passage', 'corner room',
+    'north corridor', 'northeast room', 'central chamber',
+    # global skills
+    'strength', 'defense', 'hp', 'energy', 'evasion', 'attack',
+    # enemies
+    'Villain Thug', 'League Recruit', 'Nomu',
+    'A low-level criminal.', 'An eager villain recruit.', 'A bio-engineered creature.',
+)
+
+_table = None
+_table_index = None
+_table_crc = None
+
+
+def _build_table():
+    """Static strings plus every student name and personal skill id"""
+    global _table, _table_index, _table_crc
+    strings = list(_STATIC_STRINGS)
+    for char in create_class_1a():
+        strings.append(char.name)
+        strings.extend(sorted(get_character_skill_tree(char.name)))
+    # Keep the first occurrence so indexes stay stable
+    _table = tuple(dict.fromkeys(strings))
+    _table_index = {s: i for i, s in enumerate(_table)}
+    _table_crc = zlib.crc32('\0'.join(_table).encode('utf-8'))
+
+
+def _ensure_table():
+    if _table is None:
+        _build_table()
+
+
+# ----------------------------------------------------------------------
+# Primitive writers / readers
+# ----------------------------------------------------------------------
+
+# Tags for self-describing values
+_T_NONE, _T_FALSE, _T_TRUE, _T_INT, _T_FLOAT, _T_STR, _T_SREF, _T_LIST, _T_TUPLE, _T_DICT = range(10)
+
+_FLOAT = struct.Struct('<d')
+
+
+class _Writer:
+    __slots__ = ('buf',)
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def uint(self, value):
+        buf = self.buf
+        while value > 0x7F:
+            buf.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buf.append(value)
+
+    def int(self, value):
+        # zigzag so small negative numbers (hp below zero) stay one byte
+        value = value * 2 if value >= 0 else -value * 2 - 1
+        if value < 0x80:
+            self.buf.append(value)
+        else:
+            self.uint(value)
+
+    def ints(self, values):
+        """Zigzag varints for a run of integers (hot path for records)"""
+        buf = self.buf
+        for value in values:
+            value = value * 2 if value >= 0 else -value * 2 - 1
+            while value > 0x7F:
+                buf.append((value & 0x7F) | 0x80)
+                value >>= 7
+            buf.append(value)
+
+    def str(self, value):
+        index = _table_index.get(value)
+        if index is not None:
+            self.uint(index * 2 + 1)
+        else:
+            data = value.encode('utf-8')
+            self.uint(len(data) * 2)
+            self.buf += data
+
+    def opt_str(self, value):
+        if value is None:
+            self.uint(0)
+        else:
+            self.uint(1)
+            self.str(value)
+
+    def value(self, value):
+        """Self-describing value for the irregular parts of the state"""
+        buf = self.buf
+        if value is None:
+            buf.append(_T_NONE)
+        elif value is True:
+            buf.append(_T_TRUE)
+        elif value is False:
+            buf.append(_T_FALSE)
+        elif isinstance(value, int):
+            buf.append(_T_INT)
+            self.int(value)
+        elif isinstance(value, float):
+            buf.append(_T_FLOAT)
+            buf += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            index = _table_index.get(value)
+            if index is not None:
+                buf.append(_T_SREF)
+                self.uint(index)
+            else:
+                buf.append(_T_STR)
+                data = value.encode('utf-8')
+                self.uint(len(data))
+                buf += data
+        elif isinstance(value, (list, tuple)):
+            buf.append(_T_LIST if isinstance(value, list) else _T_TUPLE)
+            self.uint(len(value))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, dict):
+            buf.append(_T_DICT)
+            self.uint(len(value))
+            for key, item in value.items():
+                self.value(key)
+                self.value(item)
+        else:
+            raise SnapshotError(f"Can't snapshot value of type {type(value).__name__}")
+
+    def bitmask(self, numbers):
+        mask = 0
+        for n in numbers:
+            mask |= 1 << n
+        self.uint(mask)
+
+
+class _Reader:
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def uint(self):
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def int(self):
+        value = self.uint()
+        return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    def ints(self, count):
+        """Read a run of zigzag varints written by _Writer.ints()"""
+        data = self.data
+        pos = self.pos
+        values = []
+        for _ in range(count):
+            byte = data[pos]
+            pos += 1
+            if byte < 0x80:
+                value = byte
+            else:
+                value = byte & 0x7F
+                shift = 7
+                while True:
+                    byte = data[pos]
+                    pos += 1
+                    value |= (byte & 0x7F) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+            values.append(value >> 1 if not value & 1 else -((value + 1) >> 1))
+        self.pos = pos
+        return values
+
+    def str(self):
+        head = self.uint()
+        if head & 1:
+            return _table[head >> 1]
+        length = head >> 1
+        start = self.pos
+        self.pos += length
+        return self.data[start:self.pos].decode('utf-8')
+
+    def opt_str(self):
+        return self.str() if self.uint() else None
+
+    def value(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == _T_NONE:
+            return None
+        if tag == _T_TRUE:
+            return True
+        if tag == _T_FALSE:
+            return False
+        if tag == _T_INT:
+            return self.int()
+        if tag == _T_FLOAT:
+            value = _FLOAT.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return value
+        if tag == _T_SREF:
+            return _table[self.uint()]
+        if tag == _T_STR:
+            length = self.uint()
+            start = self.pos
+            self.pos += length
+            return self.data[start:self.pos].decode('utf-8')
+        if tag == _T_LIST:
+            return [self.value() for _ in range(self.uint())]
+        if tag == _T_TUPLE:
+            return tuple(self.value() for _ in range(self.uint()))
+        if tag == _T_DICT:
+            result = {}
+            for _ in range(self.uint()):
+                key = self.value()
+                result[key] = self.value()
+            return result
+        raise SnapshotError(f"Unknown value tag {tag}")
+
+    def bitmask(self):
+        mask = self.uint()
+        numbers = []
+        n = 0
+        while mask:
+            if mask & 1:
+                numbers.append(n)
+            mask >>= 1
+            n += 1
+        return numbers
+
+
+# ----------------------------------------------------------------------
+# Record layouts
+# ----------------------------------------------------------------------
+
+_CHAR_INT_FIELDS = (
+    'level', 'max_hp', 'hp', 'max_energy', 'energy',
+    'base_attack', 'attack', 'base_defense', 'defense',
+    'exp', 'exp_to_level', 'skill_points', 'evasion', 'ambush_chance',
+    'item_find_bonus', 'enemy_avoid_chance', 'secret_detection',
+    'skill_flags', 'rescue_boost', 'post_combat_heal',
+)
+_CHAR_FLAG_FIELDS = ('captured', 'unlocked', 'plus_ultra_available', 'plus_ultra_used_this_zone')
+
+# Version 1 wrote personal-skill effects as optional tagged values
+_V1_CHAR_INT_FIELDS = _CHAR_INT_FIELDS[:-3]
+_V1_OPTIONAL_FIELDS = (
+    'rescue_boost', 'post_combat_heal', 'can_find_lucky_bags',
+    'has_acid_veil', 'has_ribbit_recovery', 'has_cant_stop_sparkle',
+    'has_defensive_instinct', 'special_zone_bonus',
+)
+
+_BOSS_INT_FIELDS = ('level', 'zone', 'hp', 'max_hp', 'attack', 'defense', 'exp_reward', 'evasion')
+_ENEMY_INT_FIELDS = ('level', 'hp', 'max_hp', 'attack', 'defense', 'exp_reward', 'evasion')
+
+_GLOBAL_SKILLS = ('strength', 'defense', 'hp', 'energy', 'evasion')
+
+# Session attributes that only exist once the player reaches that screen
+_EXTRA_FIELDS = ('zone_encounters', 'pre_skill_state', 'current_poi_list',
+                 'current_item_map', 'current_team_ups')
+
+
+def _write_character(w, char):
+    w.str(char['name'])
+    w.ints([char[field] for field in _CHAR_INT_FIELDS])
+    flags = 0
+    for bit, field in enumerate(_CHAR_FLAG_FIELDS):
+        if char[field]:
+            flags |= 1 << bit
+    w.uint(flags)
+
+    w.uint(len(char['inventory']))
+    for item in char['inventory']:
+        w.str(item)
+    w.uint(len(char['personal_skills']))
+    for skill_id, level in char['personal_skills'].items():
+        w.str(skill_id)
+        w.uint(level)
+
+    w.value(char['special_zone_bonus'])
+
+
+def _read_character(r, version):
+    char = {'name': r.str()}
+    int_fields = _CHAR_INT_FIELDS if version >= 2 else _V1_CHAR_INT_FIELDS
+    char.update(zip(int_fields, r.ints(len(int_fields))))
+    flags = r.uint()
+    for bit, field in enumerate(_CHAR_FLAG_FIELDS):
+        char[field] = bool(flags & (1 << bit))
+
+    char['inventory'] = [r.str() for _ in range(r.uint())]
+    skills = {}
+    for _ in range(r.uint()):
+        skill_id = r.str()
+        skills[skill_id] = r.uint()
+    char['personal_skills'] = skills
+
+    if version >= 2:
+        char['special_zone_bonus'] = r.value()
+    else:
+        # Character.apply_state() folds the old per-skill attributes into skill_flags
+        present = r.uint()
+        for bit, field in enumerate(_V1_OPTIONAL_FIELDS):
+            if present & (1 << bit):
+                char[field] = r.value()
+    return char
+
+
+def _write_boss(w, boss):
+    w.str(boss['name'])
+    w.str(boss['description'])
+    w.ints([boss[field] for field in _BOSS_INT_FIELDS])
+    w.uint(1 if boss['defeated'] else 0)
+
+
+def _read_boss(r):
+    boss = {'name': r.str(), 'description': r.str()}
+    boss.update(zip(_BOSS_INT_FIELDS, r.ints(len(_BOSS_INT_FIELDS))))
+    boss['defeated'] = bool(r.uint())
+    return boss
+
+
+def _write_enemy(w, enemy):
+    w.str(enemy['name'])
+    w.str(enemy['type'])
+    w.str(enemy['description'])
+    w.ints([enemy[field] for field in _ENEMY_INT_FIELDS])
+
+
+def _read_enemy(r):
+    enemy = {'name': r.str(), 'type': r.str(), 'description': r.str()}
+    enemy.update(zip(_ENEMY_INT_FIELDS, r.ints(len(_ENEMY_INT_FIELDS))))
+    return enemy
+
+
+def _write_zone_map(w, zone_map):
+    if zone_map is None:
+        w.uint(0)
+        return
+    w.uint(1)
+    w.uint(zone_map['start'])
+    w.uint(zone_map['boss_room'])
+    w.uint(len(zone_map['rooms']))
+    for room_id, room in zone_map['rooms']:
+        w.uint(room_id)
+        for direction in ('north', 'south', 'east', 'west'):
+            w.uint(room.get(direction) or 0)
+        w.str(room.get('desc', ''))
+
+
+def _read_zone_map(r):
+    if not r.uint():
+        return None
+    zone_map = {'start': r.uint(), 'boss_room': r.uint(), 'rooms': []}
+    for _ in range(r.uint()):
+        room_id = r.uint()
+        room = {}
+        for direction in ('north', 'south', 'east', 'west'):
+            room[direction] = r.uint() or None
+        room['desc'] = r.str()
+        zone_map['rooms'].append([room_id, room])
+    return zone_map
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+
+def encode_state(state, include_messages=False):
+    """Pack FullWebGame.to_state() output into a snapshot"""
+    _ensure_table()
+    w = _Writer()
+    w.buf += MAGIC
+    w.buf.append(FORMAT_VERSION)
+    w.buf += struct.pack('<I', _table_crc)
+
+    w.str(state['session_id'])
+    w.uint(state['current_zone'])
+    w.uint(state['current_floor'])
+    w.uint(state['current_room'])
+    selected = state['selected_character']
+    w.uint(0 if selected is None else selected + 1)
+    w.opt_str(state['current_theme'])
+    w.opt_str(state['game_state'])
+    w.opt_str(state['pending_input'])
+    w.value(state['last_action'])
+    w.uint(1 if state['in_combat'] else 0)
+    seed, counter = state['rng']
+    w.uint(seed)
+    w.uint(counter)
+
+    w.uint(len(state['zone_themes']))
+    for theme in state['zone_themes']:
+        w.str(theme)
+    _write_zone_map(w, state['zone_map'])
+    for field in ('visited_rooms', 'cleared_rooms', 'rested_in_rooms', 'searched_rooms'):
+        w.bitmask(state[field])
+
+    w.uint(len(state['characters']))
+    for char in state['characters']:
+        _write_character(w, char)
+
+    levels = state['global_tree']['levels']
+    for skill in _GLOBAL_SKILLS:
+        w.uint(levels.get(skill, 0))
+    w.value(state['global_tree']['character_bonus'])
+
+    w.uint(len(state['zone_bosses']))
+    for zone, boss in state['zone_bosses']:
+        w.uint(zone)
+        _write_boss(w, boss)
+
+    enemy = state['current_enemy']
+    if enemy is None:
+        w.uint(0)
+    elif 'boss_zone' in enemy:
+        w.uint(1)
+        w.uint(enemy['boss_zone'])
+    else:
+        w.uint(2)
+        _write_enemy(w, enemy['enemy'])
+    w.value(state['combat_state'])
+    w.uint(len(state['shared_inventory']))
+    for item in state['shared_inventory']:
+        w.str(item)
+
+    w.value(state['current_options'])
+    present = [f for f in _EXTRA_FIELDS if f in state]
+    w.uint(sum(1 << _EXTRA_FIELDS.index(f) for f in present))
+    for field in present:
+        w.value(state[field])
+
+    w.value(state['messages'] if include_messages else None)
+    return bytes(w.buf)
+
+
+def decode_state(data):
+    """Unpack a snapshot into FullWebGame.from_state() input"""
+    _ensure_table()
+    if data[:3] != MAGIC:
+        raise SnapshotError("Not a game snapshot")
+    version = data[3]
+    if version not in _READABLE_VERSIONS:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    crc = struct.unpack_from('<I', data, 4)[0]
+    if crc != _table_crc:
+        raise SnapshotError("Snapshot was written by a different content version")
+
+    r = _Reader(data, 8)
+    state = {'session_id': r.str()}
+    state['current_zone'] = r.uint()
+    state['current_floor'] = r.uint()
+    state['current_room'] = r.uint()
+    selected = r.uint()
+    state['selected_character'] = None if selected == 0 else selected - 1
+    state['current_theme'] = r.opt_str()
+    state['game_state'] = r.opt_str()
+    state['pending_input'] = r.opt_str()
+    state['last_action'] = r.value()
+    state['in_combat'] = bool(r.uint())
+    if version >= 3:
+        state['rng'] = [r.uint(), r.uint()]
+
+    state['zone_themes'] = [r.str() for _ in range(r.uint())]
+    state['zone_map'] = _read_zone_map(r)
+    for field in ('visited_rooms', 'cleared_rooms', 'rested_in_rooms', 'searched_rooms'):
+        state[field] = r.bitmask()
+
+    state['characters'] = [_read_character(r, version) for _ in range(r.uint())]
+
+    levels = {skill: r.uint() for skill in _GLOBAL_SKILLS}
+    state['global_tree'] = {'levels': levels, 'character_bonus': r.value()}
+
+    bosses = []
+    for _ in range(r.uint()):
+        zone = r.uint()
+        bosses.append([zone, _read_boss(r)])
+    state['zone_bosses'] = bosses
+
+    kind = r.uint()
+    if kind == 0:
+        state['current_enemy'] = None
+    elif kind == 1:
+        state['current_enemy'] = {'boss_zone': r.uint()}
+    else:
+        state['current_enemy'] = {'enemy': _read_enemy(r)}
+    state['combat_state'] = r.value()
+    state['shared_inventory'] = [r.str() for _ in range(r.uint())]
+
+    state['current_options'] = r.value()
+    present = r.uint()
+    for bit, field in enumerate(_EXTRA_FIELDS):
+        if present & (1 << bit):
+            state[field] = r.value()
+
+    messages = r.value()
+    state['messages'] = messages if messages is not None else []
+    return state
@@ -7,6 +7,17 @@ class FullMHAGame {
         this.sessionId = null;
         this.gameState = null;
         
+        // persistent channel to the server: 'ws', 'sse' or null (plain fetch)
+        this.socket = null;
+        this.events = null;
+        this.channelKind = null;
+        this.channelRetries = 0;
+        this.noWebSocket = false;
+        
+        // fixed message text, cached across visits - see loadCatalog()
+        this.catalog = null;
+        this.catalogReady = this.loadCatalog();
+        
         // dom elements
         this.els = {
             startOverlay: document.getElementById('startOverlay'),
@@ -91,6 +102,8 @@ class FullMHAGame {
             this.gameState = save.gameState;
             this.els.startOverlay.classList.add('hidden');
             this.updateUI(this.gameState);
+            await this.catalogReady;
+            this.openChannel();
             this.els.userInput.focus();
         } catch (e) {
             alert('Save corrupted!');
@@ -102,9 +115,11 @@ class FullMHAGame {
     async startGame() {
         console.log('Starting game...');
         try {
+            await this.catalogReady;
             const response = await fetch('/api/start', {
                 method: 'POST',
-                headers: {'Content-Type': 'application/json'}
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({catalog: this.catalogVersion()})
             });
             
             const data = await response.json();
@@ -112,6 +127,7 @@ class FullMHAGame {
             
             this.sessionId = data.session_id;
             this.updateUI(data.state);
+            this.openChannel();
             
             this.els.startOverlay.classList.add('hidden');
             this.els.userInput.focus();
@@ -131,21 +147,37 @@ class FullMHAGame {
         this.els.userInput.value = '';
         console.log('Sending input:', input || '[ENTER]');
         
+        // Send 'continue' if empty
+        const command = input || 'continue';
+        
+        // Open WebSocket - the new state comes back as a frame on it
+        if (this.channelKind === 'ws' && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify({i: command}));
+            return;
+        }
+        
         try {
-            const response = await fetch('/api/input', {
+            // With an event stream open the state arrives there (204 here)
+            const url = this.channelKind === 'sse' ? '/api/send' : '/api/input';
+            const response = await fetch(url, {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({
                     session_id: this.sessionId,
-                    input: input || 'continue'  // Send 'continue' if empty
+                    input: command,
+                    // Last state we have - the server only sends what changed since
+                    ack: this.gameState ? this.gameState.version : null,
+                    epoch: this.gameState ? this.gameState.epoch : null,
+                    catalog: this.catalogVersion()
                 })
             });
+            if (response.status === 204) return;
             
             const data = await response.json();
             console.log('Response:', data);
             
             if (data.state) {
-                this.updateUI(data.state);
+                this.updateUI(this.applyStatePatch(data.state));
             } else if (data.error) {
                 this.showError(data.error);
             }
@@ -156,7 +188,170 @@ class FullMHAGame {
         }
     }
     
+    // ------------------------------------------------------------------
+    // Message catalog: fixed text fetched once and kept in localStorage.
+    // While we send its version the server sends line numbers and template
+    // ids in place of that text (any other version gets plain text)
+    // ------------------------------------------------------------------
+    
+    async loadCatalog() {
+        let cached = null;
+        try {
+            cached = JSON.parse(localStorage.getItem('tds_catalog'));
+        } catch (e) {
+            localStorage.removeItem('tds_catalog');
+        }
+        
+        try {
+            const headers = cached ? {'If-None-Match': `"${cached.version}"`} : {};
+            const response = await fetch('/api/catalog', {headers});
+            if (response.status === 304) {
+                this.catalog = cached;
+            } else if (response.ok) {
+                this.catalog = await response.json();
+                localStorage.setItem('tds_catalog', JSON.stringify(this.catalog));
+            }
+        } catch (error) {
+            // Offline or an older server - plain text messages still work
+            console.error('Catalog error:', error);
+        }
+    }
+    
+    catalogVersion() {
+        return this.catalog ? this.catalog.version : null;
+    }
+    
+    expandMessage(msg) {
+        // catalog line: 17 or [17, typeCode]; template: {t, p, y}; else {text, type}
+        const catalog = this.catalog;
+        if (typeof msg === 'number') {
+            return {text: catalog.lines[msg], type: 'normal'};
+        }
+        if (Array.isArray(msg)) {
+            return {text: catalog.lines[msg[0]], type: catalog.types[msg[1]]};
+        }
+        if (msg.t !== undefined) {
+            const text = catalog.templates[msg.t].replace(/\{(\w+)\}/g,
+                (blank, name) => (name in msg.p ? msg.p[name] : blank));
+            return {text, type: catalog.types[msg.y || 0]};
+        }
+        return {text: msg.text, type: msg.type || 'normal'};
+    }
+    
+    // ------------------------------------------------------------------
+    // Persistent channel: WebSocket, else Server-Sent Events + POST /api/send,
+    // else plain fetch('/api/input') for every input
+    // ------------------------------------------------------------------
+    
+    openChannel() {
+        this.closeChannel();
+        if (!this.sessionId) return;
+        
+        // The server deltas against the last state we have
+        const params = new URLSearchParams({session_id: this.sessionId});
+        if (this.gameState) {
+            params.set('ack', this.gameState.version);
+            params.set('epoch', this.gameState.epoch);
+        }
+        if (this.catalog) params.set('catalog', this.catalog.version);
+        
+        if (window.WebSocket && !this.noWebSocket) {
+            this.openSocket(params);
+        } else if (window.EventSource) {
+            this.openEventStream(params);
+        }
+    }
+    
+    closeChannel() {
+        const socket = this.socket;
+        const events = this.events;
+        this.socket = null;
+        this.events = null;
+        this.channelKind = null;
+        if (socket) socket.close();
+        if (events) events.close();
+    }
+    
+    openSocket(params) {
+        const scheme = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${scheme}//${location.host}/ws?${params}`);
+        let opened = false;
+        this.socket = socket;
+        
+        socket.onopen = () => {
+            opened = true;
+            this.channelKind = 'ws';
+            this.channelRetries = 0;
+        };
+        socket.onmessage = (e) => this.handleFrame(e.data);
+        socket.onclose = () => {
+            if (this.socket !== socket) return;  // closed on purpose
+            this.socket = null;
+            this.channelKind = null;
+            if (!opened) {
+                // No WebSocket endpoint (e.g. the Flask server) - use the event stream
+                this.noWebSocket = true;
+                this.openChannel();
+            } else if (this.channelRetries < 5) {
+                // Dropped - inputs go over fetch until we're back
+                const delay = 1000 * Math.pow(2, this.channelRetries++);
+                setTimeout(() => { if (!this.socket) this.openChannel(); }, delay);
+            }
+        };
+    }
+    
+    openEventStream(params) {
+        const events = new EventSource(`/api/events?${params}`);
+        this.events = events;
+        
+        events.onopen = () => {
+            this.channelKind = 'sse';
+        };
+        events.onmessage = (e) => this.handleFrame(e.data);
+        events.onerror = () => {
+            if (this.events !== events) return;
+            // The browser reconnects by itself unless the server refused the stream
+            this.channelKind = null;
+            if (events.readyState === EventSource.CLOSED) {
+                this.events = null;
+            }
+        };
+    }
+    
+    handleFrame(text) {
+        let frame;
+        try {
+            frame = JSON.parse(text);
+        } catch (e) {
+            console.error('Bad frame:', text);
+            return;
+        }
+        
+        if (frame.t === 'state') {
+            this.updateUI(this.applyStatePatch(frame.s));
+        } else if (frame.t === 'msg') {
+            // Pushed by the server - added below whatever is on screen
+            frame.m.forEach(msg => this.addMessage(msg.text, msg.type));
+            this.scrollToBottom();
+        } else if (frame.t === 'error') {
+            this.showError(frame.m);
+        }
+    }
+    
+    applyStatePatch(state) {
+        // Full states replace ours, deltas only carry the sections that changed
+        // (null means the section is gone, e.g. the enemy after combat)
+        if (!state.delta || !this.gameState) {
+            return state;
+        }
+        return Object.assign({}, this.gameState, state);
+    }
+    
     updateUI(state) {
+        // Expanded here so saves and later deltas only ever hold plain text
+        if (state.messages) {
+            state.messages = state.messages.map(msg => this.expandMessage(msg));
+        }
         this.gameState = state;
         
         // Check if this is a new screen (game state changed)
@@ -311,7 +506,8 @@ class FullMHAGame {
             this.els.charEnergyText.textContent = `${char.energy}/${char.max_energy}`;
             
             // Update inventory count
-            const itemCount = char.inventory ? char.inventory.length : 0;
+            const items = char.shared_inventory || char.inventory;
+            const itemCount = items ? items.length : 0;
             this.els.inventoryCount.textContent = `Items: ${itemCount}`;
         } else {
             this.els.statsBar.classList.add('hidden');